@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+
+# Дни недели в порядке кодов weekday_codes (понедельник - 0)
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# 1970-01-01 (день 0 datetime64[D]) - четверг
+_EPOCH_WEEKDAY = 3
+# Пока сумма модулей целых слагаемых меньше 2**53, bincount (float64) считает точно
+_EXACT_FLOAT_LIMIT = 2 ** 53
+
+
+def day_codes(dates: pd.Series) -> tuple:
+    """
+    Кодирует даты целыми номерами дней, начиная с самого раннего дня.
+
+    Код строки - смещение ее дня (datetime64[D]) от первого дня, поэтому
+    коды плотные и годятся как индексы np.bincount; время суток отбрасывается.
+
+    Args:
+        dates: Колонка 'Дата' (datetime)
+
+    Returns:
+        tuple: (коды строк int64, -1 для пропусков; первый день datetime64[D]
+                или None, если дат нет)
+    """
+    days = dates.to_numpy().astype("datetime64[D]").view("int64")
+    missing = days == np.iinfo(np.int64).min
+    if missing.all():
+        return np.full(len(days), -1, dtype=np.int64), None
+    first = days[~missing].min()
+    codes = days - first
+    codes[missing] = -1
+    return codes, np.datetime64(int(first), "D")
+
+
+def weekday_codes(days: np.ndarray) -> np.ndarray:
+    """
+    Возвращает номера дней недели (понедельник - 0) для дней datetime64[D].
+    """
+    return (days.astype("datetime64[D]").view("int64") + _EPOCH_WEEKDAY) % 7
+
+
+def category_codes(values: pd.Series) -> tuple:
+    """
+    Кодирует значения колонки (например, 'Город') целыми кодами.
+
+    Для категориальной колонки используются готовые коды категорий,
+    иначе значения раскладываются pd.factorize с сортировкой.
+
+    Returns:
+        tuple: (коды строк, -1 для пропусков; значения кодов)
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(dtype=np.int64), values.cat.categories
+    return pd.factorize(values, sort=True)
+
+
+def _amount_values(amounts: pd.Series) -> np.ndarray:
+    """
+    Возвращает суммы массивом int64 (целые суммы) или float64; пропуски - нули.
+    """
+    dtype = np.int64 if pd.api.types.is_integer_dtype(amounts.dtype) else np.float64
+    return amounts.to_numpy(dtype=dtype, na_value=0)
+
+
+def sum_by_code(codes: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+    """
+    Суммирует значения по целым кодам групп (0..size-1, -1 - строка пропускается).
+
+    Суммы считаются np.bincount с весами за один проход без сортировки.
+    Для целых значений (копейки) результат точный: если сумма модулей может
+    превысить точность float64, значения сортируются по коду и складываются
+    в int64 через np.add.reduceat.
+
+    Args:
+        codes: Коды групп строк (int)
+        values: Значения строк (int64 или float64)
+        size: Число групп
+
+    Returns:
+        np.ndarray: Суммы групп (тип значений)
+    """
+    valid = codes >= 0
+    if not valid.all():
+        codes, values = codes[valid], values[valid]
+    if values.dtype.kind != "i":
+        return np.bincount(codes, weights=values, minlength=size)[:size]
+
+    if np.abs(values).sum(dtype=np.float64) < _EXACT_FLOAT_LIMIT:
+        return np.bincount(codes, weights=values, minlength=size)[:size].round().astype(np.int64)
+
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    sums = np.zeros(size, dtype=np.int64)
+    if len(starts):
+        sums[sorted_codes[starts]] = np.add.reduceat(values[order], starts)
+    return sums
+
+
+def count_by_code(codes: np.ndarray, size: int) -> np.ndarray:
+    """
+    Считает строки по целым кодам групп (-1 - строка пропускается).
+    """
+    return np.bincount(codes[codes >= 0], minlength=size)[:size]
+
+
+def daily_sums(dates: pd.Series, amounts: pd.Series) -> tuple:
+    """
+    Суммирует продажи по дням.
+
+    В результат входят дни, в которых есть хотя бы одна строка с датой
+    (как в groupby по дате); пропуски сумм считаются нулями.
+
+    Args:
+        dates: Колонка 'Дата' (datetime)
+        amounts: Колонка 'Сумма' (в единицах хранения)
+
+    Returns:
+        tuple: (дни datetime64[D] по возрастанию; суммы за дни)
+    """
+    codes, first = day_codes(dates)
+    values = _amount_values(amounts)
+    if first is None:
+        return np.empty(0, dtype="datetime64[D]"), values[:0]
+    size = int(codes.max()) + 1
+    present = np.flatnonzero(count_by_code(codes, size))
+    sums = sum_by_code(codes, values, size)
+    return first + present, sums[present]
+
+
+def weekday_sums(dates: pd.Series, amounts: pd.Series) -> np.ndarray:
+    """
+    Суммирует продажи по дням недели.
+
+    Строки сначала сводятся к дневным итогам (daily_sums), затем дневные
+    итоги - к семи дням недели, поэтому день недели вычисляется не для
+    каждой строки, а для каждого дня.
+
+    Returns:
+        np.ndarray: 7 сумм, с понедельника по воскресенье
+    """
+    days, sums = daily_sums(dates, amounts)
+    return sum_by_code(weekday_codes(days), sums, len(WEEKDAYS))
+
+
+def group_sums(values: pd.Series, amounts: pd.Series) -> tuple:
+    """
+    Суммирует продажи по значениям колонки (например, 'Город').
+
+    В результат входят только встречающиеся значения (как в groupby
+    с observed=True); строки без значения пропускаются.
+
+    Returns:
+        tuple: (значения групп; суммы групп)
+    """
+    codes, uniques = category_codes(values)
+    amounts = _amount_values(amounts)
+    present = np.flatnonzero(count_by_code(codes, len(uniques)))
+    return uniques[present], sum_by_code(codes, amounts, len(uniques))[present]
@@ -1,5 +1,74 @@
+import numpy as np
 import pandas as pd
 
+from aggregation import daily_sums, group_sums
+
+
+# Атрибут DataFrame с масштабом хранения сумм: 100, если 'Сумма' хранится
+# в целых копейках/центах, иначе атрибут отсутствует (масштаб 1)
+AMOUNT_SCALE_ATTR = "amount_scale"
+# Число копеек/центов в денежной единице
+MINOR_UNITS_SCALE = 100
+
+# Курсы валют: колонки 'Дата', 'Валюта' и FX_RATE_COLUMN - число единиц
+# базовой валюты за одну единицу валюты на эту дату
+FX_RATE_COLUMN = "Курс"
+FX_BASE_CURRENCY = "RUB"
+
+# Колонки KPI по группам (calculate_group_kpis)
+KPI_COLUMNS = ["total_sales", "avg_daily_sales", "max_daily_sales"]
+
+# Атрибут DataFrame с отпечатком набора данных (записывается загрузчиками),
+# по которому кэшируются производные структуры
+DATASET_FINGERPRINT_ATTR = "dataset_fingerprint"
+
+
+def get_amount_scale(df: pd.DataFrame) -> int:
+    """
+    Возвращает масштаб хранения сумм в DataFrame.
+
+    Args:
+        df: DataFrame с данными о продажах
+
+    Returns:
+        int: Число единиц хранения в одной денежной единице (1 или 100)
+    """
+    if df is None:
+        return 1
+    return df.attrs.get(AMOUNT_SCALE_ATTR, 1)
+
+
+def to_display_units(value, scale: int = 1):
+    """
+    Переводит сумму (число или Series) из единиц хранения в денежные единицы.
+
+    Args:
+        value: Сумма в единицах хранения
+        scale: Масштаб хранения сумм
+
+    Returns:
+        Сумма в денежных единицах
+    """
+    return value / scale if scale != 1 else value
+
+
+def to_minor_units(amounts: pd.Series, scale: int = MINOR_UNITS_SCALE) -> pd.Series:
+    """
+    Переводит суммы в денежных единицах в целые копейки/центы.
+
+    Сумма округляется до ближайшей копейки один раз, при загрузке; дальше
+    итоги считаются в целых числах без накопления ошибки округления.
+
+    Args:
+        amounts: Суммы в денежных единицах (нечисловые значения - пропуски)
+        scale: Число единиц хранения в одной денежной единице
+
+    Returns:
+        pd.Series: Суммы типа int64 (Int64, если есть пропуски)
+    """
+    minor = (pd.to_numeric(amounts, errors="coerce") * scale).round()
+    return minor.astype("Int64" if minor.isna().any() else "int64")
+
 
 def validate_data_frame(df: pd.DataFrame) -> bool:
     """
@@ -45,7 +114,18 @@ def calculate_total_sales(sales_data: pd.DataFrame) -> float:
     Returns:
         float: Общая сумма продаж
     """
-    return sales_data["Сумма"].sum()
+    return to_display_units(sales_data["Сумма"].sum(), get_amount_scale(sales_data))
+
+
+def _daily_totals(sales_data: pd.DataFrame) -> pd.Series:
+    """
+    Суммы продаж по дням в единицах хранения (целые для сумм в копейках).
+
+    Дни кодируются целыми смещениями, суммы считаются np.bincount
+    (см. aggregation.daily_sums) без группировки по объектам date.
+    """
+    days, sums = daily_sums(sales_data["Дата"], sales_data["Сумма"])
+    return pd.Series(sums, index=pd.Index(days.astype(object), name="Дата"), name="Сумма")
 
 
 def calculate_daily_sales(sales_data: pd.DataFrame) -> pd.Series:
@@ -58,7 +138,7 @@ def calculate_daily_sales(sales_data: pd.DataFrame) -> pd.Series:
     Returns:
         pd.Series: Продажи по дням
     """
-    return sales_data.groupby(sales_data["Дата"].dt.date)["Сумма"].sum()
+    return to_display_units(_daily_totals(sales_data), get_amount_scale(sales_data))
 
 
 def calculate_average_daily_sales(daily_sales: pd.Series) -> float:
@@ -108,18 +188,240 @@ def calculate_kpi_metrics(df: pd.DataFrame) -> tuple:
     if cleaned_data.empty:
         return (0, 0, 0)
 
-    # Вычисляем общую сумму продаж
-    total_sales = calculate_total_sales(cleaned_data)
-
-    # Вычисляем ежедневные продажи
-    daily_sales = calculate_daily_sales(cleaned_data)
+    # Итоги считаются в единицах хранения (для копеек - в целых числах),
+    # в денежные единицы переводятся только результаты
+    scale = get_amount_scale(cleaned_data)
+    total_sales = cleaned_data["Сумма"].sum()
+    daily_sales = _daily_totals(cleaned_data)
 
     # Вычисляем средние и максимальные ежедневные продажи
     avg_daily_sales = calculate_average_daily_sales(daily_sales)
     max_daily_sales = calculate_maximum_daily_sales(daily_sales)
 
-    return (total_sales, avg_daily_sales, max_daily_sales)
+    return tuple(to_display_units(value, scale) for value in (total_sales, avg_daily_sales, max_daily_sales))
 
 
 # Алиас для функции, чтобы соответствовать описанию в задании
 calculate_kpis = calculate_kpi_metrics
+
+
+def calculate_group_kpis(df: pd.DataFrame, by="Город") -> pd.DataFrame:
+    """
+    Вычисляет KPI (см. calculate_kpi_metrics) для каждой группы за один проход.
+
+    Вместо вызова calculate_kpi_metrics для каждой группы данные очищаются
+    один раз и группируются один раз по группе и дню; KPI всех групп
+    получаются сведением дневных итогов по группе. Строки без значения
+    группы не входят ни в одну группу.
+
+    Args:
+        df: DataFrame с колонками 'Дата', 'Сумма' и колонками группировки
+            (данные или куб продаж)
+        by: Колонка группировки (например, 'Город' или 'Валюта') или список колонок
+
+    Returns:
+        pd.DataFrame: Строка на группу (индекс - значения by), колонки
+                      KPI_COLUMNS в денежных единицах
+    """
+    keys = [by] if isinstance(by, str) else list(by)
+    if not validate_data_frame(df) or any(key not in df.columns for key in keys):
+        empty = pd.DataFrame(columns=KPI_COLUMNS, dtype="float64")
+        return empty.rename_axis(keys[0]) if len(keys) == 1 else empty
+
+    cleaned = clean_sales_data(df)
+    daily = cleaned.groupby([cleaned[key] for key in keys] + [cleaned["Дата"].dt.normalize()],
+                            observed=True)["Сумма"].sum()
+    by_group = daily.groupby(level=list(range(len(keys))), observed=True)
+    kpis = pd.DataFrame(dict(zip(KPI_COLUMNS, (by_group.sum(), by_group.mean(), by_group.max()))))
+    return to_display_units(kpis, get_amount_scale(df))
+
+
+def calculate_currency_kpis(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Вычисляет KPI отдельно для каждой валюты (см. calculate_group_kpis).
+
+    Суммы разных валют не складываются.
+
+    Args:
+        df: DataFrame с колонками 'Дата', 'Сумма' и 'Валюта'
+
+    Returns:
+        pd.DataFrame: Индекс - валюта, колонки KPI_COLUMNS
+    """
+    return calculate_group_kpis(df, "Валюта")
+
+
+def _asof_rates(rates: pd.DataFrame, currency, days: np.ndarray, base_currency: str) -> np.ndarray:
+    """
+    Курсы валюты на каждый день: последний известный курс на эту дату или раньше.
+
+    Returns:
+        np.ndarray: Курсы (float64), NaN - курса на дату нет (в том числе,
+                    если в таблице нет ни одного курса валюты)
+    """
+    if currency == base_currency:
+        return np.where(np.isnat(days), np.nan, 1.0)
+    rows = rates[rates["Валюта"] == currency]
+    if rows.empty:
+        return np.full(len(days), np.nan)
+    rate_days = rows["Дата"].to_numpy().astype("datetime64[D]")
+    positions = np.searchsorted(rate_days, days, side="right") - 1
+    found = (positions >= 0) & ~np.isnat(days)
+    return np.where(found, rows[FX_RATE_COLUMN].to_numpy(dtype="float64")[positions.clip(0)], np.nan)
+
+
+def convert_currency(df: pd.DataFrame, rates: pd.DataFrame, currency: str,
+                     base_currency: str = FX_BASE_CURRENCY) -> pd.DataFrame:
+    """
+    Переводит суммы в валюту отчета по курсам на дату продажи.
+
+    Курс выбирается соединением "as-of" по 'Дата': последний курс на день
+    продажи или раньше. Соединение векторное - бинарный поиск дней строк
+    в датах курсов каждой валюты (число валют мало), без обхода строк.
+    Целые суммы (копейки) после перевода округляются до копейки.
+
+    Args:
+        df: DataFrame с колонками 'Дата', 'Сумма' и 'Валюта' (данные или куб)
+        rates: Курсы: 'Дата', 'Валюта', FX_RATE_COLUMN, отсортированные по дате
+        currency: Валюта отчета
+        base_currency: Валюта, к которой приведены курсы
+
+    Returns:
+        pd.DataFrame: Копия df с суммами в валюте отчета; суммы строк без
+                      курса на дату - пропуски
+
+    Raises:
+        ValueError: Если нет колонок данных или курсов
+    """
+    for col in ("Дата", "Сумма", "Валюта"):
+        if col not in df.columns:
+            raise ValueError(f"DataFrame должен содержать колонку '{col}'")
+    for col in ("Дата", "Валюта", FX_RATE_COLUMN):
+        if col not in rates.columns:
+            raise ValueError(f"Таблица курсов должна содержать колонку '{col}'")
+
+    days = df["Дата"].to_numpy().astype("datetime64[D]")
+    codes, currencies = pd.factorize(df["Валюта"])
+    factors = np.full(len(df), np.nan)
+    for code, source in enumerate(currencies):
+        if source == currency:
+            factors[codes == code] = 1.0
+            continue
+        rows = np.flatnonzero(codes == code)
+        factors[rows] = (_asof_rates(rates, source, days[rows], base_currency)
+                         / _asof_rates(rates, currency, days[rows], base_currency))
+
+    amounts = pd.to_numeric(df["Сумма"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan) * factors
+    if pd.api.types.is_integer_dtype(df["Сумма"].dtype):
+        converted = pd.Series(np.round(amounts), index=df.index).astype("Int64")
+    else:
+        converted = pd.Series(amounts, index=df.index)
+    return df.assign(**{"Сумма": converted, "Валюта": currency})
+
+
+class SalesAccumulator:
+    """
+    Накапливает агрегаты продаж по частям данных (чанкам).
+
+    Позволяет получить те же KPI, что и calculate_kpi_metrics, а также
+    продажи по дням и по городам, не собирая все строки в один DataFrame.
+    Объем памяти зависит от числа дней и городов, а не от числа строк.
+
+    Агрегаты накапливаются в единицах хранения: с amount_scale суммы
+    чанков переводятся в целые копейки, и итоги по всем чанкам точные.
+    """
+
+    def __init__(self, quality=None, deduplicator=None, amount_scale: int = 1):
+        """
+        Args:
+            quality: Профиль качества данных (data_quality.QualityProfile),
+                     который накапливается в том же проходе, или None
+            deduplicator: dedup.DuplicateDetector для удаления повторов строк
+                          до агрегации или None
+            amount_scale: Масштаб хранения сумм (MINOR_UNITS_SCALE - копейки)
+        """
+        self.quality = quality
+        self.deduplicator = deduplicator
+        self.row_count = 0
+        self.currencies = []
+        self.amount_scale = amount_scale
+        self._total = 0
+        self._daily = pd.Series(dtype="int64")
+        self._city = pd.Series(dtype="int64")
+
+    @property
+    def total_sales(self) -> float:
+        """Общая сумма продаж в денежных единицах."""
+        return to_display_units(self._total, self.amount_scale)
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """
+        Добавляет чанк данных к накопленным агрегатам.
+
+        Args:
+            chunk: DataFrame с колонками 'Дата' (datetime) и 'Сумма'
+        """
+        if not validate_data_frame(chunk):
+            return
+        if self.quality is not None:
+            self.quality.add(chunk)
+        if self.deduplicator is not None:
+            chunk = self.deduplicator.drop(chunk)
+
+        cleaned = clean_sales_data(chunk)
+        if cleaned.empty:
+            return
+
+        if get_amount_scale(cleaned) == 1 and self.amount_scale != 1:
+            cleaned = cleaned.assign(**{"Сумма": to_minor_units(cleaned["Сумма"], self.amount_scale)})
+        else:
+            self.amount_scale = get_amount_scale(cleaned)
+        self._total += cleaned["Сумма"].sum()
+        self.row_count += len(cleaned)
+
+        days, sums = daily_sums(cleaned["Дата"], cleaned["Сумма"])
+        self._daily = self._daily.add(pd.Series(sums, index=pd.DatetimeIndex(days)), fill_value=0)
+
+        if "Город" in cleaned.columns:
+            cities, sums = group_sums(cleaned["Город"], cleaned["Сумма"])
+            self._city = self._city.add(pd.Series(sums, index=cities), fill_value=0)
+
+        if "Валюта" in cleaned.columns:
+            for currency in cleaned["Валюта"].dropna().unique():
+                if currency not in self.currencies:
+                    self.currencies.append(currency)
+
+    def daily_sales(self) -> pd.Series:
+        """
+        Возвращает продажи по дням в формате calculate_daily_sales.
+
+        Returns:
+            pd.Series: Продажи по дням (индекс - даты)
+        """
+        daily = to_display_units(self._daily.sort_index(), self.amount_scale)
+        return pd.Series(daily.to_numpy(), index=pd.Index(daily.index.date, name="Дата"), name="Сумма")
+
+    def city_sales(self) -> pd.Series:
+        """
+        Возвращает продажи по городам.
+
+        Returns:
+            pd.Series: Продажи по городам, отсортированные по убыванию
+        """
+        city = to_display_units(self._city, self.amount_scale)
+        return city.rename_axis("Город").rename("Сумма").sort_values(ascending=False)
+
+    def kpi_metrics(self) -> tuple:
+        """
+        Вычисляет KPI по накопленным агрегатам.
+
+        Returns:
+            tuple: (общая сумма продаж, средние ежедневные продажи,
+                    максимальные ежедневные продажи)
+        """
+        if self.row_count == 0:
+            return (0, 0, 0)
+
+        return tuple(to_display_units(value, self.amount_scale) for value in
+                     (self._total, calculate_average_daily_sales(self._daily),
+                      calculate_maximum_daily_sales(self._daily)))
@@ -1,227 +1,84 @@
 import streamlit as st
 import pandas as pd
-from data_loader import load_data, load_uploaded_data
-from plotting import create_sales_over_time_plot, create_city_sales_plot, create_day_of_week_plot
-from analysis import calculate_kpi_metrics
+from data_loader import (load_uploaded_data, load_uploaded_data_streaming, should_stream_upload,
+                         DEFAULT_AMOUNT_DTYPE, MEMORY_PROFILE_ATTR, ANALYSIS_COLUMNS, NAME_COLUMNS, SOURCE_COLUMN, INGEST_REPORT_ATTR)
+from plotting import create_sales_over_time_plot, create_city_sales_plot, create_day_of_week_plot, create_daily_sales_plot
+from incremental_loader import load_shared_directory_data
+from partitioned_store import load_shared_sales_store
+from query_backend import ROW_LIMIT_ATTR, load_shared_sqlite_backend
+from sales_cube import (UNCONVERTED_ATTR, converted_cube_fingerprint, get_converted_cube, get_group_kpis,
+                        get_range_kpi_metrics, get_sales_cube, kpi_cache)
+from fx_rates import load_fx_rates
+from analysis import DATASET_FINGERPRINT_ATTR, FX_BASE_CURRENCY, get_amount_scale, to_display_units
+from data_quality import get_quality_profile
+from dedup import DUPLICATES_ATTR
+from row_index import get_row_index
+from i18n import SUPPORTED_LANGUAGES, load_catalog
+
+# Каталог переводов загружается из locales/app.json один раз на процесс
+catalog = load_catalog('app')
+
+# Суммы хранятся в целых копейках: итоги считаются точно в целых числах,
+# а в денежные единицы переводятся только при отображении. Тот же вариант
+# используют хранилище с разделами и база SQLite
+AMOUNT_DTYPE = DEFAULT_AMOUNT_DTYPE
+
 
 # Функции перевода текста
 def get_text(lang, key):
-    translations = {
-        'русский': {
-            'title': 'Анализатор продаж интернет-магазинов',
-            'sidebar_header': 'Параметры анализа',
-            'upload_label': 'Загрузите свой файл данных (CSV или Excel)',
-            'upload_success': 'Данные успешно загружены из файла',
-            'date_start': 'Начальная дата',
-            'date_end': 'Конечная дата',
-            'select_language': 'Выберите язык',
-            'total_sales': 'Общая сумма продаж',
-            'avg_daily_sales': 'Средние ежедневные продажи',
-            'max_daily_sales': 'Максимальные ежедневные продажи',
-            'sales_over_time': 'Продажи по дням',
-            'city_sales': 'Продажи по городам',
-            'day_of_week_sales': 'Продажи по дням недели',
-            'selected_period_data': 'Данные за выбранный период',
-            'data_table_title': 'Таблица данных за выбранный период',
-            'period_data_header': 'Данные по всему периоду',
-            'selected_period_sales': 'Данные по выбранному периоду',
-            'all_period_sales': 'Данные по всему периоду',
-            'note_faq': 'Часто задаваемые вопросы находятся на отдельной странице \'FAQ\', доступной через боковое меню.',
-            'error_file_not_found': 'Не удалось загрузить данные. Пожалуйста, проверьте наличие файла dataset_1.xlsx в папке web_app/data или загрузите свой файл.',
-            'error_missing_columns': 'Файл данных должен содержать следующие колонки: {}',
-            'error_invalid_file': 'Поддерживаются только файлы CSV и Excel (.xlsx, .xls)',
-            'select_city': 'Выберите город',
-            'all_cities': 'Все города',
-            'cities': {
-                'Москва': 'Moscow',
-                'Санкт-Петербург': 'St. Petersburg',
-                'Казань': 'Kazan',
-                'Новосибирск': 'Novosibirsk',
-                'Екатеринбург': 'Yekaterinburg',
-                'Нижний Новгород': 'Nizhny Novgorod',
-                'Краснодар': 'Krasnodar',
-                'Самара': 'Samara',
-                'Челябинск': 'Chelyabinsk',
-                'Ростов-на-Дону': 'Rostov-on-Don',
-                'Уфа': 'Ufa',
-                'Волгоград': 'Volgograd',
-                'Пермь': 'Perm',
-                'Воронеж': 'Voronezh',
-                'Саратов': 'Saratov',
-                'Тюмень': 'Tyumen',
-                'Тольятти': 'Tolyatti',
-                'Ижевск': 'Izhevsk',
-                'Барнаул': 'Barnaul',
-                'Иркутск': 'Irkutsk'
-            },
-            'faq_q1': 'Какие данные можно анализировать?',
-            'faq_a1': 'Приложение позволяет анализировать данные о продажах интернет-магазина, включая дату, город, имя клиента, фамилию и сумму покупки.',
-            'faq_q2': 'Как интерпретировать графики?',
-            'faq_a2': 'График продаж по времени показывает динамику продаж в течение выбранного периода. График по городам показывает сравнение продаж по различным городам.',
-            'faq_q3': 'Как интерпретировать графики?',
-            'faq_a3': 'График продаж по времени показывает динамику продаж в течение выбранного периода. График по городам показывает сравнение продаж по различным городам.',
-            'faq_q4': 'Какие метрики отображаются?',
-            'faq_a4': 'Приложение отображает общую сумму продаж, средние ежедневные продажи и максимальные ежедневные продажи за выбранный период.',
-            'faq_q5': 'Как выбрать язык интерфейса?',
-            'faq_a5': 'Вы можете выбрать язык интерфейса из выпадающего списка в боковой панели. В настоящее время поддерживаются русский, английский и китайский языки.',
-            'faq_q6': 'Как фильтровать данные по дате?',
-            'faq_a6': 'Используйте виджеты выбора даты в боковой панели, чтобы установить начальную и конечную дату для анализа.',
-            'faq_q7': 'Какие форматы файлов поддерживаются для загрузки?',
-            'faq_a7': 'Приложение поддерживает загрузку файлов в формате CSV и Excel (.xlsx, .xls). Файл должен содержать колонки: \'Дата\', \'Город\', \'Имя\', \'Фамилия\', \'Сумма\', \'Валюта\'.',
-            'nav_analysis': 'Анализ данных',
-            'nav_faq': 'FAQ',
-            'date_col': 'Дата',
-            'city_col': 'Город',
-            'name_col': 'Имя',
-            'surname_col': 'Фамилия',
-            'amount_col': 'Сумма',
-            'currency_col': 'Валюта'
-        },
-        'английский': {
-            'title': 'E-commerce Sales Analyzer',
-            'sidebar_header': 'Analysis Parameters',
-            'upload_label': 'Upload your data file (CSV or Excel)',
-            'upload_success': 'Data successfully loaded from file',
-            'date_start': 'Start Date',
-            'date_end': 'End Date',
-            'select_language': 'Select Language',
-            'total_sales': 'Total Sales Amount',
-            'avg_daily_sales': 'Average Daily Sales',
-            'max_daily_sales': 'Maximum Daily Sales',
-            'sales_over_time': 'Sales Over Time',
-            'city_sales': 'Sales by City',
-            'day_of_week_sales': 'Sales by Day of Week',
-            'selected_period_data': 'Data for Selected Period',
-            'data_table_title': 'Selected Period Data Table',
-            'period_data_header': 'Data for Entire Period',
-            'selected_period_sales': 'Data for Selected Period',
-            'all_period_sales': 'Data for Entire Period',
-            'note_faq': 'Frequently asked questions are on a separate \'FAQ\' page accessible through the sidebar menu.',
-            'error_file_not_found': 'Failed to load data. Please check if dataset_1.xlsx file exists in the web_app/data folder or upload your own file.',
-            'error_missing_columns': 'Data file must contain the following columns: {}',
-            'error_invalid_file': 'Only CSV and Excel (.xlsx, .xls) files are supported',
-            'select_city': 'Select City',
-            'all_cities': 'All Cities',
-            'cities': {
-                'Москва': 'Moscow',
-                'Санкт-Петербург': 'St. Petersburg',
-                'Казань': 'Kazan',
-                'Новосибирск': 'Novosibirsk',
-                'Екатеринбург': 'Yekaterinburg',
-                'Нижний Новгород': 'Nizhny Novgorod',
-                'Краснодар': 'Krasnodar',
-                'Самара': 'Samara',
-                'Челябинск': 'Chelyabinsk',
-                'Ростов-на-Дону': 'Rostov-on-Don',
-                'Уфа': 'Ufa',
-                'Волгоград': 'Volgograd',
-                'Пермь': 'Perm',
-                'Воронеж': 'Voronezh',
-                'Саратов': 'Saratov',
-                'Тюмень': 'Tyumen',
-                'Тольятти': 'Tolyatti',
-                'Ижевск': 'Izhevsk',
-                'Барнаул': 'Barnaul',
-                'Иркутск': 'Irkutsk'
-            },
-            'faq_q1': 'What data can be analyzed?',
-            'faq_a1': 'The application allows analyzing e-commerce sales data, including date, city, customer name, surname, and purchase amount.',
-            'faq_q2': 'How to interpret the graphs?',
-            'faq_a2': 'The sales over time chart shows sales dynamics over the selected period. The city chart shows sales comparison across different cities.',
-            'faq_q3': 'How to interpret the graphs?',
-            'faq_a3': 'The sales over time chart shows sales dynamics over the selected period. The city chart shows sales comparison across different cities.',
-            'faq_q4': 'What metrics are displayed?',
-            'faq_a4': 'The application displays total sales amount, average daily sales, and maximum daily sales for the selected period.',
-            'faq_q5': 'How to select the interface language?',
-            'faq_a5': 'You can select the interface language from the dropdown list in the sidebar. Currently, Russian, English, and Chinese are supported.',
-            'faq_q6': 'How to filter data by date?',
-            'faq_a6': 'Use the date selection widgets in the sidebar to set the start and end date for analysis.',
-            'faq_q7': 'What file formats are supported for upload?',
-            'faq_a7': 'The application supports uploading CSV and Excel (.xlsx, .xls) files. The file must contain columns: \'Date\', \'City\', \'Name\', \'Surname\', \'Amount\', \'Currency\'.',
-            'nav_analysis': 'Data Analysis',
-            'nav_faq': 'FAQ',
-            'date_col': 'Date',
-            'city_col': 'City',
-            'name_col': 'Name',
-            'surname_col': 'Surname',
-            'amount_col': 'Amount',
-            'currency_col': 'Currency'
-        },
-        'китайский': {
-            'title': '电商销售分析器',
-            'sidebar_header': '分析参数',
-            'upload_label': '上传您的数据文件（CSV或Excel）',
-            'upload_success': '数据已成功从文件加载',
-            'date_start': '开始日期',
-            'date_end': '结束日期',
-            'select_language': '选择语言',
-            'total_sales': '总销售额',
-            'avg_daily_sales': '平均每日销售额',
-            'max_daily_sales': '最大单日销售额',
-            'sales_over_time': '销售趋势',
-            'city_sales': '按城市划分的销售额',
-            'day_of_week_sales': '按星期划分的销售额',
-            'selected_period_data': '选定期间的数据',
-            'data_table_title': '选定期间数据表',
-            'period_data_header': '整个期间的数据',
-            'selected_period_sales': '选定期间的数据',
-            'all_period_sales': '整个期间的数据',
-            'note_faq': '常见问题在单独的"FAQ"页面上，可通过侧边栏菜单访问。',
-            'error_file_not_found': '无法加载数据。请检查web_app/data文件夹中是否存在dataset_1.xlsx文件或上传自己的文件。',
-            'error_missing_columns': '数据文件必须包含以下列：{}',
-            'error_invalid_file': '仅支持CSV和Excel（.xlsx，.xls）文件',
-            'select_city': '选择城市',
-            'all_cities': '所有城市',
-            'cities': {
-                'Москва': '北京',
-                'Санкт-Петербург': '上海',
-                'Казань': '广州',
-                'Новосибирск': '深圳',
-                'Екатеринбург': '天津',
-                'Нижний Новгород': '成都',
-                'Краснодар': '武汉',
-                'Самара': '重庆',
-                'Челябинск': '杭州',
-                'Ростов-на-Дону': '南京',
-                'Уфа': '西安',
-                'Волгоград': '苏州',
-                'Пермь': '郑州',
-                'Воронеж': '青岛',
-                'Саратов': '长沙',
-                'Тюмень': '宁波',
-                'Тольятти': '东莞',
-                'Ижевск': '无锡',
-                'Барнаул': '大连',
-                'Иркутск': '厦门'
-            },
-            'faq_q1': '可以分析哪些数据？',
-            'faq_a1': '该应用程序允许分析电子商务销售数据，包括日期、城市、客户姓名、姓氏和购买金额。',
-            'faq_q2': '如何解释图表？',
-            'faq_a2': '销售时间图显示所选期间的销售动态。城市图显示不同城市的销售比较。',
-            'faq_q3': '如何解释图表？',
-            'faq_a3': '销售时间图显示所选期间的销售动态。城市图显示不同城市的销售比较。',
-            'faq_q4': '显示哪些指标？',
-            'faq_a4': '该应用程序显示所选期间的总销售额、平均每日销售额和最大单日销售额。',
-            'faq_q5': '如何选择界面语言？',
-            'faq_a5': '您可以从侧边栏中的下拉列表中选择界面语言。目前支持俄语、英语和中文。',
-            'faq_q6': '如何按日期筛选数据？',
-            'faq_a6': '使用侧边栏中的日期选择小部件设置分析的开始和结束日期。',
-            'faq_q7': '支持哪些文件格式上传？',
-            'faq_a7': '该应用程序支持上传CSV和Excel（.xlsx，.xls）文件。文件必须包含以下列：\'日期\'、\'城市\'、\'名字\'、\'姓氏\'、\'金额\'、\'货币\'。',
-            'nav_analysis': '数据分析',
-            'nav_faq': '常见问题',
-            'date_col': '日期',
-            'city_col': '城市',
-            'name_col': '名字',
-            'surname_col': '姓氏',
-            'amount_col': '金额',
-            'currency_col': '货币'
-        }
-    }
-    return translations.get(lang, translations['русский']).get(key, key)
+    return catalog.get(lang, key)
+
+
+def render_kpi_grid(lang, total_sales, avg_daily_sales, max_daily_sales, currency):
+    """
+    Отображает три KPI метрики в CSS Grid с выравниванием.
+    """
+    st.markdown(f"""
+    <div style="display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 5px; margin-bottom: 1px;">
+        <div style="text-align: center; padding: 3px;">
+            <div style="font-weight: bold; font-size: 12px; margin-bottom: 0.7px; height: 1.8em; display: flex; align-items: center; justify-content: center; color: white;">{get_text(lang, 'total_sales')}</div>
+            <div style="font-size: 20px; font-weight: bold; margin: 5.6px 0 2.1px 0; color: white;">{f'{total_sales:,.2f}'.replace(',', ' ')}</div>
+            <div style="color: green; font-size: 12px; margin-top: 0.7px;">{currency}</div>
+        </div>
+        <div style="text-align: center; padding: 3px;">
+            <div style="font-weight: bold; font-size: 12px; margin-bottom: 0.7px; height: 1.8em; display: flex; align-items: center; justify-content: center; color: white;">{get_text(lang, 'avg_daily_sales')}</div>
+            <div style="font-size: 20px; font-weight: bold; margin: 5.6px 0 2.1px 0; color: white;">{f'{avg_daily_sales:,.2f}'.replace(',', ' ')}</div>
+            <div style="color: green; font-size: 12px; margin-top: 0.7px;">{currency}</div>
+        </div>
+        <div style="text-align: center; padding: 3px;">
+            <div style="font-weight: bold; font-size: 12px; margin-bottom: 0.7px; height: 1.8em; display: flex; align-items: center; justify-content: center; color: white;">{get_text(lang, 'max_daily_sales')}</div>
+            <div style="font-size: 20px; font-weight: bold; margin: 5.6px 0 2.1px 0; color: white;">{f'{max_daily_sales:,.2f}'.replace(',', ' ')}</div>
+            <div style="color: green; font-size: 12px; margin-top: 0.7px;">{currency}</div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+def render_quality_profile(lang, profile):
+    """
+    Отображает профиль качества данных в раскрывающемся блоке боковой панели.
+    """
+    if not profile:
+        return
+    with st.sidebar.expander(get_text(lang, 'quality_report').format(rows=profile['rows'])):
+        summary = [
+            (get_text(lang, 'quality_missing_dates'), profile['missing_dates']),
+            (get_text(lang, 'quality_unparsed_dates'), profile['unparsed_dates']),
+            (get_text(lang, 'quality_invalid_amounts'), profile['invalid_amounts']),
+            (get_text(lang, 'quality_negative_amounts'), profile['negative_amounts']),
+            (get_text(lang, 'quality_zero_amounts'), profile['zero_amounts']),
+            (get_text(lang, 'quality_duplicates'), profile['duplicates']),
+            (get_text(lang, 'quality_currencies'), ', '.join(profile['currencies']) or '-'),
+        ]
+        st.dataframe(pd.DataFrame(summary, columns=[get_text(lang, 'quality_metric'), get_text(lang, 'quality_value')])
+                     .astype(str), hide_index=True)
+        st.dataframe(pd.DataFrame([
+            {get_text(lang, 'quality_column'): col, get_text(lang, 'quality_dtype'): stats['dtype'],
+             get_text(lang, 'quality_nulls'): stats['nulls'], get_text(lang, 'quality_unique'): stats['unique']}
+            for col, stats in profile['columns'].items()
+        ]), hide_index=True)
 
 # Выбор языка
-language = st.sidebar.selectbox(get_text('русский', 'select_language'), ["русский", "английский", "китайский"])
+language = st.sidebar.selectbox(get_text('русский', 'select_language'), SUPPORTED_LANGUAGES)
 
 # Боковая панель с элементами управления
 st.sidebar.header(get_text(language, 'sidebar_header'))
@@ -244,14 +101,91 @@ st.title(get_text(language, 'title'))
 # Возможность загрузки пользовательских данных
 uploaded_file = st.sidebar.file_uploader(get_text(language, 'upload_label'), type=['csv', 'xlsx', 'xls'])
 
-# Загрузка данных
-if uploaded_file is not None:
-    df = load_uploaded_data(uploaded_file)
-    if df is not None:
+# Бэкенд запросов для набора данных по умолчанию, если он создан: база SQLite
+# (агрегация в SQL) или хранилище с разделами по месяцам. В память читаются
+# только агрегаты и строки выбранного периода
+sales_backend = None
+if uploaded_file is None:
+    sales_backend = (load_shared_sqlite_backend("web_app/data", amount_dtype=AMOUNT_DTYPE)
+                     or load_shared_sales_store("web_app/data", amount_dtype=AMOUNT_DTYPE))
+
+# Удаление повторов строк (совпадают дата, город, имя, фамилия, сумма и валюта)
+# при загрузке; бэкенд запросов хранит данные в том виде, в каком они были созданы
+drop_duplicates = sales_backend is None and st.sidebar.checkbox(get_text(language, 'drop_duplicates'))
+
+# Большие CSV файлы загружаются в потоковом режиме: доступны только агрегаты
+if uploaded_file is not None and should_stream_upload(uploaded_file):
+    accumulator = load_uploaded_data_streaming(uploaded_file, drop_duplicates=drop_duplicates,
+                                               amount_dtype=AMOUNT_DTYPE)
+    if accumulator is not None:
         st.sidebar.success(get_text(language, 'upload_success'))
-else:
-    df = load_data("web_app/data/dataset_1.xlsx")
+        st.info(get_text(language, 'streaming_mode_info'))
+        # Профиль качества накоплен в том же проходе по чанкам, что и агрегаты
+        render_quality_profile(language, accumulator.quality.to_dict())
+        if accumulator.deduplicator is not None:
+            st.sidebar.caption(get_text(language, 'duplicates_dropped').format(
+                count=accumulator.deduplicator.duplicates))
+
+        total_all_period, avg_all_period, max_all_period = accumulator.kpi_metrics()
+        currency_all = accumulator.currencies[0] if accumulator.currencies else 'RUB'
+        st.markdown(f'<h3 style="margin-top: 0.14rem; margin-bottom: 0.14rem;">{get_text(language, "all_period_sales")}</h3>', unsafe_allow_html=True)
+        render_kpi_grid(language, total_all_period, avg_all_period, max_all_period, currency_all)
+
+        st.plotly_chart(create_daily_sales_plot(accumulator.daily_sales(), language), width='stretch')
+        st.markdown(f"**Note:** {get_text(language, 'note_faq')}")
+    st.stop()
+
+def load_sales_data(columns):
+    """
+    Загружает нужные колонки загруженного файла или набора данных по умолчанию.
+
+    Для бэкенда запросов возвращается пустой DataFrame с нужными
+    колонками: строки читаются бэкендом при фильтрации по дате.
+    """
+    if uploaded_file is not None:
+        return load_uploaded_data(uploaded_file, amount_dtype=AMOUNT_DTYPE, columns=columns,
+                                  drop_duplicates=drop_duplicates)
+    if sales_backend is not None:
+        return sales_backend.schema(columns)
+    # Все листы всех файлов web_app/data загружаются параллельно; набор
+    # данных общий для всех сессий процесса (без копий)
+    return load_shared_directory_data("web_app/data", amount_dtype=AMOUNT_DTYPE, columns=columns,
+                                      drop_duplicates=drop_duplicates)
+
+
+# Загрузка данных: только колонки для KPI, графиков и фильтров,
+# колонки имен загружаются отдельно для таблицы данных
+df = load_sales_data(ANALYSIS_COLUMNS)
+if uploaded_file is not None and df is not None:
+    st.sidebar.success(get_text(language, 'upload_success'))
     
+# Время загрузки каждого файла, если источников несколько
+if df is not None and SOURCE_COLUMN in df.columns and INGEST_REPORT_ATTR in df.attrs:
+    ingest_report = df.attrs[INGEST_REPORT_ATTR]
+    with st.sidebar.expander(get_text(language, 'ingest_report').format(
+            files=len(ingest_report['files']), seconds=ingest_report['seconds'],
+            workers=ingest_report['workers'])):
+        st.dataframe(pd.DataFrame(ingest_report['files']), hide_index=True)
+
+# Число удаленных повторов строк
+if df is not None and DUPLICATES_ATTR in df.attrs:
+    st.sidebar.caption(get_text(language, 'duplicates_dropped').format(count=df.attrs[DUPLICATES_ATTR]))
+
+# Отчет об экономии памяти компактным представлением данных
+if df is not None and MEMORY_PROFILE_ATTR in df.attrs:
+    memory_profile = df.attrs[MEMORY_PROFILE_ATTR]
+    st.sidebar.caption(get_text(language, 'memory_saved').format(
+        after=memory_profile['memory_after'] / 1024 ** 2,
+        saved=memory_profile['saved_bytes'] / 1024 ** 2,
+        ratio=memory_profile['saved_ratio']
+    ))
+
+# Профиль качества данных: бэкенд строит его при создании, загрузчики -
+# при чтении файлов, до проекции без имен (df.attrs), без повторного чтения
+if df is not None:
+    render_quality_profile(language, sales_backend.quality_profile if sales_backend is not None
+                           else get_quality_profile(df))
+
 # Проверка структуры данных
 if df is not None and not df.empty:
     # Проверяем наличие минимально необходимых колонок для расчета KPI
@@ -262,15 +196,43 @@ if df is not None and not df.empty:
         st.stop()
 
 if df is not None:
+    if sales_backend is not None:
+        # Куб агрегирован бэкендом; строки за период читаются по запросу
+        sales_cube = sales_backend.cube
+        row_index = sales_backend
+    else:
+        # Агрегаты по дням, городам и валютам строятся один раз на набор данных
+        sales_cube = get_sales_cube(df)
+        # Индекс строк, отсортированных по дате, для фильтрации бинарным поиском
+        row_index = get_row_index(df)
+
+    # При нескольких валютах суммы переводятся в валюту отчета по курсам на дату
+    # продажи (web_app/fx_rates.csv); куб в валюте отчета кэшируется на набор данных
+    # Отпечаток куба - ключ кэша результатов KPI вместе с фильтрами
+    fingerprint = df.attrs.get(DATASET_FINGERPRINT_ATTR)
+    currency_cube = sales_cube
+    cube_fingerprint = fingerprint
+    data_currencies = sales_cube.currencies()
+    if len(data_currencies) > 1:
+        fx_rates = load_fx_rates()
+        if fx_rates is not None:
+            report_currencies = sorted(data_currencies, key=lambda code: code != FX_BASE_CURRENCY)
+            report_currency = st.sidebar.selectbox(get_text(language, 'report_currency'), report_currencies)
+            sales_cube = get_converted_cube(currency_cube, fx_rates, report_currency, fingerprint)
+            cube_fingerprint = converted_cube_fingerprint(fingerprint, fx_rates, report_currency)
+            if sales_cube.data.attrs.get(UNCONVERTED_ATTR):
+                st.sidebar.warning(get_text(language, 'fx_missing_rates').format(
+                    count=sales_cube.data.attrs[UNCONVERTED_ATTR]))
+        else:
+            st.warning(get_text(language, 'mixed_currencies_warning').format(', '.join(data_currencies)))
+
     # Выбор диапазона дат
-    min_date = df['Дата'].min().date()
-    max_date = df['Дата'].max().date()
+    min_date = row_index.min_date
+    max_date = row_index.max_date
     start_date = st.sidebar.date_input(get_text(language, 'date_start'), value=min_date, min_value=min_date, max_value=max_date, key='start_date')
     end_date = st.sidebar.date_input(get_text(language, 'date_end'), value=max_date, min_value=min_date, max_value=max_date, key='end_date')
 
-    # Фильтрация данных по дате
-    mask = (df['Дата'].dt.date >= start_date) & (df['Дата'].dt.date <= end_date)
-    filtered_df = df.loc[mask]
+    period_cube = sales_cube.filter(start_date, end_date)
     
     # Проверка наличия всех необходимых колонок для полноценной работы приложения
     # Проверка уже выполнена в data_loader с переименованием альтернативных названий
@@ -282,7 +244,7 @@ if df is not None:
         st.warning(f"Предупреждение: Отсутствуют колонки: {missing_cols}. Приложение не может работать без этих колонок.")
 
     # Получение уникальных городов для выбора
-    unique_cities = sorted(filtered_df['Город'].unique())
+    unique_cities = period_cube.cities()
     
     # Используем session_state для сохранения выбора города
     if 'selected_city' not in st.session_state:
@@ -290,28 +252,14 @@ if df is not None:
 
     # Создаем отображаемый список городов с переводом
     display_cities = [get_text(language, 'all_cities')]
-    for city in unique_cities:
-        if language == 'русский':
-            display_cities.append(city)
-        elif language == 'английский':
-            # Используем перевод города на английский
-            translated_city = get_text('английский', 'cities').get(city, city)
-            display_cities.append(translated_city)
-        elif language == 'китайский':
-            # Используем перевод города на китайский
-            translated_city = get_text('китайский', 'cities').get(city, city)
-            display_cities.append(translated_city)
+    display_cities += [catalog.city_display_name(language, city) for city in unique_cities]
     
     # Находим индекс ранее выбранного города в текущем списке
     if st.session_state.selected_city == "Все":
         default_index = 0
     else:
         # Найдем отображаемое название для сохраненного города
-        display_selected_city = st.session_state.selected_city
-        if language == 'английский':
-            display_selected_city = get_text('английский', 'cities').get(st.session_state.selected_city, st.session_state.selected_city)
-        elif language == 'китайский':
-            display_selected_city = get_text('китайский', 'cities').get(st.session_state.selected_city, st.session_state.selected_city)
+        display_selected_city = catalog.city_display_name(language, st.session_state.selected_city)
         
         try:
             default_index = display_cities.index(display_selected_city)
@@ -331,35 +279,25 @@ if df is not None:
         selected_city = "Все"
         st.session_state.selected_city = "Все"
     else:
-        # Найдем оригинальное русское название города
-        if language == 'русский':
-            selected_city = selected_display_city
-            st.session_state.selected_city = selected_display_city
-        elif language == 'английский':
-            # Найдем русское название по английскому переводу
-            reverse_city_map = {v: k for k, v in get_text('английский', 'cities').items()}
-            original_city = reverse_city_map.get(selected_display_city, selected_display_city)
-            selected_city = original_city
-            st.session_state.selected_city = original_city
-        elif language == 'китайский':
-            # Найдем русское название по китайскому переводу
-            reverse_city_map = {v: k for k, v in get_text('китайский', 'cities').items()}
-            original_city = reverse_city_map.get(selected_display_city, selected_display_city)
-            selected_city = original_city
-            st.session_state.selected_city = original_city
-
-    # Фильтрация данных по городу
-    if selected_city != "Все":
-        city_mask = filtered_df['Город'] == selected_city
-        filtered_df = filtered_df.loc[city_mask]
+        # Найдем оригинальное русское название города по обратному соответствию каталога
+        selected_city = catalog.city_original_name(language, selected_display_city)
+        st.session_state.selected_city = selected_city
 
-    # Фильтрация данных по городу для всего периода (независимо от даты)
-    all_period_filtered = df.copy()
+    # Фильтрация агрегатов по городу
     if selected_city != "Все":
-        all_period_filtered = all_period_filtered[all_period_filtered['Город'] == selected_city]
+        period_cube = period_cube.filter(city=selected_city)
+    city_filter = selected_city if selected_city != "Все" else None
 
-    # Вычисление KPI метрик для выбранного периода
-    kpi_results = calculate_kpi_metrics(filtered_df)
+    # Фильтрация данных по дате (срез отсортированных строк без копирования) и
+    # городу (пересечение индекса дат со списком строк города)
+    filtered_df = row_index.filter(df, start_date, end_date, city=city_filter)
+
+    # Фильтрация агрегатов по городу для всего периода (независимо от даты)
+    all_period_cube = sales_cube.filter(city=city_filter)
+
+    # Вычисление KPI метрик для выбранного периода по индексу дневных продаж;
+    # результаты кэшируются по отпечатку куба и фильтрам
+    kpi_results = get_range_kpi_metrics(sales_cube, cube_fingerprint, start_date, end_date, city_filter)
     if kpi_results is not None and len(kpi_results) == 3:
         total_sales, avg_daily_sales, max_daily_sales = kpi_results
     else:
@@ -367,7 +305,7 @@ if df is not None:
         total_sales, avg_daily_sales, max_daily_sales = 0, 0, 0
 
     # Вычисление KPI метрик для всего выгруженного периода (с учетом выбранного города)
-    kpi_all_results = calculate_kpi_metrics(all_period_filtered)
+    kpi_all_results = get_range_kpi_metrics(sales_cube, cube_fingerprint, city=city_filter)
     if kpi_all_results is not None and len(kpi_all_results) == 3:
         total_all_period, avg_all_period, max_all_period = kpi_all_results
     else:
@@ -379,106 +317,96 @@ if df is not None:
     
     # Отображение KPI метрик для выбранного периода с использованием CSS Grid для выравнивания
     # Получаем валюту из данных (предполагаем, что все записи в выбранном периоде имеют одинаковую валюту)
-    # Проверяем, существует ли колонка 'Валюта' перед обращением к ней
-    if 'Валюта' in filtered_df.columns and not filtered_df.empty:
-        currency = filtered_df['Валюта'].iloc[0]
-    else:
-        currency = 'RUB'  # Устанавливаем значение по умолчанию
+    period_currencies = period_cube.currencies()
+    currency = period_currencies[0] if period_currencies else 'RUB'  # Значение по умолчанию
     
-    # Создаем контейнер с CSS Grid для выравнивания метрик
-    st.markdown(f"""
-    <div style="display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 5px; margin-bottom: 1px;">
-        <div style="text-align: center; padding: 3px;">
-            <div style="font-weight: bold; font-size: 12px; margin-bottom: 0.7px; height: 1.8em; display: flex; align-items: center; justify-content: center; color: white;">{get_text(language, 'total_sales')}</div>
-            <div style="font-size: 20px; font-weight: bold; margin: 5.6px 0 2.1px 0; color: white;">{f'{total_sales:,.2f}'.replace(',', ' ')}</div>
-            <div style="color: green; font-size: 12px; margin-top: 0.7px;">{currency}</div>
-        </div>
-        <div style="text-align: center; padding: 3px;">
-            <div style="font-weight: bold; font-size: 12px; margin-bottom: 0.7px; height: 1.8em; display: flex; align-items: center; justify-content: center; color: white;">{get_text(language, 'avg_daily_sales')}</div>
-            <div style="font-size: 20px; font-weight: bold; margin: 5.6px 0 2.1px 0; color: white;">{f'{avg_daily_sales:,.2f}'.replace(',', ' ')}</div>
-            <div style="color: green; font-size: 12px; margin-top: 0.7px;">{currency}</div>
-        </div>
-        <div style="text-align: center; padding: 3px;">
-            <div style="font-weight: bold; font-size: 12px; margin-bottom: 0.7px; height: 1.8em; display: flex; align-items: center; justify-content: center; color: white;">{get_text(language, 'max_daily_sales')}</div>
-            <div style="font-size: 20px; font-weight: bold; margin: 5.6px 0 2.1px 0; color: white;">{f'{max_daily_sales:,.2f}'.replace(',', ' ')}</div>
-            <div style="color: green; font-size: 12px; margin-top: 0.7px;">{currency}</div>
-        </div>
-    """, unsafe_allow_html=True)
-
-    # Фильтрация данных по городу для всего периода (независимо от даты)
-    all_period_filtered = df.copy()
-    if selected_city != "Все":
-        all_period_filtered = all_period_filtered[all_period_filtered['Город'] == selected_city]
+    # Отображаем метрики в CSS Grid для выравнивания
+    render_kpi_grid(language, total_sales, avg_daily_sales, max_daily_sales, currency)
 
-    # Вычисление KPI метрик для всего выгруженного периода (с учетом выбранного города)
-    total_all_period, avg_all_period, max_all_period = calculate_kpi_metrics(all_period_filtered)
-
-    # Закрываем предыдущий div
-    st.markdown("</div>", unsafe_allow_html=True)
-    
     # Отображение KPI метрик для всего периода (с учетом выбранного города)
     # Используем тот же стиль, что и для заголовка "Данные по выбранному периоду"
     st.markdown(f'<h3 style="margin-top: 0.14rem; margin-bottom: 0.14rem;">{get_text(language, "all_period_sales")}</h3>', unsafe_allow_html=True)
     
-    # Проверяем, существует ли колонка 'Валюта' перед обращением к ней
-    if 'Валюта' in all_period_filtered.columns and not all_period_filtered.empty:
-        currency_all = all_period_filtered['Валюта'].iloc[0]
-    else:
-        currency_all = 'RUB'  # Устанавливаем значение по умолчанию
+    all_period_currencies = all_period_cube.currencies()
+    currency_all = all_period_currencies[0] if all_period_currencies else 'RUB'  # Значение по умолчанию
     
-    # Создаем контейнер с CSS Grid для выравнивания метрик
-    st.markdown(f"""
-    <div style="display: grid; grid-template-columns: 1fr 1fr 1fr; gap: 5px; margin-bottom: 1px;">
-        <div style="text-align: center; padding: 3px;">
-            <div style="font-weight: bold; font-size: 12px; margin-bottom: 0.7px; height: 1.8em; display: flex; align-items: center; justify-content: center; color: white;">{get_text(language, 'total_sales')}</div>
-            <div style="font-size: 20px; font-weight: bold; margin: 5.6px 0 2.1px 0; color: white;">{f'{total_all_period:,.2f}'.replace(',', ' ')}</div>
-            <div style="color: green; font-size: 12px; margin-top: 0.7px;">{currency_all}</div>
-        </div>
-        <div style="text-align: center; padding: 3px;">
-            <div style="font-weight: bold; font-size: 12px; margin-bottom: 0.7px; height: 1.8em; display: flex; align-items: center; justify-content: center; color: white;">{get_text(language, 'avg_daily_sales')}</div>
-            <div style="font-size: 20px; font-weight: bold; margin: 5.6px 0 2.1px 0; color: white;">{f'{avg_all_period:,.2f}'.replace(',', ' ')}</div>
-            <div style="color: green; font-size: 12px; margin-top: 0.7px;">{currency_all}</div>
-        </div>
-        <div style="text-align: center; padding: 3px;">
-            <div style="font-weight: bold; font-size: 12px; margin-bottom: 0.7px; height: 1.8em; display: flex; align-items: center; justify-content: center; color: white;">{get_text(language, 'max_daily_sales')}</div>
-            <div style="font-size: 20px; font-weight: bold; margin: 5.6px 0 2.1px 0; color: white;">{f'{max_all_period:,.2f}'.replace(',', ' ')}</div>
-            <div style="color: green; font-size: 12px; margin-top: 0.7px;">{currency_all}</div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    # Отображаем метрики в CSS Grid для выравнивания
+    render_kpi_grid(language, total_all_period, avg_all_period, max_all_period, currency_all)
+
+    # KPI выбранного периода отдельно по каждой валюте, без перевода
+    if len(data_currencies) > 1:
+        with st.expander(get_text(language, 'currency_breakdown')):
+            currency_kpis = get_group_kpis(currency_cube, fingerprint, 'Валюта', start_date, end_date, city_filter)
+            st.dataframe(currency_kpis.rename(columns=lambda col: get_text(language, col)), width='stretch')
+
+    # Рейтинг городов за выбранный период: KPI всех городов одним проходом по кубу
+    if len(unique_cities) > 1:
+        with st.expander(get_text(language, 'city_leaderboard')):
+            city_kpis = get_group_kpis(sales_cube, cube_fingerprint, 'Город', start_date, end_date)
+            city_kpis = city_kpis.sort_values('total_sales', ascending=False)
+            city_kpis.index = [catalog.city_display_name(language, city) for city in city_kpis.index]
+            st.dataframe(city_kpis.rename_axis(get_text(language, 'city_col'))
+                         .rename(columns=lambda col: get_text(language, col)), width='stretch')
+
+    # Статистика кэша результатов KPI
+    kpi_cache_stats = kpi_cache.stats()
+    st.sidebar.caption(get_text(language, 'kpi_cache_stats').format(
+        hits=kpi_cache_stats['hits'], misses=kpi_cache_stats['misses'], entries=kpi_cache_stats['entries']))
 
     # Визуализация данных
-    if filtered_df.empty:
+    # Графики строятся по агрегатам куба, а не по отдельным транзакциям
+    if period_cube.empty:
         st.warning("Нет данных для отображения за выбранный период.")
     else:
-        st.plotly_chart(create_sales_over_time_plot(filtered_df, language), width='stretch')
-        st.plotly_chart(create_day_of_week_plot(filtered_df, language), width='stretch')
+        st.plotly_chart(create_sales_over_time_plot(period_cube.data, language), width='stretch')
+        st.plotly_chart(create_day_of_week_plot(period_cube.data, language), width='stretch')
 
     # Отображение таблицы с данными
     st.subheader(get_text(language, 'data_table_title'))
-    
-    # Создаем копию данных для отображения с переводом заголовков колонок
-    display_df = filtered_df.copy()
+    # База SQLite читает не больше SQL_TABLE_MAX_ROWS строк таблицы
+    if ROW_LIMIT_ATTR in filtered_df.attrs:
+        st.info(get_text(language, 'row_limit_info').format(limit=filtered_df.attrs[ROW_LIMIT_ATTR]))
+
+    # Колонки имен не нужны для KPI и графиков, поэтому загружаются отдельно,
+    # только для таблицы данных; строки проекций одного файла идут в одном
+    # порядке, поэтому индекс строк подходит и для них
+    names_df = load_sales_data(NAME_COLUMNS)
+    if names_df is not None:
+        name_rows = row_index.filter(names_df, start_date, end_date, city=city_filter)
+        name_columns = [col for col in NAME_COLUMNS if col in name_rows.columns]
+        filtered_df = filtered_df.assign(**{col: name_rows[col].array for col in name_columns})
+        table_columns = [col for col in ['Дата', 'Город', 'Имя', 'Фамилия', 'Сумма', 'Валюта']
+                         if col in filtered_df.columns]
+        filtered_df = filtered_df[table_columns + [col for col in filtered_df.columns
+                                                   if col not in table_columns]]
     
     # Определяем, какие колонки нужно переименовать, проверяя их существование
     column_mapping = {}
-    if 'Дата' in display_df.columns:
+    if 'Дата' in filtered_df.columns:
         column_mapping['Дата'] = get_text(language, 'date_col')
-    if 'Город' in display_df.columns:
+    if 'Город' in filtered_df.columns:
         column_mapping['Город'] = get_text(language, 'city_col')
-    if 'Имя' in display_df.columns:
+    if 'Имя' in filtered_df.columns:
         column_mapping['Имя'] = get_text(language, 'name_col')
-    if 'Фамилия' in display_df.columns:
+    if 'Фамилия' in filtered_df.columns:
         column_mapping['Фамилия'] = get_text(language, 'surname_col')
-    if 'Сумма' in display_df.columns:
+    if 'Сумма' in filtered_df.columns:
         column_mapping['Сумма'] = get_text(language, 'amount_col')
-    if 'Валюта' in display_df.columns:
+    if 'Валюта' in filtered_df.columns:
         column_mapping['Валюта'] = get_text(language, 'currency_col')
+    if SOURCE_COLUMN in filtered_df.columns:
+        column_mapping[SOURCE_COLUMN] = get_text(language, 'source_col')
     
-    # Переименовываем колонки
-    display_df.rename(columns=column_mapping, inplace=True)
+    # Суммы из единиц хранения (копеек) переводятся в денежные единицы только
+    # для отображаемых строк
+    if 'Сумма' in filtered_df.columns and get_amount_scale(filtered_df) != 1:
+        filtered_df = filtered_df.assign(**{'Сумма': to_display_units(filtered_df['Сумма'],
+                                                                       get_amount_scale(filtered_df))})
+
+    # Переименовываем колонки (без копирования данных благодаря Copy-on-Write)
+    display_df = filtered_df.rename(columns=column_mapping)
     
-    st.dataframe(display_df)
+    st.dataframe(display_df, hide_index=True)
 
     # Отображение сообщения о том, что FAQ находится на отдельной странице
     st.markdown(f"**Note:** {get_text(language, 'note_faq')}")
@@ -0,0 +1,86 @@
+"""
+Сравнение агрегации продаж по дням, городам и дням недели: группировка
+pandas (как раньше - по dt.date, по городу и по dt.day_name) и ядра
+aggregation (целые коды дней и городов + np.bincount).
+
+Запуск: python web_app/benchmarks/bench_aggregation.py [числа строк, по умолчанию 1000000 10000000 50000000]
+"""
+import gc
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aggregation import daily_sums, group_sums, weekday_sums  # noqa: E402
+
+# Данные за 4 года: около 1460 различных дат
+DAYS = 1460
+CITIES = ["Москва", "Санкт-Петербург", "Казань", "Новосибирск", "Екатеринбург",
+          "Нижний Новгород", "Самара", "Омск", "Ростов-на-Дону", "Уфа"]
+
+
+def make_sales(n_rows: int) -> pd.DataFrame:
+    """
+    Создает продажи: дата со временем, город (категория), сумма в копейках.
+    """
+    rng = np.random.default_rng(0)
+    seconds = rng.integers(0, DAYS * 86400, n_rows)
+    return pd.DataFrame({
+        "Дата": pd.Timestamp("2020-01-01") + pd.to_timedelta(seconds, unit="s"),
+        "Город": pd.Categorical.from_codes(rng.integers(0, len(CITIES), n_rows), CITIES),
+        "Сумма": rng.integers(100, 1_000_000, n_rows)
+    })
+
+
+def legacy_paths(df: pd.DataFrame) -> dict:
+    """
+    Агрегация группировкой pandas.
+    """
+    return {
+        "по дням": lambda: df.groupby(df["Дата"].dt.date)["Сумма"].sum(),
+        "по городам": lambda: df.groupby("Город", observed=True)["Сумма"].sum(),
+        "по дням недели": lambda: df.groupby(df["Дата"].dt.day_name())["Сумма"].sum(),
+    }
+
+
+def kernel_paths(df: pd.DataFrame) -> dict:
+    """
+    Агрегация ядрами aggregation.
+    """
+    return {
+        "по дням": lambda: daily_sums(df["Дата"], df["Сумма"]),
+        "по городам": lambda: group_sums(df["Город"], df["Сумма"]),
+        "по дням недели": lambda: weekday_sums(df["Дата"], df["Сумма"]),
+    }
+
+
+def measure(func) -> str:
+    """
+    Возвращает время выполнения в секундах (или текст ошибки).
+    """
+    gc.collect()
+    start = time.perf_counter()
+    try:
+        func()
+    except MemoryError:
+        return "нехватка памяти"
+    return f"{time.perf_counter() - start:.2f} с"
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1_000_000, 10_000_000, 50_000_000]
+    for n_rows in sizes:
+        print(f"Строк: {n_rows:,}")
+        df = make_sales(n_rows)
+        legacy, current = legacy_paths(df), kernel_paths(df)
+        for name in legacy:
+            print(f"  {name:15} pandas {measure(legacy[name]):>16}, bincount {measure(current[name]):>8}")
+        del df, legacy, current
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Сравнение разбора колонки 'Дата': pd.to_datetime без формата (как раньше)
+и parse_sales_dates (определение формата + разбор различных значений).
+
+Запуск: python web_app/benchmarks/bench_dates.py [число строк, по умолчанию 10 000 000]
+"""
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from date_parser import EXCEL_EPOCH, parse_sales_dates  # noqa: E402
+
+# Данные за 4 года: около 1460 различных дат
+DAYS = 1460
+
+
+def make_columns(n_rows: int) -> dict:
+    """
+    Создает колонки дат в разных форматах (строки - как после read_csv).
+    """
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, DAYS, n_rows)
+    days = pd.date_range("2020-01-01", periods=DAYS, freq="D")
+    serials = (days - pd.Timestamp(EXCEL_EPOCH)).days.to_numpy(dtype=np.float64)
+    return {
+        "ISO (ГГГГ-ММ-ДД)": pd.Series(days.strftime("%Y-%m-%d").to_numpy(dtype=object)[codes], dtype="str"),
+        "ДД.ММ.ГГГГ": pd.Series(days.strftime("%d.%m.%Y").to_numpy(dtype=object)[codes], dtype="str"),
+        "номер дня Excel": pd.Series(serials[codes]),
+    }
+
+
+def measure(func, values):
+    """
+    Возвращает время выполнения и результат (или текст ошибки).
+    """
+    start = time.perf_counter()
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            result = func(values)
+    except Exception as e:
+        result = f"ошибка: {type(e).__name__}"
+    return time.perf_counter() - start, result
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    print(f"Строк: {n_rows:,}")
+    for name, values in make_columns(n_rows).items():
+        legacy_time, legacy = measure(pd.to_datetime, values)
+        current_time, current = measure(parse_sales_dates, values)
+        if isinstance(legacy, str):
+            legacy_note = legacy
+        else:
+            legacy_note = f"первая дата {legacy.iloc[0]:%Y-%m-%d}"
+        print(f"{name:18} старый {legacy_time:7.2f} с ({legacy_note}), "
+              f"новый {current_time:6.2f} с (первая дата {current.iloc[0]:%Y-%m-%d})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Сравнение поиска переводов: старый get_text (словарь переводов создается
+при каждом вызове) и каталог, загружаемый один раз на процесс.
+
+Запуск: python web_app/benchmarks/bench_i18n.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from i18n import load_catalog  # noqa: E402
+
+# Примерный профиль одного перезапуска app.py: обращения к get_text
+# и перевод списка из 20 городов для выбора города
+CALLS_PER_RERUN = 40
+CITIES_PER_RERUN = 20
+
+
+def make_legacy_get_text(translations: dict):
+    """
+    Создает get_text в старом виде: словарь переводов - литерал в теле функции.
+    """
+    source = (
+        "def get_text(lang, key):\n"
+        f"    translations = {translations!r}\n"
+        "    return translations.get(lang, translations['русский']).get(key, key)\n"
+    )
+    namespace = {}
+    exec(source, namespace)
+    return namespace["get_text"]
+
+
+def legacy_rerun(get_text, lang, cities):
+    for _ in range(CALLS_PER_RERUN):
+        get_text(lang, 'title')
+    city_map = get_text(lang, 'cities')
+    display = [city_map.get(city, city) for city in cities]
+    reverse_city_map = {v: k for k, v in get_text(lang, 'cities').items()}
+    return reverse_city_map.get(display[0])
+
+
+def catalog_rerun(catalog, lang, cities):
+    for _ in range(CALLS_PER_RERUN):
+        catalog.get(lang, 'title')
+    display = [catalog.city_display_name(lang, city) for city in cities]
+    return catalog.city_original_name(lang, display[0])
+
+
+def main():
+    catalog = load_catalog('app')
+    legacy_get_text = make_legacy_get_text(catalog.translations)
+    lang = 'английский'
+    cities = list(catalog.translations['английский']['cities'])[:CITIES_PER_RERUN]
+
+    number = 2000
+    legacy_call = timeit.timeit(lambda: legacy_get_text(lang, 'title'), number=number) / number
+    catalog_call = timeit.timeit(lambda: catalog.get(lang, 'title'), number=number) / number
+    legacy = timeit.timeit(lambda: legacy_rerun(legacy_get_text, lang, cities), number=number) / number
+    current = timeit.timeit(lambda: catalog_rerun(catalog, lang, cities), number=number) / number
+
+    print(f"get_text, один вызов:   старый {legacy_call * 1e6:8.2f} мкс, каталог {catalog_call * 1e6:8.3f} мкс")
+    print(f"переводы за перезапуск: старый {legacy * 1e6:8.2f} мкс, каталог {current * 1e6:8.2f} мкс "
+          f"(x{legacy / current:.0f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Потокобезопасный LRU-кэш с ограничением по числу записей и по объему.
+
+    Объем каждой записи задается при вставке (например, размер DataFrame
+    в байтах). При превышении любого из лимитов вытесняются записи,
+    к которым дольше всего не обращались.
+    """
+
+    def __init__(self, max_entries: int = 8, max_bytes: int = None):
+        """
+        Args:
+            max_entries: Максимальное число записей в кэше
+            max_bytes: Максимальный суммарный объем записей (None - без ограничения)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """
+        Возвращает значение по ключу и помечает запись как недавно использованную.
+
+        Args:
+            key: Ключ записи
+            default: Значение, возвращаемое при промахе
+
+        Returns:
+            Значение из кэша или default
+        """
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key][0]
+
+    def put(self, key, value, size: int = 0) -> None:
+        """
+        Добавляет значение в кэш, вытесняя старые записи при необходимости.
+
+        Записи, которые сами по себе больше max_bytes, не кэшируются.
+
+        Args:
+            key: Ключ записи
+            value: Значение
+            size: Объем записи в байтах
+        """
+        with self._lock:
+            if key in self._data:
+                self.total_bytes -= self._data.pop(key)[1]
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._data[key] = (value, size)
+            self.total_bytes += size
+            while len(self._data) > self.max_entries or (
+                    self.max_bytes is not None and self.total_bytes > self.max_bytes):
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Очищает кэш и сбрасывает статистику."""
+        with self._lock:
+            self._data.clear()
+            self.total_bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """
+        Возвращает статистику использования кэша.
+
+        Returns:
+            dict: Число записей, объем, попадания, промахи и вытеснения
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return key in self._data
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
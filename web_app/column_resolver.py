@@ -0,0 +1,165 @@
+from cache_utils import LRUCache
+
+
+# Обязательные колонки: для расчета KPI и для полноценной работы приложения
+REQUIRED_KPI_COLUMNS = ["Дата", "Сумма"]
+REQUIRED_COLUMNS = ["Дата", "Город", "Имя", "Фамилия", "Сумма", "Валюта"]
+
+# Таблица синонимов: стандартное название -> альтернативные названия
+# (сравниваются без учета регистра и пробелов по краям). Для поддержки
+# нового языка достаточно добавить его названия в списки.
+ALT_COLUMN_NAMES = {
+    "Валюта": ["Currency"],
+    "Дата": ["Date"],
+    "Город": ["City"],
+    "Имя": ["Name"],
+    "Фамилия": ["Surname", "Last Name", "LastName"],
+    "Сумма": ["Amount", "Sum", "Total"]
+}
+
+# Подстроки для частичного совпадения, которые проверяются, если колонка не
+# найдена по названию или синониму (само стандартное название проверяется всегда)
+PARTIAL_COLUMN_NAMES = {
+    "Валюта": ["currency", "валют"]
+}
+
+# Число запомненных планов переименования (по одному на вариант заголовка)
+COLUMN_PLAN_CACHE_MAX_ENTRIES = 256
+
+
+class ColumnPlan:
+    """
+    План нормализации заголовка: итоговые названия колонок и отсутствующие колонки.
+    """
+
+    def __init__(self, columns: list, rename: dict, missing: list, missing_kpi: list):
+        """
+        Args:
+            columns: Итоговые названия колонок (в порядке исходного заголовка)
+            rename: Исходное название -> стандартное (только измененные)
+            missing: Обязательные колонки, которые не найдены
+            missing_kpi: Колонки для расчета KPI, которые не найдены
+        """
+        self.columns = columns
+        self.rename = rename
+        self.missing = missing
+        self.missing_kpi = missing_kpi
+
+    @property
+    def is_valid(self) -> bool:
+        """Найдены ли колонки, необходимые для расчета KPI."""
+        return not self.missing_kpi
+
+
+class ColumnResolver:
+    """
+    Сопоставляет заголовок файла со стандартными названиями колонок.
+
+    Таблица поиска (название в нижнем регистре -> стандартная колонка)
+    строится один раз, заголовок разбирается за один проход. Планы
+    запоминаются по заголовку, поэтому файлы с одинаковой структурой
+    (например, пакетная загрузка сотен файлов) разбираются один раз.
+
+    Порядок поиска для каждой колонки: стандартное название, синонимы,
+    частичное совпадение. Каждая колонка файла сопоставляется не более чем
+    с одной стандартной колонкой.
+    """
+
+    def __init__(self, required_columns: list = None, alt_names: dict = None,
+                 partial_names: dict = None, kpi_columns: list = None,
+                 max_plans: int = COLUMN_PLAN_CACHE_MAX_ENTRIES):
+        """
+        Args:
+            required_columns: Стандартные названия колонок
+            alt_names: Таблица синонимов (см. ALT_COLUMN_NAMES)
+            partial_names: Подстроки для частичного совпадения (см. PARTIAL_COLUMN_NAMES)
+            kpi_columns: Колонки, без которых расчет KPI невозможен
+            max_plans: Число запоминаемых планов
+        """
+        self.required_columns = list(required_columns or REQUIRED_COLUMNS)
+        self.kpi_columns = list(kpi_columns or REQUIRED_KPI_COLUMNS)
+        alt_names = ALT_COLUMN_NAMES if alt_names is None else alt_names
+        partial_names = PARTIAL_COLUMN_NAMES if partial_names is None else partial_names
+
+        # Название -> (стандартная колонка, приоритет); 0 - стандартное название
+        self.lookup = {}
+        for req_col in self.required_columns:
+            names = [(req_col, 0)] + [(alt, 1) for alt in alt_names.get(req_col, [])]
+            for name, priority in names:
+                self.lookup.setdefault(name.strip().lower(), (req_col, priority))
+
+        self.partial = {
+            req_col: [req_col.lower()] + [token.lower() for token in partial_names.get(req_col, [])]
+            for req_col in self.required_columns
+        }
+        self.plans = LRUCache(max_entries=max_plans)
+
+    def plan(self, columns) -> ColumnPlan:
+        """
+        Возвращает план нормализации для заголовка (с запоминанием).
+
+        Args:
+            columns: Названия колонок файла
+
+        Returns:
+            ColumnPlan
+        """
+        header = tuple(str(col) for col in columns)
+        plan = self.plans.get(header)
+        if plan is None:
+            plan = self._build_plan(header)
+            self.plans.put(header, plan)
+        return plan
+
+    def _build_plan(self, header: tuple) -> ColumnPlan:
+        """
+        Строит план нормализации для заголовка.
+        """
+        stripped = [col.strip() for col in header]
+        lowered = [col.lower() for col in stripped]
+
+        # Проход по заголовку: лучшее совпадение по названию или синониму
+        best = {}
+        for position, name in enumerate(lowered):
+            match = self.lookup.get(name)
+            if match is not None:
+                req_col, priority = match
+                if req_col not in best or priority < best[req_col][0]:
+                    best[req_col] = (priority, position)
+        assigned = {position: req_col for req_col, (_, position) in best.items()}
+
+        # Частичное совпадение только для ненайденных колонок
+        for req_col in self.required_columns:
+            if req_col in best:
+                continue
+            for position, name in enumerate(lowered):
+                if position not in assigned and any(token in name for token in self.partial[req_col]):
+                    assigned[position] = req_col
+                    break
+
+        columns = [assigned.get(position, name) for position, name in enumerate(stripped)]
+        rename = {original: new for original, new in zip(header, columns) if original != new}
+        found = set(assigned.values())
+        return ColumnPlan(
+            columns=columns,
+            rename=rename,
+            missing=[col for col in self.required_columns if col not in found],
+            missing_kpi=[col for col in self.kpi_columns if col not in found]
+        )
+
+
+# Сопоставитель с таблицами по умолчанию, общий для всех загрузчиков
+default_resolver = ColumnResolver()
+
+
+def resolve_columns(columns) -> ColumnPlan:
+    """
+    Возвращает план нормализации заголовка по таблицам по умолчанию.
+
+    Args:
+        columns: Названия колонок файла
+
+    Returns:
+        ColumnPlan
+    """
+    return default_resolver.plan(columns)
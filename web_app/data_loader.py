@@ -1,139 +1,892 @@
+import hashlib
+import io
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import openpyxl
 import streamlit as st
 import pandas as pd
 
+from analysis import (AMOUNT_SCALE_ATTR, DATASET_FINGERPRINT_ATTR, MINOR_UNITS_SCALE, SalesAccumulator,
+                      get_amount_scale, to_minor_units)
+from cache_utils import LRUCache
+from column_resolver import (ALT_COLUMN_NAMES, PARTIAL_COLUMN_NAMES, REQUIRED_COLUMNS,
+                             REQUIRED_KPI_COLUMNS, resolve_columns)
+from data_quality import QUALITY_PROFILE_ATTR, QualityProfile
+from date_parser import UNPARSED_DATES_ATTR, parse_sales_dates, sniff_date_format
+from dedup import DUPLICATE_KEY_COLUMNS, DUPLICATES_ATTR, DuplicateDetector
+from row_index import sort_by_date
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow.parquet  # noqa: F401  (нужен pandas для чтения/записи Parquet)
+except ImportError:
+    pyarrow = None
+
+# Версия правил нормализации колонок. Увеличивайте при изменении логики
+# validate_and_normalize_columns, column_resolver или date_parser, чтобы
+# сбросить кэш на диске.
+NORMALIZER_VERSION = 7
+
+# Колонки для KPI, графиков и фильтров. Колонки имен занимают больше всего
+# памяти и загружаются отдельно, только когда они нужны (таблица данных).
+ANALYSIS_COLUMNS = ["Дата", "Город", "Сумма", "Валюта"]
+NAME_COLUMNS = ["Имя", "Фамилия"]
+
+# Загрузка всех листов и файлов каталога: расширения файлов данных, колонка
+# с источником строки (если источников больше одного), число процессов
+# (None - по числу ядер) и отчет о загрузке в df.attrs
+DATA_FILE_EXTENSIONS = (".xlsx", ".xls", ".csv")
+SOURCE_COLUMN = "Источник"
+INGEST_MAX_WORKERS = None
+INGEST_REPORT_ATTR = "ingest_report"
+
+# Суффикс файлов колоночного кэша, которые хранятся рядом с исходным файлом
+SIDECAR_CACHE_SUFFIX = ".cache.parquet"
+# Суффикс файла с профилем качества данных файла (рядом с колоночным кэшем)
+SIDECAR_QUALITY_SUFFIX = ".quality.npz"
+
+# Компактное представление данных: текстовые колонки с долей уникальных
+# значений не больше COMPACT_MAX_CATEGORY_RATIO хранятся как category,
+# остальные - как строки на базе Arrow
+COMPACT_TEXT_COLUMNS = ["Город", "Валюта", "Имя", "Фамилия", SOURCE_COLUMN]
+COMPACT_MAX_CATEGORY_RATIO = 0.5
+# Варианты хранения 'Сумма': None - как есть, 'float32' - с понижением
+# точности, 'cents' - целые копейки/центы (int64)
+AMOUNT_DTYPES = (None, "float32", "cents")
+# Хранение 'Сумма' в приложении и в наборах данных на диске (хранилище с
+# разделами, база SQLite): целые копейки, итоги считаются точно
+DEFAULT_AMOUNT_DTYPE = "cents"
+MEMORY_PROFILE_ATTR = "memory_profile"
+
+# Число наборов данных, общих для всех сессий (load_shared_data)
+SHARED_DATASET_MAX_ENTRIES = 4
+
+# Кэш разобранных загруженных файлов: ключ - хэш содержимого файла.
+# Ограничен по числу файлов и по суммарному объему DataFrame в памяти.
+UPLOAD_CACHE_MAX_ENTRIES = 8
+UPLOAD_CACHE_MAX_BYTES = 2 * 1024 ** 3
+upload_cache = LRUCache(max_entries=UPLOAD_CACHE_MAX_ENTRIES,
+                        max_bytes=UPLOAD_CACHE_MAX_BYTES)
+
+# Потоковая загрузка CSV и XLSX: размер чанка в строках и размер файла,
+# начиная с которого приложение переходит в потоковый режим. XLSX сжат,
+# и pd.read_excel строит всю книгу в памяти, поэтому порог для него ниже.
+STREAM_CHUNK_SIZE = 500_000
+STREAMING_CSV_THRESHOLD_BYTES = 100 * 1024 ** 2
+STREAMING_EXCEL_THRESHOLD_BYTES = 20 * 1024 ** 2
+
+# Хэши содержимого файлов по (путь, размер, время изменения): файл
+# хэшируется заново, только если он изменился
+_content_hash_by_stat = LRUCache(max_entries=1024)
+
+# Соответствие file_id загрузки Streamlit -> хэш содержимого, чтобы не
+# хэшировать один и тот же файл заново при каждом перезапуске скрипта
+_upload_hash_by_file_id = LRUCache(max_entries=64)
+
 
 def validate_and_normalize_columns(df):
     """
     Проверяет и нормализует названия колонок в DataFrame
+
+    План переименования берется из resolve_columns (запоминается по
+    заголовку) и применяется одной заменой названий колонок.
     """
-    # Нормализация названий колонок (удаление пробелов и других пробельных символов)
-    df.columns = df.columns.astype(str).str.strip()
+    plan = resolve_columns(df.columns)
+    if list(df.columns) != plan.columns:
+        df.columns = plan.columns
+
+    return df, report_column_plan(plan)
+
+
+def report_column_plan(plan, source: str = None) -> bool:
+    """
+    Показывает ошибку или предупреждение об отсутствующих колонках.
+
+    Args:
+        plan: План нормализации заголовка (ColumnPlan)
+        source: Название источника для сообщения (при загрузке нескольких)
+
+    Returns:
+        bool: True, если колонки для расчета KPI найдены
+    """
+    prefix = f"{source}: " if source else ""
 
     # Проверка на наличие минимально необходимых колонок для расчета KPI
-    required_kpi_columns = ["Дата", "Сумма"]
-    if not all(col in df.columns for col in required_kpi_columns):
+    if not plan.is_valid:
         st.error(
-            f"Файл данных должен содержать следующие колонки: "
-            f"{required_kpi_columns}"
+            f"{prefix}Файл данных должен содержать следующие колонки: "
+            f"{REQUIRED_KPI_COLUMNS}"
         )
-        return df, False
-
-    # Проверяем наличие всех необходимых колонок для полноценной работы
-    # приложения, учитывая возможные варианты названий
-    required_columns = ["Дата", "Город", "Имя", "Фамилия", "Сумма", "Валюта"]
-    # Альтернативные названия колонок (например, английские названия)
-    alt_column_names = {
-        "Валюта": ["Currency"],
-        "Дата": ["Date"],
-        "Город": ["City"],
-        "Имя": ["Name"],
-        "Фамилия": ["Surname", "Last Name", "LastName"],
-        "Сумма": ["Amount", "Sum", "Total"]
-    }
+        return False
 
-    # Проверяем наличие колонок, учитывая возможные альтернативные названия
-    missing_cols = []
-    for req_col in required_columns:
-        found = False
-        
-        # Создаем обновленный словарь соответствий колонок после strip()
-        # Используем более тщательную очистку названий колонок
-        col_lower_map = {col.lower().strip(): col for col in df.columns}
-        
-        # Проверяем основное название (с учетом возможных пробельных символов)
-        req_col_clean = req_col.strip().lower()
-        df_col_names_clean = [str(col).strip().lower() for col in df.columns]
-        if req_col in df.columns or req_col_clean in df_col_names_clean:
-            # Найдем точное имя колонки в DataFrame
-            for col in df.columns:
-                if str(col).strip().lower() == req_col_clean:
-                    if str(col) != req_col:
-                        df.rename(columns={col: req_col}, inplace=True)
-                    found = True
-                    break
-        else:
-            # Проверяем альтернативные названия
-            if req_col in alt_column_names:
-                for alt_name in alt_column_names[req_col]:
-                    if alt_name in df.columns:
-                        # Переименовываем альтернативное название в стандартное
-                        df.rename(columns={alt_name: req_col}, inplace=True)
-                        found = True
-                        break
-
-            # Если не найдено точное совпадение, проверим по нижнему регистру
-            if not found:
-                req_lower = req_col.lower()
-                if req_lower in col_lower_map:
-                    # Совпадение найдено, переименовываем колонку
-                    actual_col_name = col_lower_map[req_lower]
-                    if actual_col_name != req_col:
-                        df.rename(columns={actual_col_name: req_col}, inplace=True)
-                    found = True
-                else:
-                    # Проверяем альтернативные названия в нижнем регистре
-                    if req_col in alt_column_names:
-                        for alt_name in alt_column_names[req_col]:
-                            alt_lower = alt_name.lower()
-                            if alt_lower in col_lower_map:
-                                actual_col_name = col_lower_map[alt_lower]
-                                df.rename(columns={actual_col_name: req_col}, inplace=True)
-                                found = True
-                                break
-
-        # Если всё ещё не найдено, проверим на частичное совпадение
-        if not found:
-            for col_name in df.columns:
-                if req_col.lower() in col_name.lower() or (req_col == "Валюта" and "currency" in col_name.lower()) or (req_col == "Валюта" and "валют" in col_name.lower()):
-                    # Совпадение найдено, переименовываем колонку
-                    df.rename(columns={col_name: req_col}, inplace=True)
-                    found = True
-                    break
-
-        if not found:
-            missing_cols.append(req_col)
-
-    if missing_cols:
+    if plan.missing:
         # Вместо остановки приложения, показываем предупреждение
         st.warning(
-            f"Предупреждение: "
-            f"Отсутствуют колонки: {missing_cols}. "
+            f"{prefix}Предупреждение: "
+            f"Отсутствуют колонки: {plan.missing}. "
             "Некоторые функции могут "
             "работать некорректно."
         )
 
-    return df, True
+    return True
 
 
-@st.cache_data
-def load_data(file_path: str = "web_app/data/dataset_1.xlsx") -> pd.DataFrame:
+def normalize_header(header) -> dict:
+    """
+    Проверяет заголовок файла по правилам validate_and_normalize_columns.
+
+    Args:
+        header: Названия колонок файла
+
+    Returns:
+        dict: Исходное название -> нормализованное или None, если нет
+              колонок, необходимых для расчета KPI
+    """
+    header = list(header)
+    header_df, is_valid = validate_and_normalize_columns(pd.DataFrame(columns=header))
+    return dict(zip(header, header_df.columns)) if is_valid else None
+
+
+def project_columns(mapping: dict, columns: list = None) -> list:
+    """
+    Возвращает исходные названия колонок, которые нужно прочитать.
+
+    'Дата' читается всегда: по ней сортируются и фильтруются строки,
+    поэтому проекции одного файла имеют одинаковый порядок строк.
+    Колонка источника (SOURCE_COLUMN) также сохраняется.
+
+    Args:
+        mapping: Исходное название -> нормализованное (см. normalize_header)
+        columns: Нужные стандартные колонки или None для всех
+
+    Returns:
+        list: Исходные названия колонок или None для всех
+    """
+    if columns is None:
+        return None
+    wanted = set(columns) | {"Дата", SOURCE_COLUMN}
+    return [source for source, name in mapping.items() if name in wanted]
+
+
+def select_columns(df: pd.DataFrame, columns: list = None) -> pd.DataFrame:
+    """
+    Оставляет в нормализованном DataFrame только нужные колонки
+    (а также 'Дата' и колонку источника).
+    """
+    if columns is None:
+        return df
+    wanted = set(columns) | {"Дата", SOURCE_COLUMN}
+    return df[[col for col in df.columns if col in wanted]]
+
+
+def with_duplicate_keys(columns: list = None) -> list:
+    """
+    Дополняет проекцию колонками ключа поиска дубликатов (DUPLICATE_KEY_COLUMNS).
+
+    Дубликаты определяются по всем ключевым колонкам, поэтому разные
+    проекции одного набора данных теряют одни и те же строки.
+    """
+    if columns is None:
+        return None
+    return list(columns) + [col for col in DUPLICATE_KEY_COLUMNS if col not in columns]
+
+
+def _read_projected(read, columns: list = None) -> pd.DataFrame:
+    """
+    Читает таблицу с проекцией колонок и нормализует ее.
+
+    Заголовок читается и проверяется отдельно, целиком, поэтому
+    предупреждения об отсутствующих колонках относятся к файлу, а не
+    к проекции. Затем читаются только нужные колонки (usecols).
+
+    Args:
+        read: Функция чтения с параметрами nrows и usecols
+              (например, pd.read_csv или ExcelFile.parse)
+        columns: Нужные стандартные колонки или None для всех
+
+    Returns:
+        DataFrame с нормализованными колонками и 'Дата' в формате datetime
+        или None, если колонки не прошли проверку
+    """
+    mapping = normalize_header(read(nrows=0).columns)
+    if mapping is None:
+        return None
+    return read_normalized_table(read, mapping, columns)
+
+
+def read_normalized_table(read, mapping: dict, columns: list = None) -> pd.DataFrame:
+    """
+    Читает нужные колонки таблицы с проверенным заголовком.
+
+    Args:
+        read: Функция чтения с параметром usecols
+        mapping: Исходное название -> нормализованное (см. normalize_header)
+        columns: Нужные стандартные колонки или None для всех
+
+    Returns:
+        DataFrame с нормализованными колонками и 'Дата' в формате datetime
+    """
+    df = read(usecols=project_columns(mapping, columns))
+    df.columns = [mapping[col] for col in df.columns]
+
+    # Преобразование колонки 'Дата' в формат datetime
+    set_parsed_dates(df, parse_sales_dates(df["Дата"]))
+    return df
+
+
+def set_parsed_dates(df: pd.DataFrame, dates: pd.Series) -> None:
+    """
+    Записывает разобранные даты в колонку 'Дата' и число неразобранных
+    значений в df.attrs[UNPARSED_DATES_ATTR].
+    """
+    df["Дата"] = dates
+    df.attrs[UNPARSED_DATES_ATTR] = dates.attrs.get(UNPARSED_DATES_ATTR, 0)
+
+
+def compact_sales_frame(df: pd.DataFrame, amount_dtype: str = None,
+                        max_category_ratio: float = COMPACT_MAX_CATEGORY_RATIO) -> tuple:
+    """
+    Переводит DataFrame с продажами в компактное представление.
+
+    Текстовые колонки с малым числом уникальных значений (обычно 'Город' и
+    'Валюта') становятся category, остальные ('Имя', 'Фамилия') - строками
+    на базе Arrow. 'Сумма' при необходимости хранится как float32 или как
+    целые копейки (int64), масштаб записывается в df.attrs и учитывается
+    функциями анализа и построения графиков.
+
+    Args:
+        df: DataFrame с нормализованными колонками
+        amount_dtype: Вариант хранения 'Сумма' (см. AMOUNT_DTYPES)
+        max_category_ratio: Максимальная доля уникальных значений для category
+
+    Returns:
+        tuple: (компактный DataFrame, отчет об использовании памяти)
+    """
+    if amount_dtype not in AMOUNT_DTYPES:
+        raise ValueError(f"Неизвестный тип хранения сумм: {amount_dtype}. Допустимые значения: {AMOUNT_DTYPES}")
+
+    memory_before = int(df.memory_usage(deep=True).sum())
+    df = df.copy(deep=False)
+
+    for col in COMPACT_TEXT_COLUMNS:
+        if col not in df.columns or isinstance(df[col].dtype, pd.CategoricalDtype):
+            continue
+        if df[col].nunique(dropna=True) <= max_category_ratio * len(df):
+            df[col] = df[col].astype("category")
+        elif pyarrow is not None:
+            df[col] = df[col].astype("string[pyarrow]")
+
+    if amount_dtype is not None and "Сумма" in df.columns and get_amount_scale(df) == 1:
+        if amount_dtype == "float32":
+            df["Сумма"] = pd.to_numeric(df["Сумма"], errors="coerce").astype("float32")
+        else:
+            df["Сумма"] = to_minor_units(df["Сумма"])
+            df.attrs[AMOUNT_SCALE_ATTR] = MINOR_UNITS_SCALE
+
+    memory_after = int(df.memory_usage(deep=True).sum())
+    report = {
+        "memory_before": memory_before,
+        "memory_after": memory_after,
+        "saved_bytes": memory_before - memory_after,
+        "saved_ratio": 1 - memory_after / memory_before if memory_before else 0.0,
+        "dtypes": {col: str(dtype) for col, dtype in df.dtypes.items()}
+    }
+    df.attrs[MEMORY_PROFILE_ATTR] = report
+    return df, report
+
+
+def normalizer_fingerprint() -> str:
+    """
+    Возвращает отпечаток правил нормализации колонок.
+
+    Отпечаток меняется при изменении NORMALIZER_VERSION или таблиц
+    обязательных/альтернативных колонок, что автоматически сбрасывает
+    колоночный кэш на диске.
+
+    Returns:
+        str: Короткий hex-отпечаток правил
+    """
+    rules = repr((NORMALIZER_VERSION, REQUIRED_KPI_COLUMNS, REQUIRED_COLUMNS,
+                  sorted(ALT_COLUMN_NAMES.items()), sorted(PARTIAL_COLUMN_NAMES.items())))
+    return hashlib.sha256(rules.encode("utf-8")).hexdigest()[:12]
+
+
+def file_content_hash(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Вычисляет хэш содержимого файла, читая его блоками.
+
+    Хэш запоминается по размеру и времени изменения файла, поэтому
+    неизмененные файлы повторно не читаются.
+
+    Args:
+        file_path: Путь к файлу
+        chunk_size: Размер блока чтения в байтах
+
+    Returns:
+        str: hex-строка SHA-256 содержимого файла
     """
-    Загружает и кэширует данные из Excel файла.
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    content_hash = _content_hash_by_stat.get(key)
+    if content_hash is not None:
+        return content_hash
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    content_hash = digest.hexdigest()
+    _content_hash_by_stat.put(key, content_hash)
+    return content_hash
+
+
+def sidecar_cache_path(file_path: str, content_hash: str) -> str:
+    """
+    Формирует путь к колоночному кэшу рядом с исходным файлом.
+
+    Имя кэша содержит хэш содержимого и отпечаток правил нормализации,
+    поэтому изменение любого из них приводит к промаху кэша.
+
+    Args:
+        file_path: Путь к исходному файлу данных
+        content_hash: Хэш содержимого исходного файла
+
+    Returns:
+        str: Путь к файлу кэша
+    """
+    directory, file_name = os.path.split(os.path.abspath(file_path))
+    key = f"{content_hash[:16]}.{normalizer_fingerprint()}"
+    return os.path.join(directory, f".{file_name}.{key}{SIDECAR_CACHE_SUFFIX}")
+
+
+def sidecar_quality_path(cache_path: str) -> str:
+    """
+    Путь к профилю качества файла, сохраненному рядом с колоночным кэшем.
+    """
+    return cache_path[:-len(SIDECAR_CACHE_SUFFIX)] + SIDECAR_QUALITY_SUFFIX
+
+
+def _remove_stale_sidecars(file_path: str, keep_path: str) -> None:
+    """
+    Удаляет устаревшие файлы кэша (и профили качества) для исходного файла,
+    кроме актуальных.
+    """
+    directory, file_name = os.path.split(os.path.abspath(file_path))
+    prefix = f".{file_name}."
+    keep = {keep_path, sidecar_quality_path(keep_path)}
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if (name.startswith(prefix) and name.endswith((SIDECAR_CACHE_SUFFIX, SIDECAR_QUALITY_SUFFIX))
+                and path not in keep):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def read_sidecar_cache(cache_path: str, columns: list = None):
+    """
+    Читает DataFrame из колоночного кэша.
+
+    Args:
+        cache_path: Путь к файлу кэша
+        columns: Нужные колонки или None для всех
+
+    Returns:
+        DataFrame из кэша или None, если кэш отсутствует или недоступен
+    """
+    if pyarrow is None or not os.path.exists(cache_path):
+        return None
+    try:
+        # Из колоночного файла читаются только нужные колонки
+        return pd.read_parquet(cache_path, columns=columns)
+    except Exception:
+        # Повреждённый кэш просто игнорируем - данные будут перечитаны из источника
+        return None
+
+
+def read_sidecar_columns(cache_path: str) -> list:
+    """
+    Возвращает названия колонок в колоночном кэше (без чтения данных).
+
+    Args:
+        cache_path: Путь к файлу кэша
+
+    Returns:
+        list: Названия колонок или None, если кэш отсутствует или недоступен
+    """
+    if pyarrow is None or not os.path.exists(cache_path):
+        return None
+    try:
+        return pyarrow.parquet.read_schema(cache_path).names
+    except Exception:
+        return None
+
+
+def read_sidecar_quality(cache_path: str) -> QualityProfile:
+    """
+    Читает профиль качества файла, сохраненный вместе с колоночным кэшем.
+
+    Returns:
+        QualityProfile или None, если профиль отсутствует или недоступен
+    """
+    quality_path = sidecar_quality_path(cache_path)
+    if not os.path.exists(quality_path):
+        return None
+    try:
+        return QualityProfile.load(quality_path)
+    except Exception:
+        return None
+
+
+def write_sidecar_cache(df: pd.DataFrame, file_path: str, cache_path: str,
+                        profile: QualityProfile = None) -> bool:
+    """
+    Сохраняет нормализованный DataFrame в колоночный кэш рядом с источником.
+
+    Запись атомарная (через временный файл), ошибки записи не прерывают
+    загрузку данных (например, на файловой системе только для чтения).
+    Профиль качества записывается первым, поэтому кэш без профиля
+    не появляется.
+
+    Args:
+        df: Нормализованный DataFrame
+        file_path: Путь к исходному файлу данных
+        cache_path: Путь к файлу кэша
+        profile: Профиль качества данных файла или None
+
+    Returns:
+        bool: True если кэш записан, иначе False
+    """
+    if pyarrow is None:
+        return False
+    targets = [(cache_path, lambda path: df.to_parquet(path, index=False))]
+    if profile is not None:
+        targets.insert(0, (sidecar_quality_path(cache_path), lambda path: _save_profile(profile, path)))
+    for target, write in targets:
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, target)
+        except Exception:
+            # Нет прав на запись или типы колонок не поддерживаются Parquet
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+    _remove_stale_sidecars(file_path, cache_path)
+    return True
+
+
+def _save_profile(profile: QualityProfile, path: str) -> None:
+    """
+    Записывает профиль качества в файл (np.savez не добавляет '.npz' к открытому файлу).
+    """
+    with open(path, "wb") as file:
+        profile.save(file)
+
+
+def dataset_fingerprint(*parts) -> str:
+    """
+    Формирует отпечаток набора данных из хэша источника и параметров загрузки.
+
+    Отпечаток записывается загрузчиками в df.attrs[DATASET_FINGERPRINT_ATTR]
+    и служит ключом кэшей производных структур (кубов, индексов, KPI).
+
+    Args:
+        *parts: Хэш содержимого источника и параметры, влияющие на данные
+
+    Returns:
+        str: Короткий hex-отпечаток
+    """
+    return hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def finalize_loaded_frame(df: pd.DataFrame, fingerprint: str, compact: bool,
+                           amount_dtype: str) -> pd.DataFrame:
+    """
+    Сортирует данные по дате, применяет компактное представление и
+    записывает отпечаток набора данных.
+    """
+    df = sort_by_date(df)
+    if compact:
+        df = compact_sales_frame(df, amount_dtype)[0]
+    df.attrs[DATASET_FINGERPRINT_ATTR] = fingerprint
+    return df
+
+
+def list_data_files(directory: str) -> list:
+    """
+    Возвращает файлы данных каталога (CSV и Excel) в порядке имен.
+
+    Скрытые файлы (в том числе колоночный кэш) и временные файлы Excel
+    ('~$...') пропускаются.
+
+    Args:
+        directory: Путь к каталогу
+
+    Returns:
+        list: Пути к файлам данных
+    """
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(DATA_FILE_EXTENSIONS) and not name.startswith((".", "~$"))
+    )
+
+
+def _read_sheet(read, columns: list = None) -> tuple:
+    """
+    Читает и нормализует одну таблицу (лист Excel или CSV файл).
+
+    Args:
+        read: Функция чтения с параметрами nrows и usecols
+        columns: Нужные стандартные колонки или None для всех
+
+    Returns:
+        tuple: (DataFrame или None, отчет: план колонок, число строк,
+                время чтения в секундах, текст ошибки, профиль качества
+                прочитанных колонок)
+    """
+    start = time.perf_counter()
+    report = {"plan": None, "rows": 0, "seconds": 0.0, "error": None, "quality": None}
+    try:
+        header = read(nrows=0).columns
+        plan = resolve_columns(header)
+        report["plan"] = plan
+        df = None
+        if plan.is_valid:
+            df = read_normalized_table(read, dict(zip(header, plan.columns)), columns)
+            report["rows"] = len(df)
+            # Профиль строится в том же проходе, пока колонки не спроецированы
+            report["quality"] = QualityProfile().add(df)
+    except Exception as e:
+        df = None
+        report["error"] = str(e)
+    report["seconds"] = time.perf_counter() - start
+    return df, report
+
+
+def read_source(file_path: str, columns: list = None) -> list:
+    """
+    Читает и нормализует все листы Excel файла или CSV файл.
+
+    Книга Excel открывается один раз (pd.ExcelFile): из нее берутся
+    названия листов, заголовки и данные всех листов. Выполняется в процессах
+    пула (см. load_sources), поэтому не выводит сообщений Streamlit: план
+    колонок и ошибки возвращаются в отчетах.
 
     Args:
         file_path: Путь к файлу данных
+        columns: Нужные стандартные колонки или None для всех
 
     Returns:
-        DataFrame с загруженными данными
+        list: (название листа или None для CSV, DataFrame или None, отчет
+               _read_sheet) для каждого листа
     """
+    if file_path.lower().endswith(".csv"):
+        return [(None, *_read_sheet(partial(pd.read_csv, file_path), columns))]
+    start = time.perf_counter()
     try:
-        # Загрузка данных из Excel файла
-        # Сначала получим список листов, чтобы обработать возможные варианты
-        excel_file = pd.ExcelFile(file_path)
-        sheet_names = excel_file.sheet_names
-        
-        # Читаем первый лист Excel файла
-        df = pd.read_excel(file_path, sheet_name=sheet_names[0], header=0)  # Убедимся, что первая строка используется как заголовок
+        with pd.ExcelFile(file_path) as excel_file:
+            results = [(sheet, *_read_sheet(partial(excel_file.parse, sheet), columns))
+                       for sheet in excel_file.sheet_names]
+    except Exception as e:
+        return [(None, None, {"plan": None, "rows": 0, "seconds": time.perf_counter() - start,
+                              "error": str(e), "quality": None})]
+    # Время открытия книги относится к первому листу
+    results[0][2]["seconds"] = time.perf_counter() - start - sum(
+        report["seconds"] for _, _, report in results[1:])
+    return results
 
-        # Преобразование колонки 'Дата' в формат datetime
-        df["Дата"] = pd.to_datetime(df["Дата"])
 
-        # Проверяем и нормализуем колонки
-        df, is_valid = validate_and_normalize_columns(df)
-        if not is_valid:
-            return None
+def _ingest_workers(n_tasks: int, max_workers: int = None) -> int:
+    """
+    Возвращает число процессов для n_tasks задач чтения.
+    """
+    return max(1, min(n_tasks, max_workers or INGEST_MAX_WORKERS or os.cpu_count() or 1))
 
-        return df
+
+def _run_source_tasks(tasks: list, max_workers: int = None) -> list:
+    """
+    Выполняет read_source для списка (путь, колонки) в пуле процессов.
+
+    При одной задаче или одном доступном ядре чтение выполняется в текущем
+    процессе, без затрат на запуск пула и передачу данных между процессами.
+
+    Returns:
+        list: Результаты read_source в порядке задач
+    """
+    workers = _ingest_workers(len(tasks), max_workers)
+    if workers == 1:
+        return [read_source(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(read_source, *zip(*tasks)))
+
+
+def _read_cached_file(cache_path: str, columns: list, label: str) -> tuple:
+    """
+    Читает нормализованные данные файла из колоночного кэша и профиль
+    качества, сохраненный вместе с ним.
+
+    Returns:
+        tuple: (DataFrame, QualityProfile) или (None, None), если кэша или
+               профиля нет (файл будет прочитан заново)
+    """
+    cached_columns = read_sidecar_columns(cache_path)
+    profile = None if cached_columns is None else read_sidecar_quality(cache_path)
+    if profile is None:
+        return None, None
+    # Колонки уже нормализованы, проверка лишь повторит предупреждения
+    plan = resolve_columns(cached_columns)
+    if not report_column_plan(plan, label):
+        return None, None
+    mapping = dict(zip(cached_columns, plan.columns))
+    df = read_sidecar_cache(cache_path, project_columns(mapping, columns))
+    return (df, profile) if df is not None else (None, None)
+
+
+def _data_sheets(label: str, sheet_results: list) -> list:
+    """
+    Отбрасывает листы без колонок для расчета KPI (примечания, сводки),
+    если в книге есть лист с данными.
+
+    Такие листы пропускаются без сообщений (только в журнал на уровне
+    DEBUG); книга, в которой нет ни одного листа с данными, остается как
+    есть, и об ошибке сообщает load_sources.
+
+    Args:
+        label: Название файла
+        sheet_results: Результаты read_source для листов файла
+
+    Returns:
+        list: Результаты листов, которые нужно загрузить
+    """
+    def is_data_sheet(report):
+        return report["error"] is not None or report["plan"].is_valid
+
+    kept = [result for result in sheet_results if is_data_sheet(result[2])]
+    if not kept:
+        return sheet_results
+    for sheet, _, report in sheet_results:
+        if not is_data_sheet(report):
+            logger.debug("%s: лист '%s' пропущен: нет колонок %s", label, sheet, REQUIRED_KPI_COLUMNS)
+    return kept
+
+
+def load_sources(file_paths: list, use_disk_cache: bool = True, compact: bool = True,
+                 amount_dtype: str = None, columns: list = None,
+                 max_workers: int = None, label_sources: bool = False,
+                 deduplicator: DuplicateDetector = None, file_profiles: dict = None) -> pd.DataFrame:
+    """
+    Загружает все листы всех файлов и объединяет их в один набор данных.
+
+    Каждый файл читается и нормализуется (column_resolver) отдельной
+    задачей в пуле процессов (книга Excel открывается один раз для всех
+    листов). Листы без колонок для расчета KPI пропускаются (см.
+    _data_sheets). Результат каждого файла (все листы)
+    сохраняется в колоночный кэш рядом с ним, поэтому при повторной
+    загрузке читаются только измененные файлы. Если источников (файлов
+    или листов) больше одного, строки получают колонку SOURCE_COLUMN:
+    имя файла или 'файл: лист'.
+
+    Время чтения каждого файла записывается в df.attrs[INGEST_REPORT_ATTR].
+    С deduplicator строки, повторяющие встреченные ранее (в предыдущих
+    файлах или в предыдущих вызовах с тем же deduplicator), удаляются;
+    их число записывается в отчет файла и в df.attrs[DUPLICATES_ATTR].
+
+    Профиль качества каждого файла строится при его чтении, по всем
+    колонкам (или, без колоночного кэша, по проекции с ключевыми колонками
+    DUPLICATE_KEY_COLUMNS), и сохраняется вместе с кэшем. Профили файлов
+    объединяются в df.attrs[QUALITY_PROFILE_ATTR], поэтому для профиля
+    данные не перечитываются.
+
+    Args:
+        file_paths: Пути к файлам данных
+        use_disk_cache: Использовать колоночный кэш на диске
+        compact: Перевести данные в компактное представление (compact_sales_frame)
+        amount_dtype: Вариант хранения 'Сумма' в компактном представлении
+        columns: Нужные стандартные колонки или None для всех
+        max_workers: Число процессов (по умолчанию INGEST_MAX_WORKERS)
+        label_sources: Добавлять SOURCE_COLUMN и для единственного источника
+        deduplicator: DuplicateDetector для удаления дубликатов или None
+        file_profiles: Словарь, в который записываются профили качества
+                       загруженных файлов (имя файла -> QualityProfile), или None
+
+    Returns:
+        DataFrame с данными всех источников или None, если ни один
+        источник не прошел проверку
+    """
+    started = time.perf_counter()
+    file_paths = list(file_paths)
+    content_hashes = [file_content_hash(path) for path in file_paths]
+    projection = None if columns is None else tuple(columns)
+    fingerprint = dataset_fingerprint(*content_hashes, normalizer_fingerprint(), compact, amount_dtype,
+                                      projection, deduplicator is not None)
+    # Для поиска дубликатов читаются все ключевые колонки
+    read_columns = columns if deduplicator is None else with_duplicate_keys(columns)
+    use_disk_cache = use_disk_cache and pyarrow is not None
+    labels = [os.path.basename(path) for path in file_paths]
+    # Для одного файла сообщения о колонках выводятся без названия источника
+    message_labels = labels if len(file_paths) > 1 else [None]
+
+    frames = [None] * len(file_paths)
+    profiles = [None] * len(file_paths)
+    file_reports = [{"source": label, "sheets": 0, "rows": 0, "seconds": 0.0, "cached": False,
+                     "unparsed_dates": 0, "duplicates": 0} for label in labels]
+    tasks, task_files = [], []
+    for i, path in enumerate(file_paths):
+        if use_disk_cache:
+            start = time.perf_counter()
+            frames[i], profiles[i] = _read_cached_file(sidecar_cache_path(path, content_hashes[i]), read_columns,
+                                                       message_labels[i])
+            if frames[i] is not None:
+                file_reports[i].update(rows=len(frames[i]), seconds=time.perf_counter() - start, cached=True,
+                                       unparsed_dates=frames[i].attrs.get(UNPARSED_DATES_ATTR, 0))
+                continue
+        # Для записи кэша файл читается целиком, без кэша - вместе с ключевыми
+        # колонками для профиля качества; проекция применяется после
+        tasks.append((path, None if use_disk_cache else with_duplicate_keys(read_columns)))
+        task_files.append(i)
+
+    results = _run_source_tasks(tasks, max_workers)
+
+    sheet_frames, failed_files = {}, set()
+    for i, sheet_results in zip(task_files, results):
+        file_reports[i]["seconds"] += sum(report["seconds"] for _, _, report in sheet_results)
+        sheet_results = _data_sheets(labels[i], sheet_results)
+        for sheet, df, report in sheet_results:
+            label = labels[i] if len(sheet_results) == 1 else f"{labels[i]}: {sheet}"
+            file_reports[i]["sheets"] += 1
+            if report["error"] is not None:
+                st.error(f"{label}: Ошибка при загрузке данных: {report['error']}")
+                failed_files.add(i)
+                continue
+            if not report_column_plan(report["plan"], label if len(sheet_results) > 1 else message_labels[i]):
+                failed_files.add(i)
+                continue
+            if len(sheet_results) > 1:
+                df[SOURCE_COLUMN] = label
+            file_reports[i]["rows"] += len(df)
+            file_reports[i]["unparsed_dates"] += df.attrs.get(UNPARSED_DATES_ATTR, 0)
+            sheet_frames.setdefault(i, []).append(df)
+            profiles[i] = report["quality"] if profiles[i] is None else profiles[i].merge(report["quality"])
+
+    for i, dfs in sheet_frames.items():
+        frames[i] = dfs[0] if len(dfs) == 1 else pd.concat(dfs, ignore_index=True)
+        frames[i].attrs[UNPARSED_DATES_ATTR] = file_reports[i]["unparsed_dates"]
+        # Файл с ошибками не кэшируется, чтобы сообщения о них не пропали
+        if use_disk_cache and i not in failed_files:
+            write_sidecar_cache(frames[i], file_paths[i], sidecar_cache_path(file_paths[i], content_hashes[i]),
+                                profiles[i])
+        frames[i] = select_columns(frames[i], read_columns)
+
+    if deduplicator is not None:
+        # Файлы проверяются по порядку: остается первая встреченная строка
+        for i, frame in enumerate(frames):
+            if frame is not None:
+                rows = len(frame)
+                frames[i] = select_columns(deduplicator.drop(frame), columns)
+                file_reports[i]["duplicates"] = rows - len(frames[i])
+
+    loaded = [(label, df) for label, df in zip(labels, frames) if df is not None]
+    if not loaded:
+        return None
+    if len(loaded) == 1 and not label_sources:
+        df = loaded[0][1]
+    else:
+        for label, frame in loaded:
+            if SOURCE_COLUMN not in frame.columns:
+                frame[SOURCE_COLUMN] = label
+        df = pd.concat([frame for _, frame in loaded], ignore_index=True)
+
+    df = finalize_loaded_frame(df, fingerprint, compact, amount_dtype)
+    df.attrs[UNPARSED_DATES_ATTR] = sum(report["unparsed_dates"] for report in file_reports)
+    quality = QualityProfile()
+    for label, profile in zip(labels, profiles):
+        if profile is not None:
+            quality.merge(profile)
+            if file_profiles is not None:
+                file_profiles[label] = profile
+    df.attrs[QUALITY_PROFILE_ATTR] = quality.to_dict()
+    if deduplicator is not None:
+        df.attrs[DUPLICATES_ATTR] = sum(report["duplicates"] for report in file_reports)
+    df.attrs[INGEST_REPORT_ATTR] = {
+        "files": file_reports,
+        "workers": _ingest_workers(len(tasks), max_workers),
+        "seconds": time.perf_counter() - started
+    }
+    return df
+
+
+def concat_frames(frames: list) -> pd.DataFrame:
+    """
+    Объединяет DataFrame, сохраняя компактные типы колонок.
+
+    pd.concat превращает category с разными категориями в object; здесь
+    категории колонки предварительно объединяются (порядок существующих
+    категорий сохраняется, поэтому коды первого DataFrame не меняются).
+    Если колонка в одних DataFrame category, а в других - нет, category
+    приводится к типу остальных.
+
+    Args:
+        frames: Список DataFrame с одинаковыми колонками
+
+    Returns:
+        pd.DataFrame: Объединенный DataFrame с новым RangeIndex
+    """
+    frames = [frame.copy(deep=False) for frame in frames]
+    for col in frames[0].columns:
+        dtypes = [frame[col].dtype for frame in frames if col in frame.columns]
+        is_category = [isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes]
+        if all(is_category):
+            categories = pd.Index(dtypes[0].categories)
+            for dtype in dtypes[1:]:
+                categories = categories.append(pd.Index(dtype.categories).difference(categories))
+            for frame in frames:
+                if col in frame.columns:
+                    frame[col] = frame[col].cat.set_categories(categories)
+        elif any(is_category):
+            target = next(dtype for dtype, category in zip(dtypes, is_category) if not category)
+            for frame in frames:
+                if col in frame.columns and isinstance(frame[col].dtype, pd.CategoricalDtype):
+                    frame[col] = frame[col].astype(target)
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_dataset(file_path: str, use_disk_cache: bool = True, compact: bool = True,
+                 amount_dtype: str = None, columns: list = None,
+                 drop_duplicates: bool = False) -> pd.DataFrame:
+    """
+    Загружает данные из Excel файла без кэширования в памяти.
+
+    Читаются все листы файла (см. load_sources). Нормализованные данные
+    сохраняются в колоночный кэш (Parquet) рядом с исходным файлом. Ключ
+    кэша - хэш содержимого файла и отпечаток правил нормализации, поэтому
+    после перезапуска контейнера данные читаются из кэша без разбора XLSX.
+
+    Кэш всегда содержит все колонки, а при проекции (columns) из него
+    читаются только нужные. Без кэша на диске проекция применяется уже
+    при чтении Excel (usecols).
+
+    Args:
+        file_path: Путь к файлу данных
+        use_disk_cache: Использовать колоночный кэш на диске
+        compact: Перевести данные в компактное представление (compact_sales_frame)
+        amount_dtype: Вариант хранения 'Сумма' в компактном представлении
+        columns: Нужные стандартные колонки (например, ANALYSIS_COLUMNS)
+                 или None для всех; 'Дата' загружается всегда
+        drop_duplicates: Удалить повторы строк (см. DuplicateDetector)
+
+    Returns:
+        DataFrame с загруженными данными
+    """
+    try:
+        return load_sources([file_path], use_disk_cache, compact, amount_dtype, columns,
+                            deduplicator=DuplicateDetector() if drop_duplicates else None)
     except FileNotFoundError:
         error_msg = (
             f"Файл {file_path} не найден. " "Пожалуйста, проверьте наличие файла в папке web_app/data или загрузите свой файл."
@@ -145,35 +898,410 @@ def load_data(file_path: str = "web_app/data/dataset_1.xlsx") -> pd.DataFrame:
         return None
 
 
-def load_uploaded_data(uploaded_file) -> pd.DataFrame:
+def read_directory(directory: str, use_disk_cache: bool = True, compact: bool = True,
+                   amount_dtype: str = None, columns: list = None,
+                   max_workers: int = None, drop_duplicates: bool = False) -> pd.DataFrame:
+    """
+    Загружает все файлы данных каталога (см. load_sources).
+
+    Args:
+        directory: Путь к каталогу с файлами CSV и Excel
+        use_disk_cache: Использовать колоночный кэш на диске
+        compact: Перевести данные в компактное представление (compact_sales_frame)
+        amount_dtype: Вариант хранения 'Сумма' в компактном представлении
+        columns: Нужные стандартные колонки или None для всех
+        max_workers: Число процессов (по умолчанию INGEST_MAX_WORKERS)
+        drop_duplicates: Удалить повторы строк, в том числе между файлами
+
+    Returns:
+        DataFrame с данными всех файлов или None при ошибке
+    """
+    try:
+        file_paths = list_data_files(directory)
+        if not file_paths:
+            st.error(f"В каталоге {directory} нет файлов данных (CSV или Excel).")
+            return None
+        return load_sources(file_paths, use_disk_cache, compact, amount_dtype, columns, max_workers,
+                            deduplicator=DuplicateDetector() if drop_duplicates else None)
+    except FileNotFoundError:
+        st.error(f"Каталог {directory} не найден.")
+        return None
+    except Exception as e:
+        st.error(f"Ошибка при загрузке данных: {str(e)}")
+        return None
+
+
+@st.cache_data
+def load_data(file_path: str = "web_app/data/dataset_1.xlsx",
+              use_disk_cache: bool = True, compact: bool = True,
+              amount_dtype: str = None, columns: tuple = None) -> pd.DataFrame:
+    """
+    Загружает и кэширует данные из Excel файла (см. read_dataset).
+
+    Каждый вызов получает собственную копию данных из кэша Streamlit.
+
+    Args:
+        file_path: Путь к файлу данных
+        use_disk_cache: Использовать колоночный кэш на диске
+        compact: Перевести данные в компактное представление (compact_sales_frame)
+        amount_dtype: Вариант хранения 'Сумма' в компактном представлении
+        columns: Нужные стандартные колонки или None для всех
+
+    Returns:
+        DataFrame с загруженными данными
+    """
+    return read_dataset(file_path, use_disk_cache, compact, amount_dtype, columns)
+
+
+@st.cache_resource(max_entries=SHARED_DATASET_MAX_ENTRIES)
+def _load_shared_dataset(file_path: str, use_disk_cache: bool = True, compact: bool = True,
+                         amount_dtype: str = None, columns: tuple = None) -> pd.DataFrame:
+    """
+    Загружает единственный на процесс экземпляр набора данных (или его проекции).
+    """
+    return read_dataset(file_path, use_disk_cache, compact, amount_dtype, columns)
+
+
+def load_shared_data(file_path: str = "web_app/data/dataset_1.xlsx",
+                     use_disk_cache: bool = True, compact: bool = True,
+                     amount_dtype: str = None, columns: list = None) -> pd.DataFrame:
+    """
+    Возвращает набор данных, общий для всех сессий процесса.
+
+    В отличие от load_data, данные не сериализуются и не копируются для
+    каждой сессии: в процессе хранится один экземпляр, а вызывающий код
+    получает поверхностную копию. Благодаря Copy-on-Write изменения копии
+    (новые колонки, присваивания значений) не затрагивают общий экземпляр.
+
+    Args:
+        file_path: Путь к файлу данных
+        use_disk_cache: Использовать колоночный кэш на диске
+        compact: Перевести данные в компактное представление (compact_sales_frame)
+        amount_dtype: Вариант хранения 'Сумма' в компактном представлении
+        columns: Нужные стандартные колонки или None для всех; проекции
+                 хранятся как отдельные общие экземпляры
+
+    Returns:
+        DataFrame-представление общего набора данных без копирования значений
+    """
+    projection = None if columns is None else tuple(columns)
+    df = _load_shared_dataset(file_path, use_disk_cache, compact, amount_dtype, projection)
+    return None if df is None else df.copy(deep=False)
+
+
+def _uploaded_file_bytes(uploaded_file) -> bytes:
+    """
+    Возвращает содержимое загруженного файла в виде байтов.
+    """
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    uploaded_file.seek(0)
+    return uploaded_file.read()
+
+
+def upload_cache_key(uploaded_file, *options) -> tuple:
+    """
+    Формирует ключ кэша для загруженного файла.
+
+    Ключ включает хэш содержимого, расширение файла и отпечаток правил
+    нормализации. Для загрузок Streamlit хэш запоминается по file_id,
+    поэтому повторные перезапуски скрипта не хэшируют файл заново.
+
+    Args:
+        uploaded_file: Загруженный пользователем файл
+        *options: Параметры загрузки, влияющие на результат
+
+    Returns:
+        tuple: Ключ кэша
+    """
+    file_id = getattr(uploaded_file, "file_id", None)
+    content_hash = _upload_hash_by_file_id.get(file_id) if file_id else None
+    if content_hash is None:
+        content_hash = hashlib.blake2b(_uploaded_file_bytes(uploaded_file), digest_size=16).hexdigest()
+        if file_id:
+            _upload_hash_by_file_id.put(file_id, content_hash)
+    extension = os.path.splitext(uploaded_file.name)[1].lower()
+    return (content_hash, extension, normalizer_fingerprint()) + options
+
+
+def _parse_uploaded_file(uploaded_file, columns: list = None) -> pd.DataFrame:
+    """
+    Разбирает загруженный файл и нормализует колонки.
+
+    Args:
+        uploaded_file: Загруженный пользователем файл
+        columns: Нужные стандартные колонки или None для всех
+
+    Returns:
+        DataFrame с данными или None при ошибке формата
+    """
+    content = _uploaded_file_bytes(uploaded_file)
+
+    # Определение типа файла по расширению
+    if uploaded_file.name.endswith(".csv"):
+        return _read_projected(lambda **options: pd.read_csv(io.BytesIO(content), **options), columns)
+    elif uploaded_file.name.endswith((".xlsx", ".xls")):
+        with pd.ExcelFile(io.BytesIO(content)) as excel_file:
+            return _read_projected(lambda **options: excel_file.parse(sheet_name=0, **options), columns)
+    else:
+        st.error("Поддерживаются только файлы CSV и Excel (.xlsx, .xls)")
+        return None
+
+
+def load_uploaded_data(uploaded_file, use_cache: bool = True, compact: bool = True,
+                       amount_dtype: str = None, columns: list = None,
+                       drop_duplicates: bool = False) -> pd.DataFrame:
     """
     Загружает данные из загруженного пользователем файла.
 
+    Разобранные данные кэшируются в памяти по хэшу содержимого файла
+    (LRU с ограничением по объему), поэтому перезапуски скрипта при смене
+    языка, дат или города не разбирают файл повторно. Профиль качества
+    строится при разборе, до проекции, и записывается в
+    df.attrs[QUALITY_PROFILE_ATTR].
+
     Args:
         uploaded_file: Загруженный пользователем файл (CSV или Excel)
+        use_cache: Использовать кэш разобранных файлов
+        compact: Перевести данные в компактное представление (compact_sales_frame)
+        amount_dtype: Вариант хранения 'Сумма' в компактном представлении
+        columns: Нужные стандартные колонки или None для всех; читаются
+                 только они и колонки DUPLICATE_KEY_COLUMNS (usecols)
+        drop_duplicates: Удалить повторы строк (см. DuplicateDetector)
 
     Returns:
         DataFrame с загруженными данными
     """
     try:
-        # Определение типа файла по расширению
-        if uploaded_file.name.endswith(".csv"):
-            df = pd.read_csv(uploaded_file)
-        elif uploaded_file.name.endswith((".xlsx", ".xls")):
-            df = pd.read_excel(uploaded_file)
-        else:
-            st.error("Поддерживаются только файлы CSV и Excel (.xlsx, .xls)")
+        projection = None if columns is None else tuple(columns)
+        key = upload_cache_key(uploaded_file, compact, amount_dtype, projection, drop_duplicates)
+        if use_cache:
+            cached_df = upload_cache.get(key)
+            if cached_df is not None:
+                # Поверхностная копия защищает кэш от изменения колонок вызывающим кодом
+                return cached_df.copy(deep=False)
+
+        # Ключевые колонки читаются и для профиля качества, проекция применяется после
+        df = _parse_uploaded_file(uploaded_file, with_duplicate_keys(columns))
+        if df is None:
             return None
+        quality = QualityProfile().add(df).to_dict()
+        if drop_duplicates:
+            deduplicator = DuplicateDetector()
+            df = deduplicator.drop(df)
+            df.attrs[DUPLICATES_ATTR] = deduplicator.duplicates
+        df = finalize_loaded_frame(select_columns(df, columns), dataset_fingerprint(*key), compact, amount_dtype)
+        df.attrs[QUALITY_PROFILE_ATTR] = quality
+
+        if use_cache:
+            upload_cache.put(key, df, size=int(df.memory_usage(deep=True).sum()))
+            return df.copy(deep=False)
+
+        return df
+
+    except Exception as e:
+        st.error(f"Ошибка при загрузке загруженного файла: {str(e)}")
+        return None
+
+
+def iter_normalized_chunks(chunks):
+    """
+    Нормализует колонки чанков данных по тем же правилам, что и загрузчики.
+
+    Правила применяются к заголовку первого чанка, остальные чанки
+    получают те же названия колонок без повторных проверок. Формат дат
+    также определяется один раз, по первому чанку.
+
+    Args:
+        chunks: Итератор DataFrame с одинаковыми заголовками
+
+    Yields:
+        DataFrame с нормализованными колонками и 'Дата' в формате datetime
+    """
+    columns = None
+    date_format = None
+    for chunk in chunks:
+        if columns is None:
+            chunk, is_valid = validate_and_normalize_columns(chunk)
+            if not is_valid:
+                return
+            columns = chunk.columns
+            date_format = sniff_date_format(chunk["Дата"])
+        else:
+            chunk.columns = columns
 
         # Преобразование колонки 'Дата' в формат datetime
-        df["Дата"] = pd.to_datetime(df["Дата"])
+        set_parsed_dates(chunk, parse_sales_dates(chunk["Дата"], date_format))
+        yield chunk
+
+
+def accumulate_sales_chunks(chunks, accumulator: SalesAccumulator = None) -> SalesAccumulator:
+    """
+    Нормализует чанки данных и накапливает по ним агрегаты продаж.
+
+    Args:
+        chunks: Итератор DataFrame с одинаковыми заголовками
+        accumulator: Аккумулятор для продолжения накопления (по умолчанию новый)
+
+    Returns:
+        SalesAccumulator с накопленными агрегатами или None, если колонки
+        не прошли проверку
+    """
+    if accumulator is None:
+        accumulator = SalesAccumulator(quality=QualityProfile())
 
-        # Проверяем и нормализуем колонки
-        df, is_valid = validate_and_normalize_columns(df)
-        if not is_valid:
+    is_valid = False
+    for chunk in iter_normalized_chunks(chunks):
+        is_valid = True
+        accumulator.add(chunk)
+
+    return accumulator if is_valid else None
+
+
+def stream_csv_sales(source, chunk_size: int = STREAM_CHUNK_SIZE,
+                     accumulator: SalesAccumulator = None) -> SalesAccumulator:
+    """
+    Читает CSV по частям и накапливает агрегаты продаж.
+
+    Полный DataFrame не создается: в памяти находится только текущий чанк
+    и агрегаты по дням и городам.
+
+    Args:
+        source: Путь к CSV файлу или файловый объект
+        chunk_size: Число строк в одном чанке
+        accumulator: Аккумулятор для продолжения накопления (по умолчанию новый)
+
+    Returns:
+        SalesAccumulator с накопленными агрегатами или None, если колонки
+        файла не прошли проверку
+    """
+    with pd.read_csv(source, chunksize=chunk_size) as reader:
+        return accumulate_sales_chunks(reader, accumulator)
+
+
+def iter_excel_chunks(source, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    Читает первый лист XLSX по строкам и выдает DataFrame по chunk_size строк.
+
+    Книга открывается в режиме openpyxl read_only: строки читаются из XML
+    потоком, и в памяти находится только текущий чанк, а не вся книга.
+
+    Args:
+        source: Путь к XLSX файлу или файловый объект
+        chunk_size: Число строк в одном чанке
+
+    Yields:
+        DataFrame с колонками из первой строки листа
+    """
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+
+        # Пустые ячейки в конце заголовка (форматирование листа) не являются колонками
+        width = len(header)
+        while width and header[width - 1] is None:
+            width -= 1
+        columns = [f"Unnamed: {i}" if name is None else name for i, name in enumerate(header[:width])]
+
+        batch = []
+        for row in rows:
+            row = row[:width]
+            if all(value is None for value in row):
+                continue
+            batch.append(row)
+            if len(batch) == chunk_size:
+                yield pd.DataFrame.from_records(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def stream_excel_sales(source, chunk_size: int = STREAM_CHUNK_SIZE,
+                       accumulator: SalesAccumulator = None) -> SalesAccumulator:
+    """
+    Читает XLSX по частям (см. iter_excel_chunks) и накапливает агрегаты продаж.
+
+    Args:
+        source: Путь к XLSX файлу или файловый объект
+        chunk_size: Число строк в одном чанке
+        accumulator: Аккумулятор для продолжения накопления (по умолчанию новый)
+
+    Returns:
+        SalesAccumulator с накопленными агрегатами или None, если колонки
+        файла не прошли проверку
+    """
+    return accumulate_sales_chunks(iter_excel_chunks(source, chunk_size), accumulator)
+
+
+def should_stream_upload(uploaded_file) -> bool:
+    """
+    Определяет, нужно ли загружать файл в потоковом режиме.
+
+    Args:
+        uploaded_file: Загруженный пользователем файл
+
+    Returns:
+        bool: True для CSV файлов больше STREAMING_CSV_THRESHOLD_BYTES и
+              XLSX файлов больше STREAMING_EXCEL_THRESHOLD_BYTES
+    """
+    if uploaded_file.name.endswith(".csv"):
+        threshold = STREAMING_CSV_THRESHOLD_BYTES
+    elif uploaded_file.name.endswith(".xlsx"):
+        threshold = STREAMING_EXCEL_THRESHOLD_BYTES
+    else:
+        return False
+
+    size = getattr(uploaded_file, "size", None)
+    if size is None:
+        size = len(_uploaded_file_bytes(uploaded_file))
+    return size >= threshold
+
+
+def load_uploaded_data_streaming(uploaded_file, chunk_size: int = STREAM_CHUNK_SIZE,
+                                 drop_duplicates: bool = False, amount_dtype: str = None) -> SalesAccumulator:
+    """
+    Загружает большой CSV или XLSX файл в потоковом режиме.
+
+    Результат кэшируется по хэшу содержимого файла так же, как
+    в load_uploaded_data.
+
+    Args:
+        uploaded_file: Загруженный пользователем CSV или XLSX файл
+        chunk_size: Число строк в одном чанке
+        drop_duplicates: Удалять повторы строк, в том числе между чанками
+                         (см. DuplicateDetector)
+        amount_dtype: 'cents' - накапливать суммы в целых копейках
+
+    Returns:
+        SalesAccumulator с агрегатами продаж или None при ошибке
+    """
+    try:
+        if uploaded_file.name.endswith(".csv"):
+            stream_sales = stream_csv_sales
+        elif uploaded_file.name.endswith(".xlsx"):
+            stream_sales = stream_excel_sales
+        else:
+            st.error("Потоковая загрузка поддерживается только для файлов CSV и XLSX")
             return None
 
-        return df
+        key = upload_cache_key(uploaded_file) + ("stream", chunk_size, drop_duplicates, amount_dtype)
+        accumulator = upload_cache.get(key)
+        if accumulator is not None:
+            return accumulator
+
+        uploaded_file.seek(0)
+        accumulator = SalesAccumulator(quality=QualityProfile(),
+                                       deduplicator=DuplicateDetector() if drop_duplicates else None,
+                                       amount_scale=MINOR_UNITS_SCALE if amount_dtype == "cents" else 1)
+        accumulator = stream_sales(uploaded_file, chunk_size=chunk_size, accumulator=accumulator)
+        if accumulator is not None:
+            upload_cache.put(key, accumulator)
+        return accumulator
 
     except Exception as e:
         st.error(f"Ошибка при загрузке загруженного файла: {str(e)}")
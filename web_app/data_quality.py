@@ -0,0 +1,234 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from analysis import DATASET_FINGERPRINT_ATTR
+from cache_utils import LRUCache
+from date_parser import UNPARSED_DATES_ATTR
+from dedup import DUPLICATE_KEY_COLUMNS, DuplicateDetector, combine_row_hashes, factorize_column
+
+
+# Кэш профилей качества по отпечатку набора данных
+quality_profile_cache = LRUCache(max_entries=8)
+# Ключ df.attrs с профилем качества (QualityProfile.to_dict), построенным
+# загрузчиком при чтении данных со всеми колонками
+QUALITY_PROFILE_ATTR = "quality_profile"
+
+
+class QualityProfile:
+    """
+    Профиль качества данных, накапливаемый по частям (чанкам) за один проход.
+
+    Каждая колонка раскладывается на коды и различные значения (factorize)
+    один раз; по кодам считаются пропуски, число различных значений и хэши
+    строк для поиска дубликатов, по различным значениям суммы - число
+    отрицательных, нулевых и нечисловых сумм. Различные значения и строки
+    запоминаются 64-битными хэшами в отсортированных сериях (DuplicateDetector),
+    поэтому дубликаты и число различных значений учитываются и между
+    чанками, а добавление чанка не копирует все запомненные хэши.
+
+    Профили частей (файлов, листов), построенные отдельно, объединяются
+    merge. Дубликаты ищутся по колонкам DUPLICATE_KEY_COLUMNS (как при
+    удалении повторов), поэтому профиль строится загрузчиками при чтении
+    данных со всеми этими колонками, до проекции без имен.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.dtypes = {}
+        self.nulls = {}
+        self.unparsed_dates = 0
+        self.invalid_amounts = 0
+        self.negative_amounts = 0
+        self.zero_amounts = 0
+        self.duplicates = 0
+        self.currencies = []
+        # Колонка -> хэши ее различных значений
+        self._values = {}
+        self._rows = DuplicateDetector(columns=None)
+
+    def add(self, df: pd.DataFrame) -> "QualityProfile":
+        """
+        Добавляет данные (весь набор или очередной чанк) к профилю.
+
+        Args:
+            df: DataFrame с нормализованными колонками
+
+        Returns:
+            QualityProfile (self)
+        """
+        n = len(df)
+        row_hashes = np.zeros(n, dtype=np.uint64)
+        for col in df.columns:
+            codes, uniques, value_hashes = factorize_column(df[col])
+            missing = codes < 0
+            self.dtypes.setdefault(col, str(df[col].dtype))
+            self.nulls[col] = self.nulls.get(col, 0) + int(missing.sum())
+            self._values.setdefault(col, DuplicateDetector(columns=None)).mark_hashes(value_hashes)
+            if col in DUPLICATE_KEY_COLUMNS:
+                row_hashes = combine_row_hashes(row_hashes, codes, value_hashes)
+
+            if col == "Сумма":
+                self._add_amounts(codes[~missing], uniques)
+            elif col == "Валюта":
+                self.currencies += [value for value in uniques if value not in self.currencies]
+
+        self.unparsed_dates += df.attrs.get(UNPARSED_DATES_ATTR, 0)
+        self.rows += n
+
+        # Дубликаты внутри части и строки, встречавшиеся в предыдущих частях
+        self._rows.mark_hashes(row_hashes)
+        self.duplicates = self._rows.duplicates
+        return self
+
+    def merge(self, other: "QualityProfile") -> "QualityProfile":
+        """
+        Добавляет к профилю профиль следующей части данных (другого файла).
+
+        Результат совпадает с профилем, построенным add по обеим частям
+        подряд: повторы строк и значений между частями учитываются по хэшам.
+
+        Returns:
+            QualityProfile (self)
+        """
+        for col, dtype in other.dtypes.items():
+            self.dtypes.setdefault(col, dtype)
+            self.nulls[col] = self.nulls.get(col, 0) + other.nulls[col]
+            self._values.setdefault(col, DuplicateDetector(columns=None)).merge(other._values[col])
+        self.rows += other.rows
+        self.unparsed_dates += other.unparsed_dates
+        self.invalid_amounts += other.invalid_amounts
+        self.negative_amounts += other.negative_amounts
+        self.zero_amounts += other.zero_amounts
+        self.currencies += [value for value in other.currencies if value not in self.currencies]
+        self._rows.merge(other._rows)
+        self.duplicates = self._rows.duplicates
+        return self
+
+    def save(self, file) -> None:
+        """
+        Сохраняет профиль в формате .npz: счетчики - JSON, хэши - массивы uint64.
+
+        Args:
+            file: Путь или открытый двоичный файл
+        """
+        meta = {
+            "rows": self.rows, "dtypes": self.dtypes, "nulls": self.nulls,
+            "unparsed_dates": self.unparsed_dates, "invalid_amounts": self.invalid_amounts,
+            "negative_amounts": self.negative_amounts, "zero_amounts": self.zero_amounts,
+            "duplicates": self.duplicates, "currencies": [str(value) for value in self.currencies]
+        }
+        values = {f"values_{i}": self._values[col].seen_hashes() for i, col in enumerate(self.dtypes)}
+        np.savez(file, meta=np.array(json.dumps(meta, ensure_ascii=False)), rows=self._rows.seen_hashes(), **values)
+
+    @classmethod
+    def load(cls, file) -> "QualityProfile":
+        """
+        Загружает профиль, сохраненный save.
+
+        Args:
+            file: Путь или открытый двоичный файл
+
+        Returns:
+            QualityProfile
+        """
+        with np.load(file, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            profile = cls()
+            for key in ("rows", "dtypes", "nulls", "unparsed_dates", "invalid_amounts",
+                        "negative_amounts", "zero_amounts", "duplicates", "currencies"):
+                setattr(profile, key, meta[key])
+            profile._rows = _detector_from_hashes(data["rows"], meta["rows"], meta["duplicates"])
+            for i, col in enumerate(profile.dtypes):
+                profile._values[col] = _detector_from_hashes(data[f"values_{i}"])
+        return profile
+
+    def _add_amounts(self, codes: np.ndarray, uniques) -> None:
+        """
+        Считает отрицательные, нулевые и нечисловые суммы по различным значениям.
+        """
+        if not len(uniques):
+            return
+        counts = np.bincount(codes, minlength=len(uniques))
+        amounts = pd.to_numeric(pd.Series(np.asarray(uniques, dtype=object)), errors="coerce").to_numpy(dtype="float64")
+        self.invalid_amounts += int(counts[np.isnan(amounts)].sum())
+        self.negative_amounts += int(counts[amounts < 0].sum())
+        self.zero_amounts += int(counts[amounts == 0].sum())
+
+    def to_dict(self) -> dict:
+        """
+        Возвращает профиль в виде словаря.
+
+        Returns:
+            dict: 'rows', 'columns' (колонка -> 'dtype', 'nulls', 'unique'),
+                  'missing_dates', 'unparsed_dates', 'invalid_amounts',
+                  'negative_amounts', 'zero_amounts', 'duplicates',
+                  'currencies', 'mixed_currencies'
+        """
+        return {
+            "rows": self.rows,
+            "columns": {
+                col: {"dtype": dtype, "nulls": self.nulls[col], "unique": self._values[col].report()["distinct"]}
+                for col, dtype in self.dtypes.items()
+            },
+            "missing_dates": self.nulls.get("Дата", 0),
+            "unparsed_dates": self.unparsed_dates,
+            "invalid_amounts": self.invalid_amounts,
+            "negative_amounts": self.negative_amounts,
+            "zero_amounts": self.zero_amounts,
+            "duplicates": self.duplicates,
+            "currencies": [str(currency) for currency in self.currencies],
+            "mixed_currencies": len(self.currencies) > 1
+        }
+
+
+def _detector_from_hashes(hashes: np.ndarray, rows: int = None, duplicates: int = 0) -> DuplicateDetector:
+    """
+    Восстанавливает DuplicateDetector по различным хэшам и счетчикам строк.
+    """
+    detector = DuplicateDetector(columns=None)
+    detector.mark_hashes(hashes)
+    detector.rows = len(hashes) if rows is None else rows
+    detector.duplicates = duplicates
+    return detector
+
+
+def profile_sales_data(df: pd.DataFrame) -> dict:
+    """
+    Строит профиль качества данных за один проход (см. QualityProfile).
+
+    Args:
+        df: DataFrame с нормализованными колонками
+
+    Returns:
+        dict: Профиль качества (см. QualityProfile.to_dict)
+    """
+    return QualityProfile().add(df).to_dict()
+
+
+def get_quality_profile(df: pd.DataFrame) -> dict:
+    """
+    Возвращает профиль качества набора данных.
+
+    Загрузчики строят профиль при чтении данных со всеми колонками и
+    записывают его в df.attrs[QUALITY_PROFILE_ATTR], поэтому для проекции
+    (например, колонок анализа без имен) профиль описывает все колонки
+    источника. Если профиля в attrs нет, он строится по df один раз на
+    отпечаток набора данных.
+
+    Args:
+        df: DataFrame с нормализованными колонками
+
+    Returns:
+        dict: Профиль качества (см. QualityProfile.to_dict)
+    """
+    if QUALITY_PROFILE_ATTR in df.attrs:
+        return df.attrs[QUALITY_PROFILE_ATTR]
+    fingerprint = df.attrs.get(DATASET_FINGERPRINT_ATTR)
+    profile = None if fingerprint is None else quality_profile_cache.get(fingerprint)
+    if profile is None:
+        profile = profile_sales_data(df)
+        if fingerprint is not None:
+            quality_profile_cache.put(fingerprint, profile)
+    return profile
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+
+# Форматы дат, которые распознаются по выборке значений (в порядке проверки).
+# 'ISO8601' покрывает 'ГГГГ-ММ-ДД' с временем и без.
+# День идет перед месяцем, как в резервном разборе (dayfirst=True): дата
+# 05/01/2023 в выборке без дней больше 12 читается как 5 января
+DATE_FORMATS = ["ISO8601", "%d.%m.%Y", "%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H:%M",
+                "%d/%m/%Y", "%m/%d/%Y"]
+# Числа - порядковые номера дней Excel (1900-01-01 = 1 с учетом
+# несуществующего 29.02.1900, поэтому отсчет от 30.12.1899)
+EXCEL_SERIAL_FORMAT = "excel_serial"
+EXCEL_EPOCH = "1899-12-30"
+EXCEL_SERIAL_RANGE = (1, 2958466)  # до 9999-12-31 включительно
+# Диапазон номеров, по которому числовая колонка признается датами Excel
+# (1954-10-03 - 2119-01-08): годы (2024) и небольшие коды в него не попадают
+EXCEL_SERIAL_SNIFF_RANGE = (20000, 80000)
+# Число различных значений, по которым определяется формат
+DATE_SNIFF_SAMPLE_SIZE = 1000
+# Атрибут с числом значений, которые не удалось разобрать как дату (они
+# становятся NaT); записывается в attrs результата parse_sales_dates
+UNPARSED_DATES_ATTR = "unparsed_dates"
+
+
+def _is_excel_serial(sample) -> bool:
+    """
+    Проверяет, что все значения выборки - числа в правдоподобном диапазоне
+    номеров дней Excel (EXCEL_SERIAL_SNIFF_RANGE).
+    """
+    numbers = pd.to_numeric(pd.Series(sample, dtype=object), errors="coerce")
+    if len(numbers) == 0 or numbers.isna().any():
+        return False
+    return bool(numbers.between(*EXCEL_SERIAL_SNIFF_RANGE, inclusive="left").all())
+
+
+def sniff_date_format(values) -> str:
+    """
+    Определяет формат дат по выборке различных значений.
+
+    Args:
+        values: Значения колонки 'Дата' (Series, Index или массив)
+
+    Returns:
+        str: Формат для pd.to_datetime, EXCEL_SERIAL_FORMAT для номеров дней
+             Excel или None, если формат не определен (или даты уже datetime)
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return None
+
+    sample = values.dropna().drop_duplicates().iloc[:DATE_SNIFF_SAMPLE_SIZE]
+    if sample.empty:
+        return None
+    if _is_excel_serial(sample):
+        return EXCEL_SERIAL_FORMAT
+    if pd.api.types.is_numeric_dtype(sample):
+        return None
+
+    for date_format in DATE_FORMATS:
+        parsed = pd.to_datetime(sample, format=date_format, errors="coerce")
+        if parsed.notna().all():
+            return date_format
+    return None
+
+
+def _parse_unique_dates(uniques, date_format: str):
+    """
+    Разбирает массив различных значений одним векторизованным вызовом.
+
+    Значения, не соответствующие формату, становятся NaT.
+    """
+    if date_format == EXCEL_SERIAL_FORMAT:
+        serials = pd.to_numeric(pd.Series(uniques, dtype=object), errors="coerce")
+        serials = serials.where(serials.between(*EXCEL_SERIAL_RANGE, inclusive="left"))
+        return pd.DatetimeIndex(pd.to_datetime(serials, unit="D", origin=EXCEL_EPOCH))
+    return pd.DatetimeIndex(pd.to_datetime(uniques, format=date_format, errors="coerce"))
+
+
+def _parse_mixed_dates(strings: pd.Index) -> pd.DatetimeIndex:
+    """
+    Разбирает значения разных форматов: сначала как ISO 8601, остальные -
+    по отдельности с днем перед месяцем ('ДД.ММ.ГГГГ', 'ДД/ММ/ГГГГ').
+    Значения, которые не удалось разобрать, становятся NaT.
+    """
+    parsed = pd.DatetimeIndex(pd.to_datetime(strings, format="ISO8601", errors="coerce")).as_unit("us")
+    rest = parsed.isna()
+    if rest.any():
+        mixed = pd.to_datetime(strings[rest], format="mixed", dayfirst=True, errors="coerce")
+        values = parsed.to_numpy().copy()
+        values[rest] = pd.DatetimeIndex(mixed).as_unit("us").to_numpy()
+        parsed = pd.DatetimeIndex(values)
+    return parsed
+
+
+def parse_sales_dates(values: pd.Series, date_format: str = None) -> pd.Series:
+    """
+    Преобразует колонку 'Дата' в datetime.
+
+    В данных о продажах различных дат намного меньше, чем строк, поэтому
+    колонка сначала раскладывается на различные значения (factorize), формат
+    определяется по их выборке, а разбираются только различные значения.
+    Поддерживаются ISO 8601, 'ДД.ММ.ГГГГ' и номера дней Excel. Значения,
+    не соответствующие формату (или все значения, если формат не определен),
+    разбираются по отдельности (см. _parse_mixed_dates). Числа, не похожие
+    на номера дней Excel (годы, коды), датами не считаются. Значения, которые
+    не удалось разобрать, становятся NaT; их число записывается в
+    attrs[UNPARSED_DATES_ATTR] результата.
+
+    Args:
+        values: Значения колонки 'Дата'
+        date_format: Известный формат (например, определенный по первому
+                     чанку); None - определить по данным
+
+    Returns:
+        pd.Series: Даты (datetime64) с тем же индексом
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    codes, uniques = pd.factorize(values)
+    if date_format is None:
+        date_format = sniff_date_format(uniques[:DATE_SNIFF_SAMPLE_SIZE])
+
+    parsed = None
+    numeric = pd.api.types.is_numeric_dtype(uniques) and not pd.api.types.is_bool_dtype(uniques)
+    if date_format is not None:
+        parsed = _parse_unique_dates(uniques, date_format)
+    elif numeric:
+        # Числовая колонка вне диапазона номеров дней Excel - не даты
+        parsed = pd.DatetimeIndex(np.full(len(uniques), np.datetime64("NaT"), dtype="datetime64[us]"))
+    else:
+        try:
+            parsed = pd.DatetimeIndex(pd.to_datetime(uniques))
+        except (ValueError, TypeError):
+            parsed = None
+    failed = np.ones(len(uniques), dtype=bool) if parsed is None else np.asarray(parsed.isna())
+
+    # Второй проход только по значениям, не подошедшим под формат
+    if failed.any() and not (numeric and date_format is None):
+        retried = _parse_mixed_dates(pd.Index(uniques[failed], dtype=object).astype(str))
+        combined = np.full(len(uniques), np.datetime64("NaT"), dtype="datetime64[us]")
+        if parsed is not None:
+            combined[~failed] = parsed[~failed].as_unit("us").to_numpy()
+        combined[failed] = pd.DatetimeIndex(retried).as_unit("us").to_numpy()
+        parsed = pd.DatetimeIndex(combined)
+        failed = np.asarray(parsed.isna())
+
+    # Код пропуска -1 становится NaT
+    dates = parsed.take(codes, allow_fill=True, fill_value=pd.NaT)
+    result = pd.Series(dates, index=values.index, name=values.name)
+    result.attrs[UNPARSED_DATES_ATTR] = int(failed[codes[codes >= 0]].sum()) if failed.any() else 0
+    return result
@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+
+
+# Колонки, по совпадению которых строка считается повтором транзакции
+DUPLICATE_KEY_COLUMNS = ["Дата", "Город", "Имя", "Фамилия", "Сумма", "Валюта"]
+# Ключ df.attrs с числом удаленных дубликатов
+DUPLICATES_ATTR = "dropped_duplicates"
+
+# Хэш пропуска и множитель для объединения хэшей колонок в хэш строки
+_NULL_HASH = np.uint64(0x9E3779B97F4A7C15)
+_ROW_HASH_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+def factorize_column(series: pd.Series) -> tuple:
+    """
+    Раскладывает колонку на коды и различные значения одним проходом.
+
+    Хэшируются только различные значения, поэтому стоимость хэширования
+    зависит от их числа, а не от числа строк.
+
+    Returns:
+        tuple: (коды строк, -1 для пропусков; различные значения;
+                хэши различных значений, не зависящие от чанка)
+    """
+    codes, uniques = pd.factorize(series)
+    if not len(uniques):
+        return codes, uniques, np.empty(0, dtype=np.uint64)
+
+    # Числа хэшируются как float64: одна и та же сумма дает один хэш в чанках
+    # с целым, дробным и смешанным (object) типом колонки
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return codes, uniques, pd.util.hash_array(np.asarray(uniques, dtype="float64"))
+    values = np.asarray(uniques, dtype=object)
+    hashes = pd.util.hash_array(values)
+    if series.dtype == object:
+        numbers = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype="float64")
+        is_number = ~np.isnan(numbers)
+        hashes[is_number] = pd.util.hash_array(numbers[is_number])
+    return codes, uniques, hashes
+
+
+def combine_row_hashes(row_hashes: np.ndarray, codes: np.ndarray, value_hashes: np.ndarray) -> np.ndarray:
+    """
+    Добавляет колонку (коды и хэши значений, см. factorize_column) к хэшам строк.
+    """
+    missing = codes < 0
+    if len(value_hashes):
+        column_hashes = np.where(missing, _NULL_HASH, value_hashes[np.where(missing, 0, codes)])
+    else:
+        column_hashes = np.full(len(codes), _NULL_HASH)
+    return row_hashes * _ROW_HASH_MULTIPLIER ^ column_hashes
+
+
+def hash_rows(df: pd.DataFrame, columns: list = None) -> np.ndarray:
+    """
+    Вычисляет 64-битный хэш каждой строки по значениям колонок.
+
+    Хэш не зависит от типа колонки в конкретном чанке (см. factorize_column),
+    поэтому одинаковые строки разных чанков и файлов дают одинаковый хэш.
+
+    Args:
+        df: DataFrame с нормализованными колонками
+        columns: Колонки ключа (отсутствующие в df пропускаются) или None для всех
+
+    Returns:
+        np.ndarray: Хэши строк (uint64)
+    """
+    columns = df.columns if columns is None else [col for col in columns if col in df.columns]
+    row_hashes = np.zeros(len(df), dtype=np.uint64)
+    for col in columns:
+        codes, _, value_hashes = factorize_column(df[col])
+        row_hashes = combine_row_hashes(row_hashes, codes, value_hashes)
+    return row_hashes
+
+
+class DuplicateDetector:
+    """
+    Находит повторы строк в потоке данных (чанки, файлы каталога).
+
+    Строка считается дубликатом, если ее ключевые колонки совпадают со
+    строкой, встреченной раньше - в том же чанке или в предыдущих.
+    Первая встреченная строка остается. Запоминаются только 64-битные
+    хэши различных строк, а проверка чанка выполняется бинарным поиском
+    без сравнения самих значений.
+
+    Память растет с числом различных строк (8 байт на строку) и не
+    ограничена: детектор рассчитан на наборы, хэши которых помещаются
+    в память, даже если сами строки не помещаются.
+
+    Хэши хранятся отсортированными сериями убывающего размера: новые хэши
+    чанка образуют новую серию, а серия, не более чем вдвое меньшая
+    предыдущей, сливается с ней. Поэтому серий O(log n), а каждый хэш
+    сливается O(log n) раз, вместо копирования всех хэшей на каждом чанке.
+    """
+
+    def __init__(self, columns: list = DUPLICATE_KEY_COLUMNS):
+        """
+        Args:
+            columns: Колонки ключа или None для всех колонок
+        """
+        self.columns = None if columns is None else list(columns)
+        self.rows = 0
+        self.duplicates = 0
+        # Отсортированные серии хэшей различных строк, от большей к меньшей
+        self._runs = []
+
+    def mark_hashes(self, row_hashes: np.ndarray) -> np.ndarray:
+        """
+        Отмечает дубликаты по готовым хэшам строк и запоминает новые хэши.
+
+        Args:
+            row_hashes: Хэши строк чанка (uint64)
+
+        Returns:
+            np.ndarray: Маска дубликатов (bool)
+        """
+        uniques, first = np.unique(row_hashes, return_index=True)
+        is_seen = self._contains(uniques)
+
+        duplicated = np.ones(len(row_hashes), dtype=bool)
+        duplicated[first[~is_seen]] = False
+        self._add_run(uniques[~is_seen])
+
+        self.rows += len(row_hashes)
+        self.duplicates += int(duplicated.sum())
+        return duplicated
+
+    def merge(self, other: "DuplicateDetector") -> "DuplicateDetector":
+        """
+        Добавляет хэши и счетчики другого детектора (например, построенного
+        по другому файлу), как если бы его строки шли после строк self.
+
+        Строки other, уже встреченные в self, считаются дубликатами.
+
+        Returns:
+            DuplicateDetector (self)
+        """
+        seen = [self._contains(run) for run in other._runs]
+        for run, is_seen in zip(other._runs, seen):
+            self._add_run(run[~is_seen])
+        self.rows += other.rows
+        self.duplicates += other.duplicates + sum(int(is_seen.sum()) for is_seen in seen)
+        return self
+
+    def seen_hashes(self) -> np.ndarray:
+        """
+        Возвращает отсортированные хэши всех встреченных различных строк.
+        """
+        if not self._runs:
+            return np.empty(0, dtype=np.uint64)
+        return self._runs[0] if len(self._runs) == 1 else np.sort(np.concatenate(self._runs))
+
+    def _contains(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Возвращает маску хэшей, уже встреченных раньше (поиск в каждой серии).
+        """
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            positions = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[positions] == hashes
+        return found
+
+    def _add_run(self, hashes: np.ndarray):
+        """
+        Запоминает новые отсортированные хэши и сливает серии близкого размера.
+        """
+        if not len(hashes):
+            return
+        self._runs.append(hashes)
+        while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            last = self._runs.pop()
+            # Сортировка слиянием (timsort) находит две готовые серии
+            # и сливает их за линейное время
+            self._runs[-1] = np.sort(np.concatenate((self._runs[-1], last)), kind="stable")
+
+    def mark(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Отмечает строки, повторяющие ранее встреченные (см. mark_hashes).
+
+        Args:
+            df: DataFrame (весь набор или очередной чанк)
+
+        Returns:
+            np.ndarray: Маска дубликатов (bool)
+        """
+        return self.mark_hashes(hash_rows(df, self.columns))
+
+    def drop(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Удаляет из DataFrame строки, повторяющие ранее встреченные.
+
+        Args:
+            df: DataFrame (весь набор или очередной чанк)
+
+        Returns:
+            pd.DataFrame: Строки без дубликатов; если дубликатов нет,
+                          возвращается исходный DataFrame
+        """
+        duplicated = self.mark(df)
+        if not duplicated.any():
+            return df
+        return df[~duplicated].reset_index(drop=True)
+
+    def report(self) -> dict:
+        """
+        Returns:
+            dict: 'rows' (проверено строк), 'duplicates', 'distinct',
+                  'memory_bytes' (объем запомненных хэшей)
+        """
+        return {
+            "rows": self.rows,
+            "duplicates": self.duplicates,
+            "distinct": sum(len(run) for run in self._runs),
+            "memory_bytes": sum(int(run.nbytes) for run in self._runs)
+        }
@@ -0,0 +1,70 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+from analysis import DATASET_FINGERPRINT_ATTR, FX_RATE_COLUMN
+from cache_utils import LRUCache
+from data_loader import file_content_hash
+from date_parser import parse_sales_dates
+
+
+# Локальная таблица курсов валют (CSV: Дата, Валюта, Курс). Файл лежит вне
+# web_app/data, чтобы не загружаться как данные о продажах
+FX_RATES_PATH = "web_app/fx_rates.csv"
+FX_RATES_COLUMNS = ["Дата", "Валюта", FX_RATE_COLUMN]
+
+# Разобранные таблицы курсов по хэшу содержимого файла
+fx_rates_cache = LRUCache(max_entries=4)
+
+
+def read_fx_rates(path: str = FX_RATES_PATH) -> pd.DataFrame:
+    """
+    Читает таблицу курсов валют.
+
+    Строки без даты, валюты или курса пропускаются. Хэш содержимого
+    файла записывается в df.attrs[DATASET_FINGERPRINT_ATTR] и входит в
+    ключи кэша пересчитанных кубов.
+
+    Args:
+        path: Путь к CSV файлу с колонками 'Дата', 'Валюта', 'Курс'
+
+    Returns:
+        pd.DataFrame: Курсы, отсортированные по дате
+    """
+    rates = pd.read_csv(path)
+    missing = [col for col in FX_RATES_COLUMNS if col not in rates.columns]
+    if missing:
+        raise ValueError(f"В таблице курсов нет колонок: {missing}")
+
+    rates = rates[FX_RATES_COLUMNS].assign(**{
+        "Дата": parse_sales_dates(rates["Дата"]),
+        FX_RATE_COLUMN: pd.to_numeric(rates[FX_RATE_COLUMN], errors="coerce")
+    })
+    rates = rates.dropna().sort_values("Дата", kind="stable").reset_index(drop=True)
+    rates.attrs = {DATASET_FINGERPRINT_ATTR: file_content_hash(path)}
+    return rates
+
+
+def load_fx_rates(path: str = FX_RATES_PATH) -> pd.DataFrame:
+    """
+    Возвращает таблицу курсов валют, разбирая файл только после его изменения.
+
+    Args:
+        path: Путь к CSV файлу курсов
+
+    Returns:
+        pd.DataFrame с курсами или None, если файла нет или он не разобран
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        key = file_content_hash(path)
+        rates = fx_rates_cache.get(key)
+        if rates is None:
+            rates = read_fx_rates(path)
+            fx_rates_cache.put(key, rates)
+        return rates
+    except Exception as e:
+        st.error(f"Ошибка при загрузке курсов валют: {str(e)}")
+        return None
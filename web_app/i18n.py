@@ -0,0 +1,79 @@
+import json
+import os
+from functools import lru_cache
+
+
+# Каталоги переводов (JSON) и язык, на котором записаны исходные данные
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+DEFAULT_LANGUAGE = "русский"
+SUPPORTED_LANGUAGES = ["русский", "английский", "китайский"]
+
+
+class TranslationCatalog:
+    """
+    Каталог переводов интерфейса, загружаемый один раз на процесс.
+
+    Поиск строки - два обращения к словарю без создания новых объектов.
+    Прямые и обратные соответствия названий городов вычисляются при
+    загрузке каталога.
+    """
+
+    def __init__(self, translations: dict, default_language: str = DEFAULT_LANGUAGE):
+        """
+        Args:
+            translations: Словарь язык -> ключ -> перевод
+            default_language: Язык по умолчанию для неизвестных языков
+        """
+        self.translations = translations
+        self.default = translations[default_language]
+        self.default_language = default_language
+
+        # Названия городов в данных записаны на языке по умолчанию
+        self.city_maps = {
+            lang: {} if lang == default_language else texts.get("cities", {})
+            for lang, texts in translations.items()
+        }
+        self.reverse_city_maps = {
+            lang: {translated: city for city, translated in city_map.items()}
+            for lang, city_map in self.city_maps.items()
+        }
+
+    def get(self, lang: str, key: str):
+        """
+        Возвращает перевод ключа для языка.
+
+        Args:
+            lang: Язык интерфейса
+            key: Ключ перевода
+
+        Returns:
+            Перевод (строка, список или словарь) или сам ключ, если перевода нет
+        """
+        return self.translations.get(lang, self.default).get(key, key)
+
+    def city_display_name(self, lang: str, city: str) -> str:
+        """
+        Возвращает отображаемое название города для языка интерфейса.
+        """
+        return self.city_maps.get(lang, {}).get(city, city)
+
+    def city_original_name(self, lang: str, display_name: str) -> str:
+        """
+        Возвращает название города в данных по отображаемому названию.
+        """
+        return self.reverse_city_maps.get(lang, {}).get(display_name, display_name)
+
+
+@lru_cache(maxsize=None)
+def load_catalog(name: str) -> TranslationCatalog:
+    """
+    Загружает каталог переводов из locales/<name>.json (один раз на процесс).
+
+    Args:
+        name: Имя каталога ('app' или 'faq')
+
+    Returns:
+        TranslationCatalog
+    """
+    with open(os.path.join(LOCALES_DIR, f"{name}.json"), encoding="utf-8") as f:
+        return TranslationCatalog(json.load(f))
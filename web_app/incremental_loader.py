@@ -0,0 +1,425 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from analysis import AMOUNT_SCALE_ATTR, DATASET_FINGERPRINT_ATTR, get_amount_scale
+from data_loader import (INGEST_REPORT_ATTR, MEMORY_PROFILE_ATTR, SHARED_DATASET_MAX_ENTRIES,
+                         SOURCE_COLUMN, UNPARSED_DATES_ATTR, concat_frames, dataset_fingerprint, file_content_hash,
+                         list_data_files, load_sources, normalizer_fingerprint)
+from data_quality import QUALITY_PROFILE_ATTR, QualityProfile
+from dedup import DUPLICATES_ATTR, DuplicateDetector
+from sales_cube import COUNT_COLUMN, CUBE_DIMENSIONS, SalesCube, build_cube_frame, cube_cache
+
+
+class IncrementalDirectoryDataset:
+    """
+    Набор данных каталога с инкрементальным обновлением.
+
+    При каждом обновлении сравниваются размеры и время изменения файлов;
+    для изменившихся файлов дополнительно сравнивается хэш содержимого,
+    поэтому файл, который только "тронули", повторно не разбирается.
+    Читаются только новые и измененные файлы, строки удаленных и
+    замененных файлов исключаются по колонке SOURCE_COLUMN.
+
+    Дневные агрегаты хранятся с разбивкой по источникам, поэтому куб
+    набора данных пересчитывается из агрегатов (дни x города x валюты x
+    источники), а не из строк, и сразу регистрируется в cube_cache.
+
+    Строки упорядочены по дате, а при равной дате - по источнику, поэтому
+    разные проекции одного каталога (например, колонки анализа и имена)
+    совпадают построчно.
+
+    С drop_duplicates хэши строк всех прочитанных файлов хранятся в
+    DuplicateDetector, и строки новых файлов проверяются по ним без
+    повторного чтения остальных. Остается строка файла, первого по имени
+    (как при полной загрузке), поэтому инкрементально подгружаются только
+    файлы, добавленные после всех имеющихся по имени; иначе, а также при
+    изменении и удалении файлов, каталог перечитывается целиком.
+    """
+
+    def __init__(self, directory: str, use_disk_cache: bool = True, compact: bool = True,
+                 amount_dtype: str = None, columns: list = None, max_workers: int = None,
+                 drop_duplicates: bool = False):
+        """
+        Args:
+            directory: Путь к каталогу с файлами CSV и Excel
+            use_disk_cache: Использовать колоночный кэш на диске
+            compact: Перевести данные в компактное представление (compact_sales_frame)
+            amount_dtype: Вариант хранения 'Сумма' в компактном представлении
+            columns: Нужные стандартные колонки или None для всех
+            max_workers: Число процессов для чтения файлов
+            drop_duplicates: Удалять повторы строк, в том числе между файлами
+        """
+        self.directory = directory
+        self.use_disk_cache = use_disk_cache
+        self.compact = compact
+        self.amount_dtype = amount_dtype
+        self.columns = None if columns is None else list(columns)
+        self.max_workers = max_workers
+        self.drop_duplicates = drop_duplicates
+        self.deduplicator = DuplicateDetector() if drop_duplicates else None
+        # Имя файла -> {"stat", "hash", "labels", "memory_before", "memory_after",
+        #               "unparsed_dates", "duplicates", "quality"}
+        self.files = {}
+        self.data = None
+        # Профиль качества всех файлов (объединение профилей файлов)
+        self.quality = None
+        # Агрегаты по дням, городам, валютам и источникам
+        self.source_cube = None
+        self.last_report = None
+        self._lock = threading.Lock()
+
+    def _scan(self) -> tuple:
+        """
+        Сравнивает файлы каталога с запомненным состоянием.
+
+        Returns:
+            tuple: (пути файлов по именам, новые, измененные, удаленные имена)
+        """
+        paths, added, changed = {}, [], []
+        for path in list_data_files(self.directory):
+            name = os.path.basename(path)
+            stat = os.stat(path)
+            paths[name] = path
+            entry = self.files.get(name)
+            if entry is None:
+                added.append(name)
+            elif entry["stat"] != (stat.st_size, stat.st_mtime_ns):
+                if file_content_hash(path) == entry["hash"]:
+                    # Содержимое не изменилось (например, файл скопирован заново)
+                    entry["stat"] = (stat.st_size, stat.st_mtime_ns)
+                else:
+                    changed.append(name)
+        removed = [name for name in self.files if name not in paths]
+        return paths, added, changed, removed
+
+    def refresh(self) -> dict:
+        """
+        Подгружает изменения каталога в набор данных.
+
+        Returns:
+            dict: Отчет об обновлении: 'added', 'changed', 'removed' (имена
+                  файлов), 'rows' (прочитано строк), 'seconds', а также
+                  'files' и 'workers' из отчета load_sources
+        """
+        with self._lock:
+            started = time.perf_counter()
+            paths, added, changed, removed = self._scan()
+            report = {"added": added, "changed": changed, "removed": removed,
+                      "files": [], "workers": 0, "rows": 0}
+            if not (added or changed or removed):
+                report["seconds"] = time.perf_counter() - started
+                return report
+
+            reloaded = changed
+            if self.drop_duplicates and (changed or removed or (self.files and min(added) < max(self.files))):
+                # Порядок файлов, определяющий оставшуюся копию строки, изменился
+                reloaded = sorted(name for name in self.files if name not in removed)
+                self.deduplicator = DuplicateDetector()
+
+            delta_names = sorted(set(added + reloaded))
+            delta, file_profiles = None, {}
+            if delta_names:
+                delta = load_sources([paths[name] for name in delta_names], self.use_disk_cache,
+                                     self.compact, self.amount_dtype, self.columns,
+                                     self.max_workers, label_sources=True, deduplicator=self.deduplicator,
+                                     file_profiles=file_profiles)
+
+            stale_labels = [label for name in reloaded + removed for label in self.files[name]["labels"]]
+            for name in removed:
+                del self.files[name]
+            self._register_files(delta_names, paths, delta, file_profiles)
+            self._update_quality(delta_names, rebuild=bool(reloaded or removed))
+            self._merge(delta, stale_labels)
+
+            if delta is not None:
+                report.update({key: delta.attrs[INGEST_REPORT_ATTR][key] for key in ("files", "workers")})
+                report["rows"] = len(delta)
+            report["seconds"] = time.perf_counter() - started
+            self.last_report = report
+            if self.data is not None:
+                self.data.attrs[INGEST_REPORT_ATTR] = report
+            return report
+
+    def _register_files(self, names: list, paths: dict, delta: pd.DataFrame, file_profiles: dict) -> None:
+        """
+        Запоминает состояние прочитанных файлов, подписи их источников и
+        профили качества (file_profiles из load_sources).
+
+        Файл, который не прошел проверку, тоже запоминается (без строк),
+        чтобы не разбирать его заново до следующего изменения.
+        """
+        labels = [] if delta is None else list(pd.unique(delta[SOURCE_COLUMN].astype(str)))
+        rows = {} if delta is None else delta[SOURCE_COLUMN].astype(str).value_counts().to_dict()
+        memory_before, memory_after, file_reports = 0, 0, {}
+        if delta is not None:
+            memory_before = delta.attrs.get(MEMORY_PROFILE_ATTR, {}).get("memory_before", 0)
+            memory_after = delta.attrs.get(MEMORY_PROFILE_ATTR, {}).get("memory_after", 0)
+            file_reports = {report["source"]: report for report in delta.attrs[INGEST_REPORT_ATTR]["files"]}
+
+        for name in names:
+            stat = os.stat(paths[name])
+            file_labels = sorted(label for label in labels
+                                 if label == name or label.startswith(f"{name}: "))
+            file_rows = sum(rows.get(label, 0) for label in file_labels)
+            self.files[name] = {
+                "stat": (stat.st_size, stat.st_mtime_ns),
+                "hash": file_content_hash(paths[name]),
+                "labels": file_labels,
+                # Объем памяти прочитанных строк (до и после compact_sales_frame)
+                # делится между файлами пропорционально строкам
+                "memory_before": int(memory_before * file_rows / len(delta)) if file_rows else 0,
+                "memory_after": int(memory_after * file_rows / len(delta)) if file_rows else 0,
+                "unparsed_dates": file_reports.get(name, {}).get("unparsed_dates", 0),
+                "duplicates": file_reports.get(name, {}).get("duplicates", 0),
+                "quality": file_profiles.get(name)
+            }
+
+    def _update_quality(self, names: list, rebuild: bool) -> None:
+        """
+        Обновляет профиль качества набора данных по профилям файлов.
+
+        Профили новых файлов добавляются к сохраненному профилю; после
+        изменения или удаления файлов профиль собирается заново из профилей
+        файлов, без чтения данных. Число дубликатов и различных значений
+        не зависит от порядка файлов.
+
+        Args:
+            names: Имена прочитанных файлов
+            rebuild: Собрать профиль из профилей всех файлов
+        """
+        if rebuild or self.quality is None:
+            self.quality = QualityProfile()
+            names = sorted(self.files)
+        for name in names:
+            if self.files[name]["quality"] is not None:
+                self.quality.merge(self.files[name]["quality"])
+
+    def _merge(self, delta: pd.DataFrame, stale_labels: list) -> None:
+        """
+        Объединяет прочитанные строки и агрегаты с сохраненными.
+
+        Сохраненные строки уже упорядочены, поэтому они не сортируются
+        заново (см. merge_sorted_frames), а отчет о памяти складывается из
+        объемов файлов, без прохода по всем строкам.
+        """
+        retained, cubes = None, []
+        if self.data is not None:
+            retained = self.data
+            if stale_labels:
+                retained = retained[~retained[SOURCE_COLUMN].isin(stale_labels)]
+        if self.source_cube is not None:
+            retained_cube = self.source_cube
+            if stale_labels:
+                retained_cube = retained_cube[~retained_cube[SOURCE_COLUMN].isin(stale_labels)]
+            cubes.append(retained_cube)
+        if delta is not None:
+            if "Сумма" in delta.columns:
+                cubes.append(build_cube_frame(delta, CUBE_DIMENSIONS + [SOURCE_COLUMN]))
+
+        labels = sorted(label for entry in self.files.values() for label in entry["labels"])
+        if not labels:
+            self.data = None
+            self.source_cube = None
+            return
+
+        amount_scale = get_amount_scale(delta if delta is not None else self.data)
+        data = merge_sorted_frames(retained, delta, pd.CategoricalDtype(labels))
+        data.attrs = {DATASET_FINGERPRINT_ATTR: self.fingerprint(),
+                      UNPARSED_DATES_ATTR: sum(entry["unparsed_dates"] for entry in self.files.values())}
+        data.attrs[QUALITY_PROFILE_ATTR] = self.quality.to_dict()
+        if self.drop_duplicates:
+            data.attrs[DUPLICATES_ATTR] = sum(entry["duplicates"] for entry in self.files.values())
+        if amount_scale != 1:
+            data.attrs[AMOUNT_SCALE_ATTR] = amount_scale
+        if self.compact:
+            data.attrs[MEMORY_PROFILE_ATTR] = self._memory_profile(data)
+        self.data = data
+
+        if cubes:
+            self.source_cube = pd.concat(cubes, ignore_index=True)
+            cube_cache.put(self.data.attrs[DATASET_FINGERPRINT_ATTR],
+                           SalesCube(combine_source_cube(self.source_cube, amount_scale)))
+
+    def _memory_profile(self, data: pd.DataFrame) -> dict:
+        """
+        Отчет об использовании памяти в формате compact_sales_frame.
+        """
+        memory_before = sum(entry["memory_before"] for entry in self.files.values())
+        memory_after = sum(entry["memory_after"] for entry in self.files.values())
+        return {
+            "memory_before": memory_before,
+            "memory_after": memory_after,
+            "saved_bytes": memory_before - memory_after,
+            "saved_ratio": 1 - memory_after / memory_before if memory_before else 0.0,
+            "dtypes": {col: str(dtype) for col, dtype in data.dtypes.items()}
+        }
+
+    def fingerprint(self) -> str:
+        """
+        Отпечаток текущего состояния: хэши файлов и параметры загрузки.
+        """
+        projection = None if self.columns is None else tuple(self.columns)
+        hashes = [self.files[name]["hash"] for name in sorted(self.files)]
+        return dataset_fingerprint(*hashes, normalizer_fingerprint(), self.compact,
+                                   self.amount_dtype, projection, self.drop_duplicates)
+
+    def view(self) -> pd.DataFrame:
+        """
+        Возвращает представление набора данных без копирования значений.
+
+        Колонка SOURCE_COLUMN остается, только если источников больше одного
+        (как в load_sources).
+
+        Returns:
+            DataFrame или None, если в каталоге нет данных
+        """
+        data = self.data
+        if data is None:
+            return None
+        if len(data[SOURCE_COLUMN].cat.categories) == 1:
+            return data.drop(columns=[SOURCE_COLUMN])
+        return data.copy(deep=False)
+
+
+def _date_sort_keys(df: pd.DataFrame) -> np.ndarray:
+    """
+    Ключи сортировки по 'Дата' (int64); строки без даты - в конце.
+    """
+    dates = df["Дата"].to_numpy()
+    return np.where(np.isnat(dates), np.iinfo(np.int64).max, dates.view(np.int64))
+
+
+def merge_sorted_frames(retained: pd.DataFrame, delta: pd.DataFrame,
+                        source_dtype: pd.CategoricalDtype) -> pd.DataFrame:
+    """
+    Добавляет новые строки к строкам, упорядоченным по дате и источнику.
+
+    Сортируются только новые строки и сохраненные строки того же отрезка
+    дат: его границы находятся бинарным поиском по датам сохраненных
+    строк, строки до и после отрезка переносятся без сортировки. Для
+    файлов с новыми датами (например, за следующий месяц) отрезок пуст.
+
+    Args:
+        retained: Сохраненные строки, упорядоченные sort_by_date_and_source, или None
+        delta: Новые строки или None
+        source_dtype: Тип SOURCE_COLUMN результата (категории - подписи всех источников)
+
+    Returns:
+        pd.DataFrame: Строки, упорядоченные как sort_by_date_and_source
+    """
+    def with_sources(frame):
+        frame = frame.copy(deep=False)
+        frame[SOURCE_COLUMN] = frame[SOURCE_COLUMN].astype(source_dtype)
+        return frame
+
+    if delta is None:
+        return with_sources(retained)
+    delta = sort_by_date_and_source(with_sources(delta))
+    if retained is None or retained.empty:
+        return delta
+    retained = with_sources(retained)
+
+    keys, delta_keys = _date_sort_keys(retained), _date_sort_keys(delta)
+    start = int(np.searchsorted(keys, delta_keys[0], side="left"))
+    end = int(np.searchsorted(keys, delta_keys[-1], side="right"))
+    span = sort_by_date_and_source(concat_frames([retained.iloc[start:end], delta]))
+    pieces = [piece for piece in (retained.iloc[:start], span, retained.iloc[end:]) if not piece.empty]
+    data = concat_frames(pieces)
+    data.index = pd.DatetimeIndex(data["Дата"].to_numpy())
+    return data
+
+
+def sort_by_date_and_source(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Сортирует DataFrame по 'Дата' и коду SOURCE_COLUMN и устанавливает индекс datetime64.
+
+    Строки без даты помещаются в конец, внутри источника исходный порядок
+    строк сохраняется. Если данные уже упорядочены, они не копируются.
+
+    Args:
+        df: DataFrame с колонкой 'Дата' и категориальной колонкой SOURCE_COLUMN
+
+    Returns:
+        pd.DataFrame: Отсортированный DataFrame
+    """
+    order = np.lexsort((df[SOURCE_COLUMN].cat.codes.to_numpy(), _date_sort_keys(df)))
+    if not (order == np.arange(len(order))).all():
+        df = df.take(order)
+    df.index = pd.DatetimeIndex(df["Дата"].to_numpy())
+    return df
+
+
+def combine_source_cube(source_cube: pd.DataFrame, amount_scale: int = 1) -> pd.DataFrame:
+    """
+    Сводит агрегаты по источникам в куб набора данных (см. build_cube_frame).
+
+    Args:
+        source_cube: Агрегаты с колонками 'Дата', измерениями куба и SOURCE_COLUMN
+        amount_scale: Масштаб хранения сумм
+
+    Returns:
+        pd.DataFrame: Куб по дням, городам и валютам, отсортированный по дате
+    """
+    keys = ["Дата"] + [col for col in CUBE_DIMENSIONS if col in source_cube.columns]
+    cube = (source_cube.groupby(keys, observed=True, dropna=False, sort=True)[["Сумма", COUNT_COLUMN]]
+            .sum().reset_index())
+    cube.attrs = {}
+    if amount_scale != 1:
+        cube.attrs[AMOUNT_SCALE_ATTR] = amount_scale
+    return cube
+
+
+@st.cache_resource(max_entries=SHARED_DATASET_MAX_ENTRIES)
+def _shared_directory_dataset(directory: str, use_disk_cache: bool = True, compact: bool = True,
+                              amount_dtype: str = None, columns: tuple = None,
+                              drop_duplicates: bool = False) -> IncrementalDirectoryDataset:
+    """
+    Возвращает единственный на процесс инкрементальный набор данных каталога.
+    """
+    return IncrementalDirectoryDataset(directory, use_disk_cache, compact, amount_dtype, columns,
+                                       drop_duplicates=drop_duplicates)
+
+
+def load_shared_directory_data(directory: str = "web_app/data", use_disk_cache: bool = True,
+                               compact: bool = True, amount_dtype: str = None,
+                               columns: list = None, drop_duplicates: bool = False) -> pd.DataFrame:
+    """
+    Возвращает данные всех файлов каталога, общие для всех сессий процесса.
+
+    При каждом вызове набор данных обновляется инкрементально: читаются
+    только новые и измененные файлы, поэтому после добавления файла в
+    каталог не требуется перезапуск приложения и полная перезагрузка.
+
+    Args:
+        directory: Путь к каталогу с файлами CSV и Excel
+        use_disk_cache: Использовать колоночный кэш на диске
+        compact: Перевести данные в компактное представление (compact_sales_frame)
+        amount_dtype: Вариант хранения 'Сумма' в компактном представлении
+        columns: Нужные стандартные колонки или None для всех; проекции
+                 хранятся как отдельные общие экземпляры
+        drop_duplicates: Удалять повторы строк, в том числе между файлами
+
+    Returns:
+        DataFrame-представление общего набора данных или None при ошибке
+    """
+    projection = None if columns is None else tuple(columns)
+    dataset = _shared_directory_dataset(directory, use_disk_cache, compact, amount_dtype, projection,
+                                        drop_duplicates)
+    try:
+        dataset.refresh()
+    except FileNotFoundError:
+        st.error(f"Каталог {directory} не найден.")
+        return None
+    except Exception as e:
+        st.error(f"Ошибка при загрузке данных: {str(e)}")
+        return None
+
+    df = dataset.view()
+    if df is None:
+        st.error(f"В каталоге {directory} нет файлов данных (CSV или Excel).")
+    return df
@@ -0,0 +1,391 @@
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from analysis import AMOUNT_SCALE_ATTR, DATASET_FINGERPRINT_ATTR, get_amount_scale
+from data_quality import get_quality_profile
+from data_loader import (DEFAULT_AMOUNT_DTYPE, SHARED_DATASET_MAX_ENTRIES, concat_frames, dataset_fingerprint,
+                         file_content_hash, list_data_files, normalizer_fingerprint, read_directory)
+from row_index import sort_by_date
+from sales_cube import SalesCube, build_cube_frame, cube_cache, to_day
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - pyarrow входит в зависимости Streamlit
+    pyarrow = None
+
+
+# Каталог хранилища внутри каталога данных (скрытый, поэтому не считается файлом данных)
+STORE_DIR_NAME = ".partitions"
+STORE_FORMAT_VERSION = 2
+MANIFEST_FILE_NAME = "_manifest.json"
+CUBE_FILE_NAME = "_cube.parquet"
+# Раздел для строк без даты (в выборки по диапазону дат не попадает)
+UNDATED_PARTITION = "undated"
+
+
+def partition_path(month: str) -> str:
+    """
+    Возвращает путь файла раздела относительно корня хранилища.
+
+    Args:
+        month: Месяц раздела ('ГГГГ-ММ') или UNDATED_PARTITION
+
+    Returns:
+        str: Путь вида 'month=2023-01/part-0.parquet'
+    """
+    return os.path.join(f"month={month}", "part-0.parquet")
+
+
+def directory_source_fingerprint(directory: str, compact: bool = True,
+                                 amount_dtype: str = DEFAULT_AMOUNT_DTYPE,
+                                 format_version: int = STORE_FORMAT_VERSION) -> str:
+    """
+    Отпечаток файлов каталога данных, по которому проверяется актуальность хранилища
+    (или базы SQLite, которая передает свою версию формата в format_version).
+
+    Хэши файлов запоминаются по размеру и времени изменения, поэтому
+    проверка неизмененного каталога не читает файлы.
+    """
+    hashes = [(os.path.basename(path), file_content_hash(path)) for path in list_data_files(directory)]
+    return dataset_fingerprint(*hashes, normalizer_fingerprint(), compact, amount_dtype, format_version)
+
+
+def write_partitioned_store(df: pd.DataFrame, root: str, source_fingerprint: str = None) -> dict:
+    """
+    Сохраняет нормализованный набор данных как хранилище с разделами по месяцам.
+
+    Каждый месяц записывается в отдельный файл Parquet
+    ('month=ГГГГ-ММ/part-0.parquet'), строки без даты - в раздел
+    UNDATED_PARTITION. Рядом сохраняются куб дневных агрегатов и манифест
+    с границами дат каждого раздела и профилем качества данных. Хранилище сначала записывается во
+    временный каталог, затем заменяет прежнее целиком.
+
+    Args:
+        df: DataFrame с нормализованными колонками (см. load_sources)
+        root: Каталог хранилища
+        source_fingerprint: Отпечаток источника (см. directory_source_fingerprint)
+
+    Returns:
+        dict: Манифест хранилища
+    """
+    if pyarrow is None:
+        raise ImportError("Для хранилища с разделами по месяцам нужен pyarrow")
+
+    df = sort_by_date(df)
+    dates = df["Дата"].to_numpy()
+    n_dated = len(dates) - int(np.isnat(dates).sum())
+    months = dates[:n_dated].astype("datetime64[M]")
+    # Данные отсортированы по дате, поэтому месяц - непрерывный отрезок строк
+    month_values, starts = np.unique(months, return_index=True)
+    bounds = list(starts) + [n_dated]
+
+    partitions = [
+        (str(month), int(bounds[i]), int(bounds[i + 1])) for i, month in enumerate(month_values)
+    ]
+    if n_dated < len(df):
+        partitions.append((UNDATED_PARTITION, n_dated, len(df)))
+
+    tmp_root = f"{root}.tmp"
+    shutil.rmtree(tmp_root, ignore_errors=True)
+    manifest = {
+        "format_version": STORE_FORMAT_VERSION,
+        "source_fingerprint": source_fingerprint,
+        "fingerprint": df.attrs.get(DATASET_FINGERPRINT_ATTR),
+        "amount_scale": get_amount_scale(df),
+        "columns": [str(col) for col in df.columns],
+        "quality_profile": get_quality_profile(df),
+        "partitions": []
+    }
+    for month, start, end in partitions:
+        part = df.iloc[start:end]
+        path = partition_path(month)
+        os.makedirs(os.path.join(tmp_root, os.path.dirname(path)))
+        pyarrow.parquet.write_table(pyarrow.Table.from_pandas(part, preserve_index=False),
+                                    os.path.join(tmp_root, path))
+        dated = month != UNDATED_PARTITION
+        manifest["partitions"].append({
+            "month": month,
+            "path": path,
+            "rows": end - start,
+            "min_date": pd.Timestamp(dates[start]).isoformat() if dated else None,
+            "max_date": pd.Timestamp(dates[end - 1]).isoformat() if dated else None
+        })
+
+    cube = build_cube_frame(df)
+    pyarrow.parquet.write_table(pyarrow.Table.from_pandas(cube, preserve_index=False),
+                                os.path.join(tmp_root, CUBE_FILE_NAME))
+    with open(os.path.join(tmp_root, MANIFEST_FILE_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+
+    old_root = f"{root}.old"
+    shutil.rmtree(old_root, ignore_errors=True)
+    if os.path.exists(root):
+        os.replace(root, old_root)
+    os.replace(tmp_root, root)
+    shutil.rmtree(old_root, ignore_errors=True)
+    return manifest
+
+
+class PartitionedSalesStore:
+    """
+    Набор данных о продажах, сохраненный на диске с разделами по месяцам.
+
+    В памяти хранятся только манифест и куб дневных агрегатов (KPI и
+    графики считаются по кубу). Строки читаются по запросу: только
+    разделы, пересекающиеся с диапазоном дат, и только нужные колонки;
+    фильтр по дате и городу передается в Parquet (predicate pushdown).
+
+    Метод filter совместим с SalesRowIndex.filter, поэтому хранилище
+    может заменить индекс строк: вместо строк набора данных передается
+    пустой DataFrame с нужными колонками (см. schema).
+    """
+
+    def __init__(self, root: str, manifest: dict):
+        """
+        Args:
+            root: Каталог хранилища
+            manifest: Манифест (см. write_partitioned_store)
+        """
+        self.root = root
+        self.manifest = manifest
+        self.partitions = manifest["partitions"]
+        self.amount_scale = manifest.get("amount_scale", 1)
+        self.fingerprint = manifest.get("fingerprint")
+        self._cube = None
+
+    @classmethod
+    def open(cls, root: str) -> "PartitionedSalesStore":
+        """
+        Открывает хранилище (читается только манифест).
+
+        Args:
+            root: Каталог хранилища
+
+        Returns:
+            PartitionedSalesStore или None, если хранилища нет или его формат устарел
+        """
+        try:
+            with open(os.path.join(root, MANIFEST_FILE_NAME), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get("format_version") != STORE_FORMAT_VERSION:
+            return None
+        return cls(root, manifest)
+
+    @property
+    def quality_profile(self) -> dict:
+        """Профиль качества данных, построенный при записи хранилища."""
+        return self.manifest.get("quality_profile")
+
+    @property
+    def dated_partitions(self) -> list:
+        return [part for part in self.partitions if part["month"] != UNDATED_PARTITION]
+
+    @property
+    def min_date(self):
+        """Первая дата в данных (datetime.date) или None."""
+        dated = self.dated_partitions
+        return pd.Timestamp(dated[0]["min_date"]).date() if dated else None
+
+    @property
+    def max_date(self):
+        """Последняя дата в данных (datetime.date) или None."""
+        dated = self.dated_partitions
+        return pd.Timestamp(dated[-1]["max_date"]).date() if dated else None
+
+    @property
+    def cube(self) -> SalesCube:
+        """
+        Куб дневных агрегатов, читается при первом обращении.
+        """
+        if self._cube is None:
+            cube = cube_cache.get(self.fingerprint) if self.fingerprint is not None else None
+            if cube is None:
+                data = pyarrow.parquet.read_table(os.path.join(self.root, CUBE_FILE_NAME)).to_pandas()
+                data.attrs = {AMOUNT_SCALE_ATTR: self.amount_scale} if self.amount_scale != 1 else {}
+                cube = SalesCube(data)
+                if self.fingerprint is not None:
+                    cube_cache.put(self.fingerprint, cube)
+            self._cube = cube
+        return self._cube
+
+    def partitions_for(self, start_date=None, end_date=None) -> list:
+        """
+        Возвращает разделы, пересекающиеся с диапазоном дат (включительно).
+
+        Без границ возвращаются все разделы, включая строки без даты.
+        """
+        if start_date is None and end_date is None:
+            return list(self.partitions)
+        selected = []
+        for part in self.dated_partitions:
+            if start_date is not None and to_day(part["max_date"]) < to_day(start_date):
+                continue
+            if end_date is not None and to_day(part["min_date"]) > to_day(end_date):
+                continue
+            selected.append(part)
+        return selected
+
+    def schema(self, columns: list = None) -> pd.DataFrame:
+        """
+        Возвращает пустой DataFrame с колонками хранилища (или их проекцией).
+
+        Args:
+            columns: Нужные стандартные колонки или None для всех ('Дата' включается всегда)
+
+        Returns:
+            pd.DataFrame без строк с отпечатком и масштабом сумм в attrs
+        """
+        selected = self._select(columns)
+        df = pd.DataFrame(columns=selected)
+        if self.fingerprint is not None:
+            df.attrs[DATASET_FINGERPRINT_ATTR] = self.fingerprint
+        if self.amount_scale != 1:
+            df.attrs[AMOUNT_SCALE_ATTR] = self.amount_scale
+        return df
+
+    def _select(self, columns: list = None) -> list:
+        """
+        Колонки хранилища для чтения в порядке хранения.
+        """
+        stored = self.manifest["columns"]
+        if columns is None:
+            return list(stored)
+        wanted = set(columns) | {"Дата"}
+        return [col for col in stored if col in wanted]
+
+    def read(self, start_date=None, end_date=None, columns: list = None, city: str = None) -> pd.DataFrame:
+        """
+        Читает строки за диапазон дат (включительно) и, при необходимости, для города.
+
+        Args:
+            start_date: Начальная дата или None
+            end_date: Конечная дата или None
+            columns: Нужные стандартные колонки или None для всех
+            city: Город или None для всех городов
+
+        Returns:
+            pd.DataFrame: Строки, отсортированные по дате, с индексом datetime64
+        """
+        if city is not None and "Город" not in self.manifest["columns"]:
+            return self.schema(columns)
+
+        filters = []
+        if start_date is not None:
+            filters.append(("Дата", ">=", pd.Timestamp(to_day(start_date))))
+        if end_date is not None:
+            filters.append(("Дата", "<", pd.Timestamp(to_day(end_date) + np.timedelta64(1, "D"))))
+        if city is not None:
+            filters.append(("Город", "==", city))
+
+        selected = self._select(columns)
+        frames = [
+            pyarrow.parquet.read_table(os.path.join(self.root, part["path"]), columns=selected,
+                                       filters=filters or None).to_pandas()
+            for part in self.partitions_for(start_date, end_date)
+        ]
+        if not frames:
+            return self.schema(columns)
+        df = frames[0] if len(frames) == 1 else concat_frames(frames)
+        df.index = pd.DatetimeIndex(df["Дата"].to_numpy())
+        df.attrs = {AMOUNT_SCALE_ATTR: self.amount_scale} if self.amount_scale != 1 else {}
+        return df
+
+    def filter(self, df: pd.DataFrame, start_date=None, end_date=None, city: str = None) -> pd.DataFrame:
+        """
+        Читает строки за диапазон дат и для города с колонками df (см. SalesRowIndex.filter).
+
+        Args:
+            df: DataFrame, колонки которого нужно прочитать (например, schema())
+            start_date: Начальная дата или None
+            end_date: Конечная дата или None
+            city: Город или None для всех городов
+
+        Returns:
+            pd.DataFrame: Прочитанные строки
+        """
+        return self.read(start_date, end_date, list(df.columns), city)
+
+
+def sync_partitioned_store(directory: str, root: str = None, compact: bool = True,
+                           amount_dtype: str = DEFAULT_AMOUNT_DTYPE) -> PartitionedSalesStore:
+    """
+    Открывает хранилище каталога данных, пересоздавая его при изменении файлов.
+
+    Пересоздание читает каталог целиком (read_directory) один раз; после
+    записи хранилища строки в памяти не сохраняются.
+
+    Args:
+        directory: Каталог с файлами CSV и Excel
+        root: Каталог хранилища (по умолчанию <directory>/STORE_DIR_NAME)
+        compact: Перевести данные в компактное представление (compact_sales_frame)
+        amount_dtype: Вариант хранения 'Сумма' в компактном представлении
+                      (по умолчанию целые копейки, масштаб записывается в манифест)
+
+    Returns:
+        PartitionedSalesStore или None, если каталог не удалось загрузить
+    """
+    root = root or os.path.join(directory, STORE_DIR_NAME)
+    source_fingerprint = directory_source_fingerprint(directory, compact, amount_dtype)
+    store = PartitionedSalesStore.open(root)
+    if store is not None and store.manifest.get("source_fingerprint") == source_fingerprint:
+        return store
+
+    df = read_directory(directory, compact=compact, amount_dtype=amount_dtype)
+    if df is None:
+        return None
+    write_partitioned_store(df, root, source_fingerprint)
+    return PartitionedSalesStore.open(root)
+
+
+@st.cache_resource(max_entries=SHARED_DATASET_MAX_ENTRIES)
+def _shared_sales_store(directory: str, source_fingerprint: str,
+                        amount_dtype: str = DEFAULT_AMOUNT_DTYPE) -> PartitionedSalesStore:
+    """
+    Возвращает хранилище каталога, общее для всех сессий процесса.
+    """
+    return sync_partitioned_store(directory, amount_dtype=amount_dtype)
+
+
+def load_shared_sales_store(directory: str = "web_app/data",
+                            amount_dtype: str = DEFAULT_AMOUNT_DTYPE) -> PartitionedSalesStore:
+    """
+    Возвращает хранилище с разделами по месяцам, если оно создано для каталога.
+
+    Хранилище создается командой 'python web_app/partitioned_store.py
+    web_app/data' и затем обновляется автоматически при изменении файлов
+    каталога. Без хранилища возвращается None, и приложение загружает
+    каталог в память (см. load_shared_directory_data).
+
+    Args:
+        directory: Каталог с файлами CSV и Excel
+        amount_dtype: Вариант хранения 'Сумма' (как при загрузке в память)
+
+    Returns:
+        PartitionedSalesStore или None
+    """
+    if pyarrow is None or not os.path.isdir(os.path.join(directory, STORE_DIR_NAME)):
+        return None
+    try:
+        return _shared_sales_store(directory, directory_source_fingerprint(directory, amount_dtype=amount_dtype),
+                                   amount_dtype)
+    except Exception as e:
+        st.error(f"Ошибка при загрузке данных: {str(e)}")
+        return None
+
+
+if __name__ == "__main__":
+    data_directory = sys.argv[1] if len(sys.argv) > 1 else "web_app/data"
+    sales_store = sync_partitioned_store(data_directory)
+    if sales_store is None:
+        sys.exit(f"Не удалось загрузить данные из {data_directory}")
+    print(f"{sales_store.root}: {len(sales_store.partitions)} раздел(ов), "
+          f"{sum(part['rows'] for part in sales_store.partitions)} строк")
@@ -5,6 +5,9 @@ except ImportError:
     go = None
 import pandas as pd
 
+from aggregation import WEEKDAYS, daily_sums, group_sums, weekday_sums
+from analysis import get_amount_scale, to_display_units
+
 
 def create_sales_over_time_plot(df: pd.DataFrame, lang: str = 'русский') -> object:
     """
@@ -17,20 +20,43 @@ def create_sales_over_time_plot(df: pd.DataFrame, lang: str = 'русский')
     Returns:
         Объект Plotly с графиком
     """
-    # Создаем копию DataFrame для безопасности
-    df_copy = df.copy()
+    # Суммируем продажи по дням (дни уже упорядочены по возрастанию)
+    days, sums = daily_sums(df['Дата'], df['Сумма'])
+    grouped_data = pd.DataFrame({
+        'plot_date': days.astype(object),
+        'plot_amount': to_display_units(sums, get_amount_scale(df))
+    })
+    
+    return _build_sales_over_time_figure(grouped_data, lang)
+
+
+def create_daily_sales_plot(daily_sales: pd.Series, lang: str = 'русский') -> object:
+    """
+    Создает график продаж по дням из уже агрегированных данных.
     
-    # Преобразуем дату к формату date
-    df_copy['date_only'] = df_copy['Дата'].dt.date
+    Используется, когда исходные строки не загружены в память целиком
+    (например, при потоковой загрузке CSV).
     
-    # Группируем по дате и суммируем продажи
-    grouped_data = df_copy.groupby('date_only')['Сумма'].sum().reset_index()
-    grouped_data = grouped_data.rename(columns={'date_only': 'plot_date', 'Сумма': 'plot_amount'})
+    Args:
+        daily_sales: Series с продажами по дням (индекс - даты)
+        lang: Язык для отображения (по умолчанию 'русский')
+        
+    Returns:
+        Объект Plotly с графиком
+    """
+    grouped_data = pd.DataFrame({
+        'plot_date': list(daily_sales.index),
+        'plot_amount': daily_sales.to_numpy()
+    })
     grouped_data = grouped_data.sort_values('plot_date').reset_index(drop=True)
     
-    # ВАЖНО: Проверяем, что данные содержат правильные значения
-    print(f"DEBUG create_sales_over_time_plot: кол-во строк={len(grouped_data)}, пример значений plot_amount={grouped_data['plot_amount'].head().tolist()}")
-    
+    return _build_sales_over_time_figure(grouped_data, lang)
+
+
+def _build_sales_over_time_figure(grouped_data: pd.DataFrame, lang: str) -> object:
+    """
+    Строит линейный график продаж по дням по колонкам plot_date и plot_amount.
+    """
     # Определяем заголовки в зависимости от языка
     titles = {
         'русский': {'title': 'Продажи по дням', 'x_axis': 'Дата', 'y_axis': 'Сумма продаж'},
@@ -48,8 +74,6 @@ def create_sales_over_time_plot(df: pd.DataFrame, lang: str = 'русский')
     x_values = grouped_data['plot_date'].tolist()
     y_values = grouped_data['plot_amount'].tolist()
     
-    print(f"DEBUG create_sales_over_time_plot: x_values[:3]={x_values[:3]}, y_values[:3]={y_values[:3]}")
-    
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         x=x_values,
@@ -80,7 +104,8 @@ def create_city_sales_plot(df: pd.DataFrame, lang: str = 'русский') -> ob
         Объект Plotly с графиком
     """
     # Агрегирование данных по городам
-    city_sales = df.groupby('Город')['Сумма'].sum().reset_index()
+    cities, sums = group_sums(df['Город'], df['Сумма'])
+    city_sales = pd.DataFrame({'Город': cities, 'Сумма': to_display_units(sums, get_amount_scale(df))})
     city_sales = city_sales.sort_values('Сумма', ascending=False)
     
     # Переводы для графика
@@ -130,9 +155,6 @@ def create_day_of_week_plot(df: pd.DataFrame, lang: str = 'русский') -> o
     Returns:
         Объект Plotly с графиком
     """
-    # Создаем копию DataFrame для безопасности
-    df_copy = df.copy()
-    
     # Определяем дни недели
     day_mapping = {
         'русский': {
@@ -166,35 +188,12 @@ def create_day_of_week_plot(df: pd.DataFrame, lang: str = 'русский') -> o
     
     selected_mapping = day_mapping.get(lang, day_mapping['русский'])
     
-    # Добавляем колонку с днями недели
-    df_copy['day_of_week_eng'] = df_copy['Дата'].dt.day_name()
-    df_copy['day_of_week_local'] = df_copy['day_of_week_eng'].map(selected_mapping)
-    
-    # Создаем полный список дней недели в правильном порядке
-    ordered_days = [
-        selected_mapping['Monday'],
-        selected_mapping['Tuesday'],
-        selected_mapping['Wednesday'],
-        selected_mapping['Thursday'],
-        selected_mapping['Friday'],
-        selected_mapping['Saturday'],
-        selected_mapping['Sunday']
-    ]
-    
-    # Группируем по дням недели и суммируем продажи
-    # Используем агрегацию с явным указанием операции
-    grouped_by_day = df_copy.groupby('day_of_week_local', sort=False)['Сумма'].sum()
-    
-    # Создаем итоговый DataFrame с правильным порядком дней недели
-    result_data = []
-    for day in ordered_days:
-        amount = grouped_by_day.get(day, 0)  # Если день отсутствует, используем 0
-        result_data.append({'plot_day': day, 'plot_amount': amount})
-    
-    dow_sales = pd.DataFrame(result_data)
-    
-    # ВАЖНО: Проверяем, что данные содержат правильные значения
-    print(f"DEBUG create_day_of_week_plot: кол-во строк={len(dow_sales)}, значения plot_amount={dow_sales['plot_amount'].tolist()}")
+    # Суммируем продажи по дням недели (с понедельника по воскресенье;
+    # дни без продаж дают 0)
+    dow_sales = pd.DataFrame({
+        'plot_day': [selected_mapping[day] for day in WEEKDAYS],
+        'plot_amount': to_display_units(weekday_sums(df['Дата'], df['Сумма']), get_amount_scale(df))
+    })
     
     # Переводы для графика
     titles = {
@@ -214,8 +213,6 @@ def create_day_of_week_plot(df: pd.DataFrame, lang: str = 'русский') -> o
     x_values = dow_sales['plot_day'].tolist()
     y_values = dow_sales['plot_amount'].tolist()
     
-    print(f"DEBUG create_day_of_week_plot: x_values={x_values}, y_values={y_values}")
-    
     fig = go.Figure()
     fig.add_trace(go.Bar(
         x=x_values,
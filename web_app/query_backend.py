@@ -0,0 +1,520 @@
+import json
+import os
+import sqlite3
+import sys
+from contextlib import closing
+
+import pandas as pd
+import streamlit as st
+
+from aggregation import WEEKDAYS, weekday_sums
+from analysis import (AMOUNT_SCALE_ATTR, DATASET_FINGERPRINT_ATTR, MINOR_UNITS_SCALE, get_amount_scale,
+                      to_display_units, to_minor_units)
+from data_quality import QualityProfile, get_quality_profile
+from data_loader import (AMOUNT_DTYPES, DEFAULT_AMOUNT_DTYPE, SHARED_DATASET_MAX_ENTRIES, SOURCE_COLUMN,
+                         dataset_fingerprint, list_data_files, load_sources)
+from partitioned_store import directory_source_fingerprint
+from row_index import get_row_index
+from sales_cube import COUNT_COLUMN, SalesCube, cube_cache, get_sales_cube, to_day
+
+
+# База данных SQLite в каталоге данных, которую приложение использует вместо
+# загрузки данных в память (создается командой 'python web_app/query_backend.py')
+SQLITE_DATABASE_NAME = "sales.sqlite"
+# Версия формата базы: входит в отпечаток источника, поэтому при ее
+# изменении база пересоздается
+SQLITE_FORMAT_VERSION = 1
+# Колонки таблицы продаж (в порядке хранения); 'День' - дата без времени для группировки
+SQL_COLUMNS = ["Дата", "Город", "Имя", "Фамилия", "Сумма", "Валюта", SOURCE_COLUMN]
+SQL_DAY_COLUMN = "День"
+# Максимальное число строк таблицы данных, читаемых из базы за один запрос
+SQL_TABLE_MAX_ROWS = 100_000
+# Ключ df.attrs с лимитом строк, если строк в запросе оказалось больше
+ROW_LIMIT_ATTR = "row_limit"
+
+
+def _quote(name: str) -> str:
+    """Экранирует название колонки для SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+class PandasBackend:
+    """
+    Выполнение запросов к набору данных в памяти (DataFrame).
+
+    Агрегаты считаются по кубу продаж (см. SalesCube), строки выбираются
+    индексом строк (см. SalesRowIndex). Интерфейс совпадает с SQLiteBackend.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Args:
+            df: DataFrame с данными о продажах
+        """
+        self.df = df
+        self.cube = get_sales_cube(df)
+        self.row_index = get_row_index(df)
+
+    @property
+    def min_date(self):
+        """Первая дата в данных (datetime.date) или None."""
+        return self.row_index.min_date
+
+    @property
+    def max_date(self):
+        """Последняя дата в данных (datetime.date) или None."""
+        return self.row_index.max_date
+
+    @property
+    def quality_profile(self) -> dict:
+        """Профиль качества данных (см. data_quality.QualityProfile)."""
+        return get_quality_profile(self.df)
+
+    def kpi_metrics(self, start_date=None, end_date=None, city: str = None) -> tuple:
+        """KPI за диапазон дат и город (см. calculate_kpi_metrics)."""
+        return self.cube.range_kpi_metrics(start_date, end_date, city)
+
+    def daily_sales(self, start_date=None, end_date=None, city: str = None) -> pd.Series:
+        """Продажи по дням (см. calculate_daily_sales)."""
+        return self.cube.filter(start_date, end_date, city).daily_sales()
+
+    def city_sales(self, start_date=None, end_date=None) -> pd.Series:
+        """Продажи по городам, отсортированные по убыванию."""
+        return self.cube.filter(start_date, end_date).city_sales()
+
+    def weekday_sales(self, start_date=None, end_date=None, city: str = None) -> pd.Series:
+        """Продажи по дням недели (индекс - WEEKDAYS)."""
+        data = self.cube.filter(start_date, end_date, city).data
+        sums = weekday_sums(data["Дата"], data["Сумма"])
+        return pd.Series(to_display_units(sums, get_amount_scale(data)), index=WEEKDAYS, name="Сумма")
+
+    def schema(self, columns: list = None) -> pd.DataFrame:
+        """Набор данных (или его проекция) для передачи в filter."""
+        if columns is None:
+            return self.df
+        return self.df[[col for col in self.df.columns if col in set(columns) | {"Дата"}]]
+
+    def filter(self, df: pd.DataFrame, start_date=None, end_date=None, city: str = None) -> pd.DataFrame:
+        """Строки за диапазон дат и для города (см. SalesRowIndex.filter)."""
+        return self.row_index.filter(df, start_date, end_date, city)
+
+
+class SQLiteBackend:
+    """
+    Выполнение запросов к набору данных в локальной базе SQLite.
+
+    Строки хранятся на диске, в памяти находятся только результаты
+    запросов, поэтому размер набора данных ограничен диском, а не памятью.
+    Агрегация выполняется в SQL (GROUP BY по дню, городу и валюте) с
+    использованием индексов по дате и по городу и дате; строки таблицы
+    данных выбираются по тем же индексам.
+
+    Интерфейс совпадает с PandasBackend, а методы cube, schema и filter -
+    с кубом и индексом строк, поэтому приложение работает с базой так же,
+    как с набором данных в памяти.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Путь к файлу базы данных (см. SQLiteBackend.create)
+        """
+        self.path = path
+        with closing(self._connect()) as conn:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+            self.columns = [name for _, name, *_ in conn.execute("PRAGMA table_info(sales)")
+                            if name != SQL_DAY_COLUMN]
+        self.amount_scale = int(meta.get("amount_scale", 1))
+        # Отпечаток файлов, из которых создана база (см. sync_sqlite_backend)
+        self.source_fingerprint = meta.get("source_fingerprint")
+        self.quality_profile = json.loads(meta["quality_profile"]) if "quality_profile" in meta else None
+        stat = os.stat(path)
+        self.fingerprint = dataset_fingerprint("sqlite", os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        self._cube = None
+
+    @classmethod
+    def create(cls, path: str, chunks, amount_dtype: str = DEFAULT_AMOUNT_DTYPE,
+               source_fingerprint: str = None) -> "SQLiteBackend":
+        """
+        Создает базу данных из нормализованных чанков (см. iter_source_chunks).
+
+        База сначала записывается во временный файл, затем заменяет прежнюю.
+        Индексы строятся после загрузки всех строк. Профиль качества данных
+        накапливается в том же проходе по чанкам и сохраняется в таблице meta.
+
+        С amount_dtype='cents' суммы чанков переводятся в целые копейки и
+        хранятся как INTEGER (масштаб записывается в meta), поэтому итоги
+        SQL совпадают с итогами в памяти точно.
+
+        Args:
+            path: Путь к файлу базы данных
+            chunks: Итератор DataFrame с нормализованными колонками
+            amount_dtype: Вариант хранения 'Сумма' (см. data_loader.AMOUNT_DTYPES;
+                          'float32' хранится как REAL)
+            source_fingerprint: Отпечаток источника, сохраняемый в meta
+                                (см. directory_source_fingerprint)
+
+        Returns:
+            SQLiteBackend или None, если чанков нет
+
+        Raises:
+            ValueError: Если вариант хранения сумм неизвестен
+        """
+        if amount_dtype not in AMOUNT_DTYPES:
+            raise ValueError(f"Неизвестный тип хранения сумм: {amount_dtype}. Допустимые значения: {AMOUNT_DTYPES}")
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        columns = None
+        quality = QualityProfile()
+        with closing(sqlite3.connect(tmp_path)) as conn:
+            for chunk in chunks:
+                quality.add(chunk)
+                if amount_dtype == "cents" and "Сумма" in chunk.columns and get_amount_scale(chunk) == 1:
+                    chunk = chunk.assign(**{"Сумма": to_minor_units(chunk["Сумма"])})
+                    chunk.attrs[AMOUNT_SCALE_ATTR] = MINOR_UNITS_SCALE
+                if columns is None:
+                    columns = [col for col in SQL_COLUMNS if col in chunk.columns]
+                    amount_scale = get_amount_scale(chunk)
+                    amount_type = "INTEGER" if amount_scale != 1 else "REAL"
+                    definitions = [f"{_quote(col)} {amount_type if col == 'Сумма' else 'TEXT'}" for col in columns]
+                    conn.execute(f"CREATE TABLE sales ({', '.join(definitions)}, {_quote(SQL_DAY_COLUMN)} TEXT)")
+                    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+                    conn.execute("INSERT INTO meta VALUES ('amount_scale', ?)", (str(amount_scale),))
+                conn.executemany(
+                    f"INSERT INTO sales VALUES ({', '.join('?' * (len(columns) + 1))})",
+                    _sql_rows(chunk.reindex(columns=columns))
+                )
+            if columns is None:
+                conn.close()
+                os.remove(tmp_path)
+                return None
+            conn.execute("INSERT INTO meta VALUES ('quality_profile', ?)",
+                         (json.dumps(quality.to_dict(), ensure_ascii=False),))
+            if source_fingerprint is not None:
+                conn.execute("INSERT INTO meta VALUES ('source_fingerprint', ?)", (source_fingerprint,))
+            conn.execute(f"CREATE INDEX sales_date ON sales ({_quote('Дата')})")
+            conn.execute(f"CREATE INDEX sales_day_city ON sales ({_quote(SQL_DAY_COLUMN)}, {_quote('Город')})"
+                         if "Город" in columns else
+                         f"CREATE INDEX sales_day ON sales ({_quote(SQL_DAY_COLUMN)})")
+            if "Город" in columns:
+                conn.execute(f"CREATE INDEX sales_city_date ON sales ({_quote('Город')}, {_quote('Дата')})")
+            conn.commit()
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Открывает соединение только для чтения.
+
+        Соединение открывается на каждый запрос, поэтому экземпляр можно
+        использовать из разных потоков (сессий Streamlit).
+        """
+        return sqlite3.connect(f"file:{os.path.abspath(self.path)}?mode=ro", uri=True)
+
+    def _query(self, sql: str, params: list = ()) -> list:
+        with closing(self._connect()) as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def _where(self, start_date=None, end_date=None, city: str = None, clean: bool = True) -> tuple:
+        """
+        Формирует условие WHERE по диапазону дат (включительно) и городу.
+
+        Args:
+            clean: Исключить строки без даты или суммы (см. clean_sales_data)
+
+        Returns:
+            tuple: (строка условия, параметры)
+        """
+        conditions, params = [], []
+        if clean:
+            conditions.append(f"{_quote('Дата')} IS NOT NULL AND {_quote('Сумма')} IS NOT NULL")
+        if start_date is not None:
+            conditions.append(f"{_quote(SQL_DAY_COLUMN)} >= ?")
+            params.append(str(to_day(start_date)))
+        if end_date is not None:
+            conditions.append(f"{_quote(SQL_DAY_COLUMN)} <= ?")
+            params.append(str(to_day(end_date)))
+        if city is not None:
+            conditions.append(f"{_quote('Город')} = ?" if "Город" in self.columns else "0")
+            params += [city] if "Город" in self.columns else []
+        return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+    @property
+    def min_date(self):
+        """Первая дата в данных (datetime.date) или None."""
+        value = self._query(f"SELECT MIN({_quote(SQL_DAY_COLUMN)}) FROM sales")[0][0]
+        return None if value is None else pd.Timestamp(value).date()
+
+    @property
+    def max_date(self):
+        """Последняя дата в данных (datetime.date) или None."""
+        value = self._query(f"SELECT MAX({_quote(SQL_DAY_COLUMN)}) FROM sales")[0][0]
+        return None if value is None else pd.Timestamp(value).date()
+
+    def kpi_metrics(self, start_date=None, end_date=None, city: str = None) -> tuple:
+        """
+        Вычисляет KPI за диапазон дат и город одним запросом (см. calculate_kpi_metrics).
+
+        Returns:
+            tuple: (общая сумма продаж, средние ежедневные продажи,
+                    максимальные ежедневные продажи)
+        """
+        where, params = self._where(start_date, end_date, city)
+        total, average, maximum = self._query(
+            f"SELECT SUM(daily), AVG(daily), MAX(daily) FROM "
+            f"(SELECT SUM({_quote('Сумма')}) AS daily FROM sales{where} GROUP BY {_quote(SQL_DAY_COLUMN)})",
+            params
+        )[0]
+        if total is None:
+            return (0, 0, 0)
+        return tuple(to_display_units(value, self.amount_scale) for value in (total, average, maximum))
+
+    def daily_sales(self, start_date=None, end_date=None, city: str = None) -> pd.Series:
+        """
+        Продажи по дням (см. calculate_daily_sales).
+        """
+        where, params = self._where(start_date, end_date, city)
+        rows = self._query(
+            f"SELECT {_quote(SQL_DAY_COLUMN)}, SUM({_quote('Сумма')}) FROM sales{where} "
+            f"GROUP BY {_quote(SQL_DAY_COLUMN)} ORDER BY {_quote(SQL_DAY_COLUMN)}",
+            params
+        )
+        days = pd.Index([pd.Timestamp(day).date() for day, _ in rows], name="Дата", dtype=object)
+        amounts = pd.Series([amount for _, amount in rows], index=days, name="Сумма", dtype="float64")
+        return to_display_units(amounts, self.amount_scale)
+
+    def city_sales(self, start_date=None, end_date=None) -> pd.Series:
+        """
+        Продажи по городам, отсортированные по убыванию.
+        """
+        if "Город" not in self.columns:
+            return pd.Series(dtype="float64", name="Сумма")
+        where, params = self._where(start_date, end_date)
+        rows = self._query(
+            f"SELECT {_quote('Город')}, SUM({_quote('Сумма')}) AS total FROM sales{where} "
+            f"AND {_quote('Город')} IS NOT NULL GROUP BY {_quote('Город')} ORDER BY total DESC",
+            params
+        )
+        cities = pd.Index([city for city, _ in rows], name="Город")
+        amounts = pd.Series([amount for _, amount in rows], index=cities, name="Сумма", dtype="float64")
+        return to_display_units(amounts, self.amount_scale)
+
+    def weekday_sales(self, start_date=None, end_date=None, city: str = None) -> pd.Series:
+        """
+        Продажи по дням недели (индекс - WEEKDAYS).
+        """
+        where, params = self._where(start_date, end_date, city)
+        rows = self._query(
+            f"SELECT CAST(strftime('%w', {_quote(SQL_DAY_COLUMN)}) AS INTEGER), SUM({_quote('Сумма')}) "
+            f"FROM sales{where} GROUP BY 1",
+            params
+        )
+        # В SQLite 0 - воскресенье, в WEEKDAYS 0 - понедельник
+        amounts = dict.fromkeys(WEEKDAYS, 0)
+        for weekday, amount in rows:
+            amounts[WEEKDAYS[(weekday - 1) % 7]] = amount
+        return to_display_units(pd.Series(amounts, name="Сумма", dtype="float64"), self.amount_scale)
+
+    @property
+    def cube(self) -> SalesCube:
+        """
+        Куб продаж, агрегированный запросом GROUP BY (кэшируется по отпечатку базы).
+        """
+        if self._cube is None:
+            cube = cube_cache.get(self.fingerprint)
+            if cube is None:
+                cube = SalesCube(self._cube_frame())
+                cube_cache.put(self.fingerprint, cube)
+            self._cube = cube
+        return self._cube
+
+    def _cube_frame(self) -> pd.DataFrame:
+        """
+        Агрегирует продажи по дням, городам и валютам (см. build_cube_frame).
+        """
+        dimensions = [col for col in ["Город", "Валюта"] if col in self.columns]
+        keys = ", ".join(_quote(col) for col in [SQL_DAY_COLUMN] + dimensions)
+        where, params = self._where()
+        with closing(self._connect()) as conn:
+            cube = pd.read_sql_query(
+                f"SELECT {keys}, SUM({_quote('Сумма')}) AS {_quote('Сумма')}, COUNT(*) AS {_quote(COUNT_COLUMN)} "
+                f"FROM sales{where} GROUP BY {keys} ORDER BY {keys}",
+                conn, params=params
+            )
+        cube = cube.rename(columns={SQL_DAY_COLUMN: "Дата"})
+        cube["Дата"] = pd.to_datetime(cube["Дата"], format="%Y-%m-%d")
+        if self.amount_scale != 1:
+            cube["Сумма"] = cube["Сумма"].astype("int64")
+            cube.attrs[AMOUNT_SCALE_ATTR] = self.amount_scale
+        return cube
+
+    def schema(self, columns: list = None) -> pd.DataFrame:
+        """
+        Пустой DataFrame с колонками базы (или их проекцией) для передачи в filter.
+        """
+        wanted = None if columns is None else set(columns) | {"Дата"}
+        df = pd.DataFrame(columns=[col for col in self.columns if wanted is None or col in wanted])
+        df.attrs[DATASET_FINGERPRINT_ATTR] = self.fingerprint
+        if self.amount_scale != 1:
+            df.attrs[AMOUNT_SCALE_ATTR] = self.amount_scale
+        return df
+
+    def filter(self, df: pd.DataFrame, start_date=None, end_date=None, city: str = None,
+               limit: int = SQL_TABLE_MAX_ROWS) -> pd.DataFrame:
+        """
+        Читает строки за диапазон дат и для города с колонками df (см. SalesRowIndex.filter).
+
+        Строки упорядочены по дате (и по порядку вставки), поэтому разные
+        проекции одного запроса совпадают построчно. Если строк больше
+        limit, возвращаются первые limit строк, а лимит записывается
+        в attrs[ROW_LIMIT_ATTR].
+
+        Args:
+            df: DataFrame, колонки которого нужно прочитать (например, schema())
+            start_date: Начальная дата или None
+            end_date: Конечная дата или None
+            city: Город или None для всех городов
+            limit: Максимальное число строк или None
+
+        Returns:
+            pd.DataFrame: Строки с индексом datetime64
+        """
+        columns = [col for col in df.columns if col in self.columns]
+        where, params = self._where(start_date, end_date, city, clean=False)
+        if start_date is None and end_date is None:
+            where += (" AND " if where else " WHERE ") + f"{_quote('Дата')} IS NOT NULL"
+        sql = (f"SELECT {', '.join(_quote(col) for col in columns)} FROM sales{where} "
+               f"ORDER BY {_quote('Дата')}, rowid")
+        if limit is not None:
+            # Лишняя строка показывает, что строк больше лимита
+            sql += f" LIMIT {int(limit) + 1}"
+        with closing(self._connect()) as conn:
+            rows = pd.read_sql_query(sql, conn, params=params)
+        truncated = limit is not None and len(rows) > limit
+        if truncated:
+            rows = rows.iloc[:limit]
+        rows["Дата"] = pd.to_datetime(rows["Дата"], format="%Y-%m-%d %H:%M:%S")
+        if "Сумма" in rows.columns and self.amount_scale != 1:
+            rows["Сумма"] = rows["Сумма"].astype("Int64")
+        rows.index = pd.DatetimeIndex(rows["Дата"].to_numpy())
+        if self.amount_scale != 1:
+            rows.attrs[AMOUNT_SCALE_ATTR] = self.amount_scale
+        if truncated:
+            rows.attrs[ROW_LIMIT_ATTR] = int(limit)
+        return rows
+
+
+def _sql_rows(chunk: pd.DataFrame):
+    """
+    Переводит чанк в кортежи для INSERT: дата - текст 'ГГГГ-ММ-ДД ЧЧ:ММ:СС',
+    пропуски - NULL, последним значением идет день ('ГГГГ-ММ-ДД').
+    """
+    values = {}
+    for col in chunk.columns:
+        series = chunk[col]
+        if col == "Дата":
+            series = series.dt.strftime("%Y-%m-%d %H:%M:%S")
+        values[col] = series.astype(object).where(series.notna(), None).tolist()
+    days = [None if value is None else value[:10] for value in values["Дата"]]
+    return zip(*values.values(), days)
+
+
+def iter_source_chunks(file_paths: list, amount_dtype: str = DEFAULT_AMOUNT_DTYPE):
+    """
+    Читает файлы данных по одному так же, как загрузка каталога в память.
+
+    Каждый файл загружается load_sources: все листы с данными, тот же разбор
+    колонок и дат и та же колонка SOURCE_COLUMN ('файл' или 'файл: лист'),
+    поэтому результаты базы совпадают с результатами в памяти. В памяти
+    одновременно находится только один файл.
+
+    Args:
+        file_paths: Пути к файлам данных
+        amount_dtype: Вариант хранения 'Сумма' в компактном представлении
+
+    Yields:
+        DataFrame с нормализованными колонками одного файла
+    """
+    for path in file_paths:
+        df = load_sources([path], amount_dtype=amount_dtype, label_sources=True)
+        if df is not None:
+            yield df
+
+
+def sync_sqlite_backend(directory: str, path: str = None,
+                        amount_dtype: str = DEFAULT_AMOUNT_DTYPE) -> SQLiteBackend:
+    """
+    Открывает базу каталога данных, пересоздавая ее при изменении файлов.
+
+    В базе хранится отпечаток файлов каталога, из которых она создана;
+    если он не совпадает с текущим, база создается заново (как хранилище
+    с разделами в sync_partitioned_store).
+
+    Args:
+        directory: Каталог с файлами CSV и Excel
+        path: Путь к базе (по умолчанию <directory>/SQLITE_DATABASE_NAME)
+        amount_dtype: Вариант хранения 'Сумма' (как при загрузке в память)
+
+    Returns:
+        SQLiteBackend или None, если каталог не удалось загрузить
+    """
+    path = path or os.path.join(directory, SQLITE_DATABASE_NAME)
+    source_fingerprint = directory_source_fingerprint(directory, amount_dtype=amount_dtype,
+                                                      format_version=SQLITE_FORMAT_VERSION)
+    if os.path.isfile(path):
+        backend = SQLiteBackend(path)
+        if backend.source_fingerprint == source_fingerprint:
+            return backend
+    return SQLiteBackend.create(path, iter_source_chunks(list_data_files(directory), amount_dtype),
+                                amount_dtype, source_fingerprint)
+
+
+@st.cache_resource(max_entries=SHARED_DATASET_MAX_ENTRIES)
+def _shared_sqlite_backend(directory: str, source_fingerprint: str,
+                           amount_dtype: str = DEFAULT_AMOUNT_DTYPE) -> SQLiteBackend:
+    """
+    Возвращает базу каталога, общую для всех сессий процесса.
+    """
+    return sync_sqlite_backend(directory, amount_dtype=amount_dtype)
+
+
+def load_shared_sqlite_backend(directory: str = "web_app/data",
+                               amount_dtype: str = DEFAULT_AMOUNT_DTYPE) -> SQLiteBackend:
+    """
+    Возвращает SQLite-бэкенд, если база создана в каталоге данных.
+
+    База создается командой 'python web_app/query_backend.py web_app/data'
+    и затем пересоздается автоматически при изменении файлов каталога.
+
+    Args:
+        directory: Каталог с файлами данных
+        amount_dtype: Вариант хранения 'Сумма' (как при загрузке в память)
+
+    Returns:
+        SQLiteBackend или None, если базы нет
+    """
+    if not os.path.isfile(os.path.join(directory, SQLITE_DATABASE_NAME)):
+        return None
+    try:
+        source_fingerprint = directory_source_fingerprint(directory, amount_dtype=amount_dtype,
+                                                          format_version=SQLITE_FORMAT_VERSION)
+        return _shared_sqlite_backend(directory, source_fingerprint, amount_dtype)
+    except (sqlite3.Error, OSError, ValueError) as e:
+        st.error(f"Ошибка при загрузке данных: {str(e)}")
+        return None
+
+
+if __name__ == "__main__":
+    # python web_app/query_backend.py <файл или каталог> [путь к базе]
+    source = sys.argv[1] if len(sys.argv) > 1 else "web_app/data"
+    if os.path.isdir(source):
+        database = sys.argv[2] if len(sys.argv) > 2 else os.path.join(source, SQLITE_DATABASE_NAME)
+        backend = sync_sqlite_backend(source, database)
+    else:
+        database = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.path.dirname(source), SQLITE_DATABASE_NAME)
+        backend = SQLiteBackend.create(database, iter_source_chunks([source]))
+    if backend is None:
+        sys.exit(f"Не удалось загрузить данные из {source}")
+    rows = backend._query("SELECT COUNT(*) FROM sales")[0][0]
+    print(f"{database}: {rows} строк, {backend.min_date} - {backend.max_date}")
@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+
+from analysis import DATASET_FINGERPRINT_ATTR
+from cache_utils import LRUCache
+from sales_cube import to_day
+
+
+# Кэш индексов строк по отпечатку набора данных
+row_index_cache = LRUCache(max_entries=8)
+
+
+class SalesRowIndex:
+    """
+    Индекс строк набора данных для быстрой фильтрации по дате.
+
+    Загрузчики сортируют данные по 'Дата' (строки без даты - в конце),
+    поэтому строки за диапазон дат образуют непрерывный отрезок, границы
+    которого находятся бинарным поиском за O(log n). Результат фильтрации -
+    срез исходного DataFrame без копирования данных.
+
+    Для фильтра по городу хранятся списки позиций строк каждого города
+    (в порядке сортировки по дате). Запрос город + даты - это пересечение
+    отрезка дат со списком города двумя бинарными поисками.
+    """
+
+    def __init__(self, dates: np.ndarray, order: np.ndarray = None, cities=None):
+        """
+        Args:
+            dates: Отсортированные значения 'Дата' (datetime64, NaT в конце)
+            order: Позиции строк в порядке сортировки, если исходный
+                   DataFrame не отсортирован по дате (иначе None)
+            cities: Значения 'Город' в порядке сортировки или None
+        """
+        self.dates = dates
+        self.order = order
+        self.n_dated = len(dates) - int(np.isnat(dates).sum())
+        self._cities = cities
+        self._city_positions = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SalesRowIndex":
+        """
+        Строит индекс по DataFrame с колонкой 'Дата'.
+
+        Если DataFrame не отсортирован по дате, индекс хранит порядок
+        сортировки, и фильтрация возвращает копию выбранных строк.
+
+        Args:
+            df: DataFrame с данными о продажах
+
+        Returns:
+            SalesRowIndex
+        """
+        dates = df["Дата"].to_numpy()
+        cities = df["Город"] if "Город" in df.columns else None
+        if _is_sorted_by_date(dates):
+            return cls(dates, cities=cities)
+
+        order = np.argsort(dates, kind="stable")
+        return cls(dates[order], order, None if cities is None else cities.iloc[order])
+
+    @property
+    def min_date(self):
+        """Первая дата в данных (datetime.date) или None."""
+        return pd.Timestamp(self.dates[0]).date() if self.n_dated else None
+
+    @property
+    def max_date(self):
+        """Последняя дата в данных (datetime.date) или None."""
+        return pd.Timestamp(self.dates[self.n_dated - 1]).date() if self.n_dated else None
+
+    def date_bounds(self, start_date=None, end_date=None) -> tuple:
+        """
+        Находит позиции строк за диапазон дат (включительно) бинарным поиском.
+
+        Args:
+            start_date: Начальная дата или None
+            end_date: Конечная дата или None
+
+        Returns:
+            tuple: Полуинтервал позиций [left, right) в порядке сортировки
+        """
+        left = 0
+        right = self.n_dated
+        if start_date is not None:
+            left = int(np.searchsorted(self.dates[:self.n_dated], to_day(start_date), side="left"))
+        if end_date is not None:
+            next_day = to_day(end_date) + np.timedelta64(1, "D")
+            right = int(np.searchsorted(self.dates[:self.n_dated], next_day, side="left"))
+        return left, max(left, right)
+
+    @property
+    def city_positions(self) -> dict:
+        """
+        Списки позиций строк (в порядке сортировки) для каждого города.
+
+        Строятся при первом обращении одной стабильной сортировкой кодов
+        городов (для category используются готовые коды).
+        """
+        if self._city_positions is None:
+            self._city_positions = _build_city_positions(self._cities)
+            self._cities = None
+        return self._city_positions
+
+    def positions(self, start_date=None, end_date=None, city: str = None):
+        """
+        Возвращает позиции строк за диапазон дат и, при необходимости, для города.
+
+        Args:
+            start_date: Начальная дата или None
+            end_date: Конечная дата или None
+            city: Город или None для всех городов
+
+        Returns:
+            slice для отсортированного DataFrame без фильтра по городу,
+            иначе массив позиций строк
+        """
+        left, right = self.date_bounds(start_date, end_date)
+        if city is None:
+            if self.order is None:
+                return slice(left, right)
+            return self.order[left:right]
+
+        city_rows = self.city_positions.get(city, np.empty(0, dtype=np.int64))
+        city_rows = city_rows[np.searchsorted(city_rows, left):np.searchsorted(city_rows, right)]
+        return city_rows if self.order is None else self.order[city_rows]
+
+    def filter(self, df: pd.DataFrame, start_date=None, end_date=None, city: str = None) -> pd.DataFrame:
+        """
+        Возвращает строки DataFrame за диапазон дат и для города.
+
+        Args:
+            df: DataFrame, по которому построен индекс
+            start_date: Начальная дата или None
+            end_date: Конечная дата или None
+            city: Город или None для всех городов
+
+        Returns:
+            pd.DataFrame: Срез (без копирования данных) для отсортированного
+                          DataFrame без фильтра по городу, иначе выбранные строки
+        """
+        return df.iloc[self.positions(start_date, end_date, city)]
+
+
+def _build_city_positions(cities: pd.Series) -> dict:
+    """
+    Группирует позиции строк по городам.
+
+    Args:
+        cities: Значения 'Город' в порядке сортировки по дате или None
+
+    Returns:
+        dict: Город -> возрастающий массив позиций строк
+    """
+    if cities is None:
+        return {}
+
+    if isinstance(cities.dtype, pd.CategoricalDtype):
+        codes, uniques = cities.cat.codes.to_numpy(), cities.cat.categories
+    else:
+        codes, uniques = pd.factorize(cities)
+
+    # Стабильная сортировка сохраняет возрастание позиций внутри города
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return {
+        city: order[bounds[code]:bounds[code + 1]]
+        for code, city in enumerate(uniques)
+        if bounds[code + 1] > bounds[code]
+    }
+
+
+def _is_sorted_by_date(dates: np.ndarray) -> bool:
+    """
+    Проверяет, что даты не убывают, а NaT находятся только в конце.
+    """
+    nat = np.isnat(dates)
+    n_dated = len(dates) - int(nat.sum())
+    if nat[:n_dated].any():
+        return False
+    return bool((dates[1:n_dated] >= dates[:n_dated - 1]).all()) if n_dated > 1 else True
+
+
+def sort_by_date(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Сортирует DataFrame по 'Дата' и устанавливает индекс datetime64.
+
+    Строки без даты помещаются в конец. Колонка 'Дата' сохраняется,
+    индекс (DatetimeIndex) дублирует ее значения.
+
+    Args:
+        df: DataFrame с колонкой 'Дата' в формате datetime
+
+    Returns:
+        pd.DataFrame: Отсортированный DataFrame
+    """
+    df = df.sort_values("Дата", kind="stable", na_position="last")
+    df.index = pd.DatetimeIndex(df["Дата"].to_numpy())
+    return df
+
+
+def get_row_index(df: pd.DataFrame) -> SalesRowIndex:
+    """
+    Возвращает индекс строк для набора данных, используя кэш по отпечатку.
+
+    Args:
+        df: DataFrame с данными о продажах
+
+    Returns:
+        SalesRowIndex
+    """
+    fingerprint = df.attrs.get(DATASET_FINGERPRINT_ATTR)
+    if fingerprint is None:
+        return SalesRowIndex.from_frame(df)
+
+    index = row_index_cache.get(fingerprint)
+    if index is None:
+        index = SalesRowIndex.from_frame(df)
+        row_index_cache.put(fingerprint, index)
+    return index
@@ -0,0 +1,498 @@
+import numpy as np
+import pandas as pd
+
+from aggregation import group_sums
+from analysis import (AMOUNT_SCALE_ATTR, DATASET_FINGERPRINT_ATTR, calculate_currency_kpis,
+                      calculate_daily_sales, calculate_group_kpis, calculate_kpi_metrics,
+                      calculate_total_sales, clean_sales_data, convert_currency, get_amount_scale,
+                      to_display_units, validate_data_frame)
+from cache_utils import LRUCache
+
+
+# Измерения куба помимо даты и колонка с количеством транзакций
+CUBE_DIMENSIONS = ["Город", "Валюта"]
+COUNT_COLUMN = "Количество"
+# Атрибут куба в валюте отчета: число транзакций, для которых нет курса
+UNCONVERTED_ATTR = "unconverted_transactions"
+
+# Кэш кубов по отпечатку набора данных
+cube_cache = LRUCache(max_entries=8)
+# Кэш результатов KPI по отпечатку куба и нормализованным фильтрам: перезапуск
+# скрипта с теми же фильтрами (например, после смены языка) не пересчитывает KPI
+kpi_cache = LRUCache(max_entries=256)
+
+
+def build_cube_frame(df: pd.DataFrame, dimensions: list = None) -> pd.DataFrame:
+    """
+    Агрегирует продажи по дням, городам и валютам.
+
+    Результат имеет те же колонки 'Дата' и 'Сумма', что и исходные данные,
+    поэтому функции анализа и построения графиков работают с ним напрямую.
+
+    Args:
+        df: DataFrame с данными о продажах
+        dimensions: Измерения помимо даты (по умолчанию CUBE_DIMENSIONS)
+
+    Returns:
+        pd.DataFrame: Колонки 'Дата' (день), 'Город', 'Валюта', 'Сумма',
+                      'Количество', отсортированные по дате
+    """
+    if dimensions is None:
+        dimensions = CUBE_DIMENSIONS
+    if not validate_data_frame(df):
+        return pd.DataFrame({"Дата": pd.Series(dtype="datetime64[ns]"),
+                             "Сумма": pd.Series(dtype="float64"),
+                             COUNT_COLUMN: pd.Series(dtype="int64")})
+
+    cleaned = clean_sales_data(df)
+    keys = [cleaned["Дата"].dt.normalize()] + [cleaned[col] for col in dimensions if col in cleaned.columns]
+
+    # dropna=False: строки без города или валюты тоже входят в итоги
+    grouped = cleaned.groupby(keys, observed=True, dropna=False, sort=True)["Сумма"]
+    cube = pd.concat([grouped.sum(), grouped.size().rename(COUNT_COLUMN)], axis=1).reset_index()
+
+    cube.attrs = {}
+    if get_amount_scale(df) != 1:
+        cube.attrs[AMOUNT_SCALE_ATTR] = get_amount_scale(df)
+    return cube
+
+
+def to_day(value) -> np.datetime64:
+    """
+    Переводит дату (date, datetime, строку или Timestamp) в numpy-день.
+    """
+    return pd.Timestamp(value).to_datetime64().astype("datetime64[D]")
+
+
+class DailySalesIndex:
+    """
+    Индекс ежедневных продаж для KPI по произвольному диапазону дат.
+
+    Для всех данных и для каждого города хранятся префиксные суммы продаж
+    и числа дней с продажами, а также разреженная таблица (sparse table)
+    для максимума за день. Сумма и среднее за диапазон вычисляются за O(1),
+    максимум - тоже за O(1) по двум перекрывающимся отрезкам таблицы.
+    """
+
+    def __init__(self, first_day, groups: dict, prefix_sums, prefix_days, sparse_max, amount_scale: int = 1):
+        """
+        Args:
+            first_day: Первый день индекса (numpy datetime64[D])
+            groups: Соответствие город -> номер строки (None - все данные)
+            prefix_sums: Префиксные суммы продаж, форма (группы, дни + 1)
+            prefix_days: Префиксные числа дней с продажами, форма (группы, дни + 1)
+            sparse_max: Уровни разреженной таблицы максимумов, форма (группы, дни)
+            amount_scale: Масштаб хранения сумм
+        """
+        self.first_day = first_day
+        self.groups = groups
+        self.prefix_sums = prefix_sums
+        self.prefix_days = prefix_days
+        self.sparse_max = sparse_max
+        self.amount_scale = amount_scale
+        self.n_days = prefix_sums.shape[1] - 1
+
+    @classmethod
+    def from_cube_frame(cls, cube: pd.DataFrame) -> "DailySalesIndex":
+        """
+        Строит индекс по агрегированным данным куба.
+
+        Args:
+            cube: DataFrame, построенный build_cube_frame
+
+        Returns:
+            DailySalesIndex
+        """
+        amount_scale = get_amount_scale(cube)
+        if cube.empty:
+            empty = np.zeros((1, 1))
+            return cls(None, {None: 0}, empty, empty, [], amount_scale)
+
+        days = cube["Дата"].to_numpy().astype("datetime64[D]")
+        first_day = days.min()
+        n_days = int((days.max() - first_day).astype(np.int64)) + 1
+        offsets = (days - first_day).astype(np.int64)
+
+        if "Город" in cube.columns:
+            city_codes, cities = pd.factorize(cube["Город"], sort=True)
+        else:
+            city_codes, cities = np.full(len(cube), -1), []
+        groups = {None: 0}
+        groups.update({city: code + 1 for code, city in enumerate(cities)})
+
+        # Целые суммы (например, копейки) остаются целыми для точных итогов
+        sum_dtype = np.int64 if pd.api.types.is_integer_dtype(cube["Сумма"]) else np.float64
+        amounts = cube["Сумма"].to_numpy(dtype=sum_dtype)
+        daily = np.zeros((len(groups), n_days), dtype=sum_dtype)
+        counts = np.zeros((len(groups), n_days), dtype=np.int64)
+        transactions = cube[COUNT_COLUMN].to_numpy()
+
+        np.add.at(daily[0], offsets, amounts)
+        np.add.at(counts[0], offsets, transactions)
+        has_city = city_codes >= 0
+        np.add.at(daily, (city_codes[has_city] + 1, offsets[has_city]), amounts[has_city])
+        np.add.at(counts, (city_codes[has_city] + 1, offsets[has_city]), transactions[has_city])
+
+        active = counts > 0
+        zeros = np.zeros((len(groups), 1), dtype=sum_dtype)
+        prefix_sums = np.concatenate([zeros, np.cumsum(daily, axis=1)], axis=1)
+        prefix_days = np.concatenate([zeros.astype(np.int64), np.cumsum(active, axis=1)], axis=1)
+
+        # Дни без продаж не должны влиять на максимум
+        level = np.where(active, daily, -np.inf).astype(np.float64)
+        sparse_max = [level]
+        width = 1
+        while width * 2 <= n_days:
+            level = np.maximum(level[:, :-width], level[:, width:])
+            sparse_max.append(level)
+            width *= 2
+
+        return cls(first_day, groups, prefix_sums, prefix_days, sparse_max, amount_scale)
+
+    def _day_bounds(self, start_date, end_date) -> tuple:
+        """
+        Переводит диапазон дат в полуинтервал смещений [left, right).
+        """
+        left = 0 if start_date is None else int((to_day(start_date) - self.first_day).astype(np.int64))
+        right = self.n_days if end_date is None else int((to_day(end_date) - self.first_day).astype(np.int64)) + 1
+        return max(left, 0), min(right, self.n_days)
+
+    def kpi_metrics(self, start_date=None, end_date=None, city: str = None) -> tuple:
+        """
+        Вычисляет KPI за диапазон дат (включительно) для города или всех данных.
+
+        Args:
+            start_date: Начальная дата или None
+            end_date: Конечная дата или None
+            city: Город или None для всех городов
+
+        Returns:
+            tuple: (общая сумма продаж, средние ежедневные продажи,
+                    максимальные ежедневные продажи)
+        """
+        group = self.groups.get(city)
+        if group is None or self.first_day is None:
+            return (0, 0, 0)
+
+        left, right = self._day_bounds(start_date, end_date)
+        if left >= right:
+            return (0, 0, 0)
+
+        n_active = self.prefix_days[group, right] - self.prefix_days[group, left]
+        if n_active == 0:
+            return (0, 0, 0)
+
+        total = self.prefix_sums[group, right] - self.prefix_sums[group, left]
+        level = (right - left).bit_length() - 1
+        table = self.sparse_max[level]
+        maximum = max(table[group, left], table[group, right - (1 << level)])
+
+        return (to_display_units(total, self.amount_scale),
+                to_display_units(total / n_active, self.amount_scale),
+                to_display_units(maximum, self.amount_scale))
+
+
+class SalesCube:
+    """
+    Предварительно агрегированные продажи: день x город x валюта.
+
+    Куб строится один раз для набора данных, после чего KPI, графики и
+    фильтры по дате и городу работают с числом строк порядка
+    (дни x города x валюты), а не с числом транзакций.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        """
+        Args:
+            data: Агрегированный DataFrame (см. build_cube_frame)
+        """
+        self.data = data
+        self._index = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SalesCube":
+        """
+        Строит куб по DataFrame с данными о продажах.
+
+        Args:
+            df: DataFrame с данными о продажах
+
+        Returns:
+            SalesCube
+        """
+        return cls(build_cube_frame(df))
+
+    @property
+    def empty(self) -> bool:
+        return self.data.empty
+
+    def filter(self, start_date=None, end_date=None, city: str = None) -> "SalesCube":
+        """
+        Возвращает куб, ограниченный диапазоном дат (включительно) и городом.
+
+        Args:
+            start_date: Начальная дата или None
+            end_date: Конечная дата или None
+            city: Город или None для всех городов
+
+        Returns:
+            SalesCube с отфильтрованными данными
+        """
+        mask = pd.Series(True, index=self.data.index)
+        if start_date is not None:
+            mask &= self.data["Дата"] >= pd.Timestamp(start_date)
+        if end_date is not None:
+            mask &= self.data["Дата"] <= pd.Timestamp(end_date)
+        if city is not None:
+            if "Город" not in self.data.columns:
+                mask &= False
+            else:
+                mask &= self.data["Город"] == city
+        return SalesCube(self.data.loc[mask])
+
+    @property
+    def index(self) -> DailySalesIndex:
+        """
+        Индекс для KPI по диапазонам дат, строится при первом обращении.
+        """
+        if self._index is None:
+            self._index = DailySalesIndex.from_cube_frame(self.data)
+        return self._index
+
+    def range_kpi_metrics(self, start_date=None, end_date=None, city: str = None) -> tuple:
+        """
+        Вычисляет KPI за диапазон дат и город по индексу, без фильтрации данных.
+
+        Args:
+            start_date: Начальная дата или None
+            end_date: Конечная дата или None
+            city: Город или None для всех городов
+
+        Returns:
+            tuple: (общая сумма продаж, средние ежедневные продажи,
+                    максимальные ежедневные продажи)
+        """
+        return self.index.kpi_metrics(start_date, end_date, city)
+
+    def kpi_metrics(self) -> tuple:
+        """
+        Вычисляет KPI (см. calculate_kpi_metrics) по данным куба.
+
+        Returns:
+            tuple: (общая сумма продаж, средние ежедневные продажи,
+                    максимальные ежедневные продажи)
+        """
+        return calculate_kpi_metrics(self.data)
+
+    def total_sales(self) -> float:
+        return calculate_total_sales(self.data)
+
+    def transaction_count(self) -> int:
+        return int(self.data[COUNT_COLUMN].sum())
+
+    def daily_sales(self) -> pd.Series:
+        return calculate_daily_sales(self.data)
+
+    def city_sales(self) -> pd.Series:
+        """
+        Возвращает продажи по городам, отсортированные по убыванию.
+        """
+        if "Город" not in self.data.columns:
+            return pd.Series(dtype="float64", name="Сумма")
+        cities, sums = group_sums(self.data["Город"], self.data["Сумма"])
+        city_sales = pd.Series(to_display_units(sums, get_amount_scale(self.data)), index=cities, name="Сумма")
+        return city_sales.rename_axis("Город").sort_values(ascending=False)
+
+    def group_kpis(self, by="Город") -> pd.DataFrame:
+        """
+        Возвращает KPI каждой группы (см. calculate_group_kpis) по данным куба.
+        """
+        return calculate_group_kpis(self.data, by)
+
+    def currency_kpis(self) -> pd.DataFrame:
+        """
+        Возвращает KPI по каждой валюте (см. calculate_currency_kpis).
+        """
+        return calculate_currency_kpis(self.data)
+
+    def convert_currency(self, rates: pd.DataFrame, currency: str) -> "SalesCube":
+        """
+        Переводит куб в валюту отчета (см. analysis.convert_currency).
+
+        Курс берется на день ячейки куба, поэтому пересчитываются ячейки
+        (дни x города x валюты), а не транзакции. Ячейки без курса на дату
+        исключаются, число их транзакций записывается в
+        data.attrs[UNCONVERTED_ATTR].
+
+        Args:
+            rates: Таблица курсов (см. fx_rates.read_fx_rates)
+            currency: Валюта отчета
+
+        Returns:
+            SalesCube с суммами в валюте отчета
+        """
+        if "Валюта" not in self.data.columns:
+            return self
+        converted = convert_currency(self.data, rates, currency)
+        missing = converted["Сумма"].isna().to_numpy()
+
+        keys = ["Дата"] + [col for col in CUBE_DIMENSIONS if col in converted.columns]
+        data = (converted[~missing].groupby(keys, observed=True, dropna=False, sort=True)[["Сумма", COUNT_COLUMN]]
+                .sum().reset_index())
+        if pd.api.types.is_integer_dtype(data["Сумма"].dtype):
+            data["Сумма"] = data["Сумма"].astype("int64")
+        data.attrs = {UNCONVERTED_ATTR: int(converted.loc[missing, COUNT_COLUMN].sum())}
+        if get_amount_scale(self.data) != 1:
+            data.attrs[AMOUNT_SCALE_ATTR] = get_amount_scale(self.data)
+        return SalesCube(data)
+
+    def cities(self) -> list:
+        """
+        Возвращает отсортированный список городов в кубе.
+        """
+        if "Город" not in self.data.columns:
+            return []
+        return sorted(self.data["Город"].dropna().unique())
+
+    def currencies(self) -> list:
+        """
+        Возвращает список валют в кубе в порядке первого появления по дате.
+        """
+        if "Валюта" not in self.data.columns:
+            return []
+        return list(self.data["Валюта"].dropna().unique())
+
+
+def get_sales_cube(df: pd.DataFrame) -> SalesCube:
+    """
+    Возвращает куб для набора данных, используя кэш по отпечатку данных.
+
+    Загрузчики записывают отпечаток набора данных в df.attrs, поэтому куб
+    строится один раз на набор данных, а не при каждом перезапуске скрипта.
+    Для DataFrame без отпечатка куб строится заново.
+
+    Args:
+        df: DataFrame с данными о продажах
+
+    Returns:
+        SalesCube
+    """
+    fingerprint = df.attrs.get(DATASET_FINGERPRINT_ATTR) if df is not None else None
+    if fingerprint is None:
+        return SalesCube.from_frame(df)
+
+    cube = cube_cache.get(fingerprint)
+    if cube is None:
+        cube = SalesCube.from_frame(df)
+        cube_cache.put(fingerprint, cube)
+    return cube
+
+
+def converted_cube_fingerprint(fingerprint: str, rates: pd.DataFrame, currency: str) -> tuple:
+    """
+    Отпечаток куба в валюте отчета: набор данных, таблица курсов и валюта
+    (None, если у набора данных нет отпечатка).
+    """
+    if fingerprint is None:
+        return None
+    return (fingerprint, rates.attrs.get(DATASET_FINGERPRINT_ATTR), currency)
+
+
+def get_converted_cube(cube: SalesCube, rates: pd.DataFrame, currency: str, fingerprint: str = None) -> SalesCube:
+    """
+    Возвращает куб в валюте отчета, используя кэш по отпечатку набора данных.
+
+    Ключ кэша - отпечаток набора данных, хэш таблицы курсов и валюта
+    отчета, поэтому пересчет выполняется один раз на набор данных и валюту.
+
+    Args:
+        cube: Куб набора данных (см. get_sales_cube)
+        rates: Таблица курсов (см. fx_rates.load_fx_rates)
+        currency: Валюта отчета
+        fingerprint: Отпечаток набора данных или None (без кэширования)
+
+    Returns:
+        SalesCube с суммами в валюте отчета
+    """
+    if fingerprint is None:
+        return cube.convert_currency(rates, currency)
+
+    key = converted_cube_fingerprint(fingerprint, rates, currency)
+    converted = cube_cache.get(key)
+    if converted is None:
+        converted = cube.convert_currency(rates, currency)
+        cube_cache.put(key, converted)
+    return converted
+
+
+def kpi_filter_key(start_date=None, end_date=None, city: str = None) -> tuple:
+    """
+    Нормализует фильтры для ключа кэша KPI.
+
+    Даты любого типа (date, datetime, строка, Timestamp) приводятся к дню,
+    поэтому одинаковые фильтры дают одинаковый ключ.
+
+    Returns:
+        tuple: (начальный день или None, конечный день или None, город или None)
+    """
+    return (None if start_date is None else to_day(start_date),
+            None if end_date is None else to_day(end_date),
+            city)
+
+
+def _cached_kpis(key: tuple, compute):
+    """
+    Возвращает результат KPI из kpi_cache или вычисляет и запоминает его.
+    """
+    if key[0] is None:
+        return compute()
+    result = kpi_cache.get(key)
+    if result is None:
+        result = compute()
+        kpi_cache.put(key, result)
+    return result
+
+
+def get_range_kpi_metrics(cube: SalesCube, fingerprint, start_date=None, end_date=None, city: str = None) -> tuple:
+    """
+    Возвращает KPI за диапазон дат и город (см. SalesCube.range_kpi_metrics),
+    используя кэш по отпечатку куба и фильтрам.
+
+    Args:
+        cube: Куб набора данных
+        fingerprint: Отпечаток куба (набора данных или converted_cube_fingerprint)
+                     или None (без кэширования)
+        start_date: Начальная дата или None
+        end_date: Конечная дата или None
+        city: Город или None для всех городов
+
+    Returns:
+        tuple: (общая сумма продаж, средние ежедневные продажи,
+                максимальные ежедневные продажи)
+    """
+    key = (fingerprint, "range_kpi_metrics") + kpi_filter_key(start_date, end_date, city)
+    return _cached_kpis(key, lambda: cube.range_kpi_metrics(start_date, end_date, city))
+
+
+def get_group_kpis(cube: SalesCube, fingerprint, by="Город", start_date=None, end_date=None,
+                   city: str = None) -> pd.DataFrame:
+    """
+    Возвращает KPI каждой группы (см. SalesCube.group_kpis) за диапазон дат
+    и город, используя кэш по отпечатку куба и фильтрам.
+
+    Результат общий для всех вызовов с тем же ключом и не должен изменяться.
+
+    Args:
+        cube: Куб набора данных
+        fingerprint: Отпечаток куба или None (без кэширования)
+        by: Колонка группировки или список колонок
+        start_date: Начальная дата или None
+        end_date: Конечная дата или None
+        city: Город или None для всех городов
+
+    Returns:
+        pd.DataFrame: Строка на группу, колонки KPI_COLUMNS
+    """
+    keys = (by,) if isinstance(by, str) else tuple(by)
+    key = (fingerprint, "group_kpis", keys) + kpi_filter_key(start_date, end_date, city)
+    return _cached_kpis(key, lambda: cube.filter(start_date, end_date, city).group_kpis(by))
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from aggregation import WEEKDAYS, daily_sums, group_sums, sum_by_code, weekday_sums
+
+
+def _random_sales(n_rows=5000, seed=0):
+    """Создает случайные продажи с временем суток, пропусками дат и сумм."""
+    rng = np.random.default_rng(seed)
+    dates = pd.Series(pd.Timestamp('2024-12-20') + pd.to_timedelta(rng.integers(0, 60 * 24 * 60, n_rows), unit='min'))
+    dates[rng.random(n_rows) < 0.05] = pd.NaT
+    amounts = pd.Series(rng.integers(-1000, 100000, n_rows), dtype='Int64')
+    amounts[rng.random(n_rows) < 0.05] = pd.NA
+    cities = pd.Series(rng.choice(['Москва', 'Казань', 'Омск', None], n_rows))
+    return pd.DataFrame({'Дата': dates, 'Город': cities, 'Сумма': amounts})
+
+
+def test_daily_and_weekday_sums_match_pandas_groupby():
+    """Тест: суммы по дням и дням недели совпадают с группировкой pandas."""
+    df = _random_sales()
+    days, sums = daily_sums(df['Дата'], df['Сумма'])
+    expected = df.groupby(df['Дата'].dt.date)['Сумма'].sum()
+
+    assert list(days.astype(object)) == list(expected.index)
+    assert sums.tolist() == expected.tolist()
+
+    by_weekday = df.groupby(df['Дата'].dt.day_name())['Сумма'].sum().reindex(WEEKDAYS, fill_value=0)
+    assert weekday_sums(df['Дата'], df['Сумма']).tolist() == by_weekday.tolist()
+
+
+def test_group_sums_match_pandas_groupby():
+    """Тест: суммы по городам (строковым и категориальным) совпадают с pandas."""
+    df = _random_sales()
+    expected = df.groupby('Город')['Сумма'].sum()
+
+    for cities in (df['Город'], df['Город'].astype('category')):
+        values, sums = group_sums(cities, df['Сумма'])
+        assert list(values) == list(expected.index)
+        assert sums.tolist() == expected.tolist()
+
+
+def test_sum_by_code_is_exact_for_large_integers():
+    """Тест: большие целые суммы складываются без потери точности float64."""
+    codes = np.array([0, 1, 0, -1, 1])
+    values = np.array([2 ** 60 + 1, 5, 3, 7, -2 ** 60], dtype=np.int64)
+
+    assert sum_by_code(codes, values, 3).tolist() == [2 ** 60 + 4, 5 - 2 ** 60, 0]
@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
-from analysis import calculate_kpis
+from analysis import (AMOUNT_SCALE_ATTR, KPI_COLUMNS, MINOR_UNITS_SCALE, calculate_currency_kpis,
+                      calculate_group_kpis, calculate_kpis, calculate_daily_sales, convert_currency,
+                      SalesAccumulator, to_minor_units)
 
 
 def test_calculate_kpis_basic():
@@ -115,4 +117,133 @@ def test_calculate_kpis_only_missing_values():
     # После удаления строк с пропущенными значениями DataFrame становится пустым
     assert total_sales == 0
     assert avg_daily_sales == 0
-    assert max_daily_sales == 0
\ No newline at end of file
+    assert max_daily_sales == 0
+
+def test_sales_accumulator_matches_calculate_kpis():
+    """Тест накопления KPI по чанкам: результат совпадает с расчетом по всем данным."""
+    test_data = pd.DataFrame({
+        'Дата': pd.to_datetime(['2023-01-01', '2023-01-01', '2023-01-02', '2023-01-03', pd.NaT]),
+        'Сумма': [100, 200, 300, 50, 10],
+        'Город': ['Москва', 'СПб', 'Москва', 'СПб', 'Москва']
+    })
+
+    accumulator = SalesAccumulator()
+    for start in range(0, len(test_data), 2):
+        accumulator.add(test_data.iloc[start:start + 2])
+
+    assert accumulator.kpi_metrics() == calculate_kpis(test_data)
+    pd.testing.assert_series_equal(
+        accumulator.daily_sales(),
+        calculate_daily_sales(test_data.dropna()).astype('float64'),
+        check_names=False
+    )
+    assert accumulator.city_sales().to_dict() == {'Москва': 400, 'СПб': 250}
+
+
+def test_sales_accumulator_empty():
+    """Тест аккумулятора без данных."""
+    assert SalesAccumulator().kpi_metrics() == (0, 0, 0)
+
+
+def test_minor_unit_totals_are_exact():
+    """Тест: итоги по суммам в копейках точные, без ошибки округления float."""
+    amounts = [0.1, 0.2, 0.7] * 100_000
+    test_data = pd.DataFrame({
+        'Дата': pd.to_datetime(['2023-01-01', '2023-01-02', '2023-01-02'] * 100_000),
+        'Сумма': to_minor_units(pd.Series(amounts))
+    })
+    test_data.attrs[AMOUNT_SCALE_ATTR] = MINOR_UNITS_SCALE
+
+    assert test_data['Сумма'].dtype == 'int64'
+    assert sum(amounts) != 100_000
+    assert calculate_kpis(test_data) == (100_000, 50_000, 90_000)
+
+
+def test_sales_accumulator_sums_minor_units():
+    """Тест: аккумулятор с масштабом переводит суммы чанков в копейки и суммирует их точно."""
+    test_data = pd.DataFrame({
+        'Дата': pd.to_datetime(['2023-01-01', '2023-01-01', '2023-01-02', '2023-01-02']),
+        'Сумма': [0.1, 0.2, 0.3, 'abc'],
+        'Город': ['Москва', 'СПб', 'Москва', 'СПб']
+    })
+
+    accumulator = SalesAccumulator(amount_scale=MINOR_UNITS_SCALE)
+    for start in range(0, len(test_data), 2):
+        accumulator.add(test_data.iloc[start:start + 2])
+
+    assert accumulator.kpi_metrics() == (0.6, 0.3, 0.3)
+    assert accumulator.total_sales == 0.6
+    assert accumulator.city_sales().to_dict() == {'Москва': 0.4, 'СПб': 0.2}
+
+
+def test_calculate_currency_kpis_keeps_currencies_apart():
+    """Тест: KPI считаются отдельно по валютам, суммы разных валют не складываются."""
+    test_data = pd.DataFrame({
+        'Дата': pd.to_datetime(['2023-01-01', '2023-01-01', '2023-01-02', '2023-01-02']),
+        'Сумма': [100, 5, 300, 7],
+        'Валюта': ['RUB', 'USD', 'RUB', 'USD']
+    })
+
+    kpis = calculate_currency_kpis(test_data)
+
+    assert kpis.loc['RUB'].tolist() == [400, 200, 300]
+    assert kpis.loc['USD'].tolist() == [12, 6, 7]
+
+
+def test_convert_currency_uses_rate_as_of_sale_date():
+    """Тест перевода по последнему курсу на дату продажи (as-of) между валютами."""
+    rates = pd.DataFrame({
+        'Дата': pd.to_datetime(['2023-01-01', '2023-01-01', '2023-01-03']),
+        'Валюта': ['USD', 'EUR', 'USD'],
+        'Курс': [70.0, 90.0, 80.0]
+    })
+    test_data = pd.DataFrame({
+        'Дата': pd.to_datetime(['2022-12-31', '2023-01-02 15:00', '2023-01-03', '2023-01-04', '2023-01-04'],
+                               format='ISO8601'),
+        'Сумма': to_minor_units(pd.Series([1, 2, 3, 4, 5])),
+        'Валюта': ['USD', 'USD', 'USD', 'EUR', 'RUB']
+    })
+
+    rub = convert_currency(test_data, rates, 'RUB')
+    usd = convert_currency(test_data, rates, 'USD')
+
+    assert rub['Сумма'].isna().tolist() == [True, False, False, False, False]
+    assert rub['Сумма'].dropna().tolist() == [14000, 24000, 36000, 500]
+    assert usd['Сумма'].tolist() == [100, 200, 300, 450, 6]
+    assert set(usd['Валюта']) == {'USD'}
+
+
+def test_convert_currency_without_rates_for_currency():
+    """Тест: суммы валюты без курсов в таблице (в данных и как валюта отчета) - пропуски."""
+    rates = pd.DataFrame({'Дата': pd.to_datetime(['2023-01-01']), 'Валюта': ['USD'], 'Курс': [70.0]})
+    test_data = pd.DataFrame({
+        'Дата': pd.to_datetime(['2023-01-02', '2023-01-02', '2023-01-02']),
+        'Сумма': to_minor_units(pd.Series([1, 2, 3])),
+        'Валюта': ['RUB', 'USD', 'GBP']
+    })
+
+    rub = convert_currency(test_data, rates, 'RUB')
+    gbp = convert_currency(test_data, rates, 'GBP')
+
+    assert rub['Сумма'].isna().tolist() == [False, False, True]
+    assert rub['Сумма'].dropna().tolist() == [100, 14000]
+    assert gbp['Сумма'].isna().tolist() == [True, True, False]
+    assert gbp['Сумма'].dropna().tolist() == [300]
+
+
+def test_calculate_group_kpis_matches_per_group_calls():
+    """Тест: KPI всех городов за один проход совпадают с вызовами calculate_kpis по каждому городу."""
+    test_data = pd.DataFrame({
+        'Дата': pd.to_datetime(['2023-01-01', '2023-01-01', '2023-01-02', '2023-01-03', '2023-01-03', None]),
+        'Сумма': [100, 200, 300, 50, 25, 10],
+        'Город': ['Москва', 'СПб', 'Москва', 'СПб', None, 'Москва'],
+        'Валюта': ['RUB', 'RUB', 'RUB', 'USD', 'RUB', 'RUB']
+    })
+
+    kpis = calculate_group_kpis(test_data, 'Город')
+
+    assert list(kpis.columns) == KPI_COLUMNS and kpis.index.name == 'Город'
+    assert list(kpis.index) == ['Москва', 'СПб']
+    for city in kpis.index:
+        assert tuple(kpis.loc[city]) == calculate_kpis(test_data[test_data['Город'] == city])
+    assert calculate_group_kpis(test_data, ['Город', 'Валюта']).loc[('СПб', 'USD'), 'total_sales'] == 50
@@ -0,0 +1,41 @@
+from cache_utils import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Тест вытеснения давно неиспользуемых записей по числу записей."""
+    cache = LRUCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'a' становится недавно использованной
+    cache.put('c', 3)
+
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_lru_cache_respects_byte_budget():
+    """Тест ограничения кэша по суммарному объему записей."""
+    cache = LRUCache(max_entries=10, max_bytes=100)
+    cache.put('a', 'x', size=60)
+    cache.put('b', 'y', size=60)
+    assert 'a' not in cache
+    assert cache.stats()['bytes'] == 60
+
+    # Запись больше лимита не кэшируется
+    cache.put('huge', 'z', size=1000)
+    assert 'huge' not in cache
+
+
+def test_lru_cache_hit_miss_statistics():
+    """Тест подсчета попаданий и промахов."""
+    cache = LRUCache()
+    assert cache.get('missing') is None
+    cache.put('key', 'value')
+    assert cache.get('key') == 'value'
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['hit_rate'] == 0.5
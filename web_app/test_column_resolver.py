@@ -0,0 +1,41 @@
+from column_resolver import ColumnResolver, resolve_columns
+
+
+def test_resolve_columns_maps_synonyms_case_and_spaces():
+    """Тест сопоставления синонимов, регистра и пробелов за один проход."""
+    plan = resolve_columns([' date', 'CITY', 'Name', 'Last Name', 'Amount ', 'Payment currency'])
+
+    assert plan.columns == ['Дата', 'Город', 'Имя', 'Фамилия', 'Сумма', 'Валюта']
+    assert plan.rename[' date'] == 'Дата'
+    assert plan.missing == []
+    assert plan.is_valid
+
+
+def test_resolve_columns_reports_missing_columns():
+    """Тест отсутствующих колонок: без 'Сумма' расчет KPI невозможен."""
+    plan = resolve_columns(['Дата', 'Город', 'Комментарий'])
+
+    assert plan.columns == ['Дата', 'Город', 'Комментарий']
+    assert plan.missing == ['Имя', 'Фамилия', 'Сумма', 'Валюта']
+    assert plan.missing_kpi == ['Сумма']
+    assert not plan.is_valid
+
+
+def test_resolver_prefers_standard_name_and_claims_column_once():
+    """Тест приоритета стандартного названия над синонимом."""
+    plan = resolve_columns(['Total', 'Сумма', 'Дата'])
+
+    assert plan.columns == ['Total', 'Сумма', 'Дата']
+
+
+def test_resolver_memoizes_plan_per_header():
+    """Тест запоминания плана: одинаковый заголовок разбирается один раз."""
+    resolver = ColumnResolver(alt_names={'Дата': ['Datum'], 'Сумма': ['Betrag']})
+    header = ['Datum', 'Betrag']
+
+    first = resolver.plan(header)
+    second = resolver.plan(tuple(header))
+
+    assert first is second
+    assert first.columns == ['Дата', 'Сумма']
+    assert resolver.plans.stats()['hits'] == 1
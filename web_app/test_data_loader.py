@@ -0,0 +1,305 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_loader
+from analysis import calculate_kpis
+from data_loader import (load_data, load_shared_data, load_uploaded_data, stream_csv_sales, compact_sales_frame,
+                         sidecar_cache_path, file_content_hash)
+
+
+def _write_sales_xlsx(path, amounts):
+    """Создает Excel файл с тестовыми продажами."""
+    pd.DataFrame({
+        'Дата': pd.date_range('2023-01-01', periods=len(amounts), freq='D'),
+        'Город': ['Москва'] * len(amounts),
+        'Имя': ['Иван'] * len(amounts),
+        'Фамилия': ['Иванов'] * len(amounts),
+        'Сумма': amounts,
+        'Валюта': ['RUB'] * len(amounts)
+    }).to_excel(path, index=False)
+
+
+def test_load_data_writes_and_reuses_sidecar_cache(tmp_path):
+    """Тест записи колоночного кэша и повторного чтения из него."""
+    source = str(tmp_path / 'sales.xlsx')
+    _write_sales_xlsx(source, [100, 200, 300])
+
+    df = load_data.__wrapped__(source)
+    cache_path = sidecar_cache_path(source, file_content_hash(source))
+    assert os.path.exists(cache_path)
+
+    cached_df = load_data.__wrapped__(source)
+    pd.testing.assert_frame_equal(df, cached_df)
+
+
+def test_load_data_sidecar_cache_invalidated_on_change(tmp_path, monkeypatch):
+    """Тест сброса кэша при изменении файла или правил нормализации."""
+    source = str(tmp_path / 'sales.xlsx')
+    _write_sales_xlsx(source, [100, 200, 300])
+    load_data.__wrapped__(source)
+
+    # Изменение содержимого файла дает новый ключ кэша
+    _write_sales_xlsx(source, [1, 2, 3])
+    df = load_data.__wrapped__(source)
+    assert df['Сумма'].sum() == 6
+
+    # Старый кэш удаляется, остается только актуальный
+    sidecars = [name for name in os.listdir(tmp_path) if name.endswith(data_loader.SIDECAR_CACHE_SUFFIX)]
+    assert len(sidecars) == 1
+
+    # Изменение версии правил нормализации также дает новый ключ
+    old_path = sidecar_cache_path(source, file_content_hash(source))
+    monkeypatch.setattr(data_loader, 'NORMALIZER_VERSION', data_loader.NORMALIZER_VERSION + 1)
+    assert sidecar_cache_path(source, file_content_hash(source)) != old_path
+
+
+class _FakeUpload(io.BytesIO):
+    """Имитация загруженного файла Streamlit."""
+
+    def __init__(self, data, name, file_id=None):
+        super().__init__(data)
+        self.name = name
+        self.file_id = file_id
+
+
+def test_load_uploaded_data_parses_once_per_content(monkeypatch):
+    """Тест кэширования загруженного файла по хэшу содержимого."""
+    data_loader.upload_cache.clear()
+    csv_bytes = 'Дата,Город,Имя,Фамилия,Сумма,Валюта\n2023-01-01,Москва,Иван,Иванов,100,RUB\n'.encode('utf-8')
+
+    calls = []
+    original_parse = data_loader._parse_uploaded_file
+    monkeypatch.setattr(data_loader, '_parse_uploaded_file',
+                        lambda f, *args: calls.append(f.name) or original_parse(f, *args))
+
+    first = load_uploaded_data(_FakeUpload(csv_bytes, 'a.csv', file_id='1'))
+    # Тот же контент под другим file_id также берется из кэша
+    second = load_uploaded_data(_FakeUpload(csv_bytes, 'b.csv', file_id='2'))
+
+    assert calls == ['a.csv']
+    pd.testing.assert_frame_equal(first, second)
+    assert data_loader.upload_cache.stats()['hits'] == 1
+
+    # Изменение колонок возвращенного DataFrame не портит кэш
+    second['Сумма'] = 0
+    third = load_uploaded_data(_FakeUpload(csv_bytes, 'c.csv'))
+    assert third['Сумма'].sum() == 100
+
+
+def test_load_uploaded_data_accepts_english_headers():
+    """Тест загрузки файла с английскими названиями колонок."""
+    data_loader.upload_cache.clear()
+    csv_bytes = b'Date,City,Name,Surname,Amount,Currency\n2023-01-02,Moscow,Ivan,Ivanov,150,RUB\n'
+
+    df = load_uploaded_data(_FakeUpload(csv_bytes, 'english.csv'))
+
+    assert list(df.columns) == ['Дата', 'Город', 'Имя', 'Фамилия', 'Сумма', 'Валюта']
+    assert calculate_kpis(df) == (150, 150, 150)
+
+
+def test_stream_csv_sales_normalizes_every_chunk():
+    """Тест потоковой загрузки CSV: нормализация колонок применяется ко всем чанкам."""
+    csv_text = ' Дата ,Город, Имя,Фамилия,Сумма ,Валюта\n' + ''.join(
+        f'2023-01-0{day},Москва,Иван,Иванов,{amount},RUB\n'
+        for day, amount in [(1, 100), (1, 200), (2, 300), (3, 50), (3, 25)]
+    )
+
+    accumulator = stream_csv_sales(io.StringIO(csv_text), chunk_size=2)
+
+    assert accumulator.kpi_metrics() == (675, 225, 300)
+    assert accumulator.city_sales().to_dict() == {'Москва': 675}
+    assert accumulator.currencies == ['RUB']
+
+
+def test_compact_sales_frame_keeps_analysis_results():
+    """Тест компактного представления: типы, отчет о памяти и неизменные KPI."""
+    df = pd.DataFrame({
+        'Дата': pd.to_datetime(['2023-01-01', '2023-01-01', '2023-01-02', '2023-01-03'] * 50),
+        'Город': ['Москва', 'Казань', 'Москва', 'Пермь'] * 50,
+        'Имя': [f'Имя{i}' for i in range(200)],
+        'Фамилия': [f'Фамилия{i}' for i in range(200)],
+        'Сумма': [100.10, 200.20, 300.30, 50.05] * 50,
+        'Валюта': ['RUB'] * 200
+    })
+
+    compact_df, report = compact_sales_frame(df)
+    assert isinstance(compact_df['Город'].dtype, pd.CategoricalDtype)
+    assert isinstance(compact_df['Валюта'].dtype, pd.CategoricalDtype)
+    assert not isinstance(compact_df['Имя'].dtype, pd.CategoricalDtype)
+    assert report['saved_bytes'] == report['memory_before'] - report['memory_after']
+    assert compact_df.attrs[data_loader.MEMORY_PROFILE_ATTR] == report
+
+    expected = calculate_kpis(df)
+    cents_df, _ = compact_sales_frame(df, amount_dtype='cents')
+    assert cents_df['Сумма'].dtype == 'int64'
+    assert calculate_kpis(cents_df) == pytest.approx(expected)
+    assert calculate_kpis(cents_df.loc[cents_df['Город'] == 'Москва']) == pytest.approx(
+        calculate_kpis(df.loc[df['Город'] == 'Москва']))
+
+    float32_df, _ = compact_sales_frame(df, amount_dtype='float32')
+    assert calculate_kpis(float32_df) == pytest.approx(expected)
+
+
+def test_load_shared_data_returns_zero_copy_views(tmp_path):
+    """Тест общего набора данных: одна копия в процессе, изменения сессий изолированы."""
+    source = str(tmp_path / 'sales.xlsx')
+    _write_sales_xlsx(source, [100, 200, 300])
+
+    first = load_shared_data(source, use_disk_cache=False)
+    second = load_shared_data(source, use_disk_cache=False)
+    assert first is not second
+    assert np.shares_memory(first['Сумма'].to_numpy(), second['Сумма'].to_numpy())
+
+    # Изменения одной сессии не видны другим
+    first['Город'] = 'Казань'
+    second.iloc[0, second.columns.get_loc('Сумма')] = -1
+    third = load_shared_data(source, use_disk_cache=False)
+    assert third['Сумма'].tolist() == [100, 200, 300]
+    assert third['Город'].tolist() == ['Москва'] * 3
+
+
+def test_load_uploaded_data_streaming_reads_xlsx_in_chunks():
+    """Тест потоковой загрузки XLSX: результат совпадает с обычной загрузкой."""
+    data_loader.upload_cache.clear()
+    buffer = io.BytesIO()
+    pd.DataFrame({
+        'Date': pd.to_datetime(['2023-01-01', '2023-01-01', '2023-01-02', '2023-01-03', '2023-01-03']),
+        'City': ['Москва', 'Казань', 'Москва', 'Казань', 'Москва'],
+        'Name': ['Иван'] * 5,
+        'Surname': ['Иванов'] * 5,
+        'Amount': [100, 200, 300, 50, 25],
+        'Currency': ['RUB'] * 5
+    }).to_excel(buffer, index=False)
+
+    accumulator = data_loader.load_uploaded_data_streaming(_FakeUpload(buffer.getvalue(), 'big.xlsx'), chunk_size=2)
+    df = load_uploaded_data(_FakeUpload(buffer.getvalue(), 'big.xlsx'))
+
+    assert accumulator.row_count == 5
+    assert accumulator.kpi_metrics() == calculate_kpis(df) == (675, 225, 300)
+    assert accumulator.city_sales().to_dict() == {'Москва': 425, 'Казань': 250}
+
+
+def test_iter_excel_chunks_skips_empty_rows_and_columns(tmp_path):
+    """Тест чтения XLSX по строкам: пустые строки и ячейки за заголовком пропускаются."""
+    import openpyxl
+
+    path = str(tmp_path / 'sheet.xlsx')
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(['Дата', 'Сумма'])
+    sheet.append(['2023-01-01', 100])
+    sheet.append([None, None])
+    sheet.append(['2023-01-02', 200])
+    sheet['D10'] = 'примечание вне таблицы'
+    workbook.save(path)
+
+    chunks = list(data_loader.iter_excel_chunks(path, chunk_size=1))
+
+    assert [list(chunk.columns) for chunk in chunks] == [['Дата', 'Сумма']] * 2
+    assert [chunk['Сумма'].tolist() for chunk in chunks] == [[100], [200]]
+
+
+@pytest.mark.parametrize('use_disk_cache', [True, False])
+def test_read_dataset_projects_columns(tmp_path, use_disk_cache):
+    """Тест проекции колонок: из кэша на диске и из Excel (usecols)."""
+    source = str(tmp_path / 'sales.xlsx')
+    _write_sales_xlsx(source, [300, 100, 200])
+    # Первый вызов записывает полный кэш на диске
+    full = data_loader.read_dataset(source, use_disk_cache=use_disk_cache)
+
+    analysis = data_loader.read_dataset(source, use_disk_cache=use_disk_cache,
+                                        columns=data_loader.ANALYSIS_COLUMNS)
+    names = data_loader.read_dataset(source, use_disk_cache=use_disk_cache,
+                                     columns=data_loader.NAME_COLUMNS)
+
+    assert list(analysis.columns) == ['Дата', 'Город', 'Сумма', 'Валюта']
+    assert list(names.columns) == ['Дата', 'Имя', 'Фамилия']
+    # Проекции одного файла имеют тот же порядок строк, что и полные данные
+    pd.testing.assert_frame_equal(analysis, full[analysis.columns])
+    assert list(names['Фамилия']) == list(full['Фамилия'])
+
+
+def test_load_uploaded_data_reads_only_requested_columns(monkeypatch):
+    """Тест чтения только нужных колонок загруженного CSV (с альтернативными названиями).
+
+    Колонки ключа дубликатов читаются для профиля качества, остальные - нет.
+    """
+    data_loader.upload_cache.clear()
+    csv_bytes = b'Date,City,Name,Surname,Amount,Currency,Comment\n2023-01-02,Moscow,Ivan,Ivanov,150,RUB,-\n'
+    usecols = []
+    original_read_csv = pd.read_csv
+    monkeypatch.setattr(data_loader.pd, 'read_csv',
+                        lambda *args, **kwargs: usecols.append(kwargs.get('usecols')) or original_read_csv(*args, **kwargs))
+
+    df = load_uploaded_data(_FakeUpload(csv_bytes, 'sales.csv'), columns=['Сумма'])
+
+    assert list(df.columns) == ['Дата', 'Сумма']
+    assert sorted(usecols[-1]) == ['Amount', 'City', 'Currency', 'Date', 'Name', 'Surname']
+    assert df.attrs[data_loader.QUALITY_PROFILE_ATTR]['columns']['Имя']['unique'] == 1
+
+
+def test_read_directory_loads_all_sheets_and_files_in_parallel(tmp_path):
+    """Тест загрузки всех листов и файлов каталога в пуле процессов."""
+    with pd.ExcelWriter(tmp_path / 'months.xlsx') as writer:
+        for month, amounts in [('Январь', [100, 200]), ('Февраль', [300])]:
+            pd.DataFrame({
+                'Дата': pd.date_range(f'2023-0{1 if month == "Январь" else 2}-01', periods=len(amounts)),
+                'Город': ['Москва'] * len(amounts),
+                'Сумма': amounts,
+                'Валюта': ['RUB'] * len(amounts)
+            }).to_excel(writer, sheet_name=month, index=False)
+    (tmp_path / 'extra.csv').write_text('Date,City,Amount,Currency\n2023-03-01,Казань,50,RUB\n', encoding='utf-8')
+
+    df = data_loader.read_directory(str(tmp_path), max_workers=2)
+
+    assert calculate_kpis(df)[0] == 650
+    assert df.groupby(data_loader.SOURCE_COLUMN, observed=True)['Сумма'].sum().to_dict() == {
+        'months.xlsx: Январь': 300, 'months.xlsx: Февраль': 300, 'extra.csv': 50
+    }
+    report = df.attrs[data_loader.INGEST_REPORT_ATTR]
+    assert report['workers'] == 2
+    assert [(f['source'], f['sheets'], f['rows'], f['cached']) for f in report['files']] == [
+        ('extra.csv', 1, 1, False), ('months.xlsx', 2, 3, False)
+    ]
+    assert all(f['seconds'] > 0 for f in report['files'])
+
+    # Повторная загрузка читает файлы из колоночного кэша
+    cached = data_loader.read_directory(str(tmp_path), columns=['Сумма'])
+    assert [f['cached'] for f in cached.attrs[data_loader.INGEST_REPORT_ATTR]['files']] == [True, True]
+    assert list(cached.columns) == ['Дата', 'Сумма', data_loader.SOURCE_COLUMN]
+    assert list(cached['Сумма']) == list(df['Сумма'])
+
+
+def test_workbook_is_opened_once_and_notes_sheet_is_skipped(tmp_path, monkeypatch):
+    """Тест: книга открывается один раз, лист без колонок данных пропускается без ошибки."""
+    path = tmp_path / 'sales.xlsx'
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({'Дата': ['2023-01-01', '2023-01-02'], 'Город': ['Москва', 'Казань'],
+                      'Сумма': [100, 200], 'Валюта': ['RUB', 'RUB']}).to_excel(writer, sheet_name='Продажи', index=False)
+        pd.DataFrame({'Примечание': ['Выгрузка за январь']}).to_excel(writer, sheet_name='Примечания', index=False)
+    errors, opened = [], []
+
+    class CountingExcelFile(pd.ExcelFile):
+        def __init__(self, *args, **kwargs):
+            opened.append(args[0])
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(data_loader.st, 'error', errors.append)
+    monkeypatch.setattr(data_loader.pd, 'ExcelFile', CountingExcelFile)
+    df = data_loader.read_dataset(str(path), use_disk_cache=False)
+
+    assert errors == []
+    assert opened == [str(path)]
+    assert calculate_kpis(df)[0] == 300
+    assert data_loader.SOURCE_COLUMN not in df.columns
+    assert df.attrs[data_loader.INGEST_REPORT_ATTR]['files'][0]['sheets'] == 1
+
+    # Книга без листа с данными по-прежнему сообщает об ошибке
+    notes = tmp_path / 'notes.xlsx'
+    pd.DataFrame({'Примечание': ['пусто']}).to_excel(notes, sheet_name='Примечания', index=False)
+    assert data_loader.read_dataset(str(notes), use_disk_cache=False) is None
+    assert len(errors) == 1
@@ -0,0 +1,90 @@
+import pandas as pd
+
+from data_loader import ANALYSIS_COLUMNS, read_directory
+from data_quality import QualityProfile, get_quality_profile, profile_sales_data, quality_profile_cache
+from date_parser import UNPARSED_DATES_ATTR
+
+
+def _sales_frame():
+    """Продажи с пропусками, дубликатами, отрицательной, нулевой и нечисловой суммой."""
+    df = pd.DataFrame({
+        'Дата': pd.to_datetime(['2023-01-01', '2023-01-01', None, '2023-01-02', '2023-01-03', '2023-01-01']),
+        'Город': ['Москва', 'Москва', 'Казань', None, 'Сочи', 'Москва'],
+        'Сумма': [100, 100, -5, 0, 'abc', 100],
+        'Валюта': ['RUB', 'RUB', 'RUB', 'USD', 'RUB', 'RUB'],
+    })
+    df.attrs[UNPARSED_DATES_ATTR] = 1
+    return df
+
+
+def test_profile_counts_quality_issues():
+    """Тест подсчета пропусков, дубликатов, сумм, валют и различных значений."""
+    profile = profile_sales_data(_sales_frame())
+
+    assert profile['rows'] == 6
+    assert (profile['missing_dates'], profile['unparsed_dates']) == (1, 1)
+    assert (profile['invalid_amounts'], profile['negative_amounts'], profile['zero_amounts']) == (1, 1, 1)
+    assert profile['duplicates'] == 2
+    assert profile['currencies'] == ['RUB', 'USD'] and profile['mixed_currencies']
+    assert profile['columns']['Город'] == {'dtype': profile['columns']['Город']['dtype'], 'nulls': 1, 'unique': 3}
+
+
+def test_chunked_profile_matches_whole_dataset():
+    """Тест: профиль по чанкам совпадает с профилем всего набора, включая дубликаты между чанками."""
+    df = _sales_frame()
+    chunks = [df.iloc[:1].copy(), df.iloc[1:4].copy(), df.iloc[4:].copy()]
+    for chunk in chunks:
+        chunk.attrs = {}
+    chunks[0].attrs[UNPARSED_DATES_ATTR] = 1
+    # Целые суммы в одном чанке и дробные в другом считаются одинаковыми значениями
+    chunks[1]['Сумма'] = chunks[1]['Сумма'].astype(float)
+    chunks[0]['Сумма'] = chunks[0]['Сумма'].astype(int)
+
+    profile = QualityProfile()
+    for chunk in chunks:
+        profile.add(chunk)
+    whole = profile_sales_data(df)
+    chunked = profile.to_dict()
+
+    assert chunked['duplicates'] == whole['duplicates'] == 2
+    assert {k: v for k, v in chunked.items() if k != 'columns'} == {k: v for k, v in whole.items() if k != 'columns'}
+    assert {col: stats['unique'] for col, stats in chunked['columns'].items()} == \
+        {col: stats['unique'] for col, stats in whole['columns'].items()}
+
+
+def test_merged_profiles_match_profile_of_both_parts(tmp_path):
+    """Тест: объединение профилей частей совпадает с профилем всех строк, в том числе после save/load."""
+    df = _sales_frame()
+    first, second = df.iloc[:2].copy(), df.iloc[2:].copy()
+    first.attrs, second.attrs = {UNPARSED_DATES_ATTR: 1}, {}
+    second_profile = QualityProfile().add(second)
+    second_profile.save(str(tmp_path / 'second.npz'))
+
+    merged = QualityProfile().add(first).merge(QualityProfile.load(str(tmp_path / 'second.npz')))
+
+    assert merged.to_dict() == QualityProfile().add(first).add(second).to_dict()
+    assert merged.to_dict()['duplicates'] == 2
+
+
+def test_loader_profiles_all_columns_of_projection(tmp_path):
+    """Тест: профиль строится при загрузке по всем колонкам, а не по проекции без имен."""
+    quality_profile_cache.clear()
+    for name, first_names in [('a.csv', ['Иван', 'Петр']), ('b.csv', ['Иван'])]:
+        pd.DataFrame({
+            'Дата': ['2023-01-01'] * len(first_names),
+            'Город': ['Москва'] * len(first_names),
+            'Имя': first_names,
+            'Фамилия': ['Иванов'] * len(first_names),
+            'Сумма': [100] * len(first_names),
+            'Валюта': ['RUB'] * len(first_names)
+        }).to_csv(tmp_path / name, index=False)
+
+    # Без кэша, с записью кэша и из кэша (профиль сохранен рядом с ним)
+    for use_disk_cache in (False, True, True):
+        projection = read_directory(str(tmp_path), use_disk_cache=use_disk_cache, columns=ANALYSIS_COLUMNS)
+        profile = get_quality_profile(projection)
+
+        assert 'Имя' not in projection.columns
+        assert profile_sales_data(projection)['duplicates'] == 2
+        assert profile['duplicates'] == 1
+        assert profile['columns']['Имя']['unique'] == 2
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from date_parser import EXCEL_SERIAL_FORMAT, UNPARSED_DATES_ATTR, parse_sales_dates, sniff_date_format
+
+
+EXPECTED = pd.to_datetime(['2023-01-05', '2023-02-13', None, '2023-01-05'])
+
+
+@pytest.mark.parametrize('values, date_format', [
+    (['2023-01-05', '2023-02-13', None, '2023-01-05'], 'ISO8601'),
+    (['05.01.2023', '13.02.2023', None, '05.01.2023'], '%d.%m.%Y'),
+    ([44931, 44970, np.nan, 44931], EXCEL_SERIAL_FORMAT),
+])
+def test_parse_sales_dates_sniffs_format(values, date_format):
+    """Тест определения формата и разбора ISO, ДД.ММ.ГГГГ и номеров дней Excel."""
+    values = pd.Series(values, index=[10, 11, 12, 13], name='Дата')
+
+    assert sniff_date_format(values) == date_format
+    parsed = parse_sales_dates(values)
+
+    assert list(parsed) == list(EXPECTED)
+    assert list(parsed.index) == [10, 11, 12, 13]
+    assert parsed.name == 'Дата'
+
+
+def test_ambiguous_slash_dates_are_day_first():
+    """Тест: даты через косую черту без дней больше 12 читаются как ДД/ММ/ГГГГ."""
+    values = pd.Series(['05/01/2023', '12/02/2023', '05/01/2023'])
+
+    assert sniff_date_format(values) == '%d/%m/%Y'
+    assert list(parse_sales_dates(values)) == list(pd.to_datetime(['2023-01-05', '2023-02-12', '2023-01-05']))
+    assert sniff_date_format(pd.Series(['05/01/2023', '01/13/2023'])) == '%m/%d/%Y'
+
+
+@pytest.mark.parametrize('values', [[2024, 2023, 2024], [12345, 67, 100000]])
+def test_plain_integers_are_not_excel_serials(values):
+    """Тест: годы и коды не превращаются в даты Excel, а считаются неразобранными."""
+    values = pd.Series(values)
+
+    assert sniff_date_format(values) is None
+    parsed = parse_sales_dates(values)
+    assert parsed.isna().all()
+    assert parsed.attrs[UNPARSED_DATES_ATTR] == 3
+
+
+def test_parse_sales_dates_falls_back_when_format_does_not_match():
+    """Тест разбора без формата, если данные не соответствуют известному формату."""
+    values = pd.Series(['2023-01-05', '2023-02-13'])
+
+    parsed = parse_sales_dates(values, date_format='%d.%m.%Y')
+
+    assert list(parsed) == list(pd.to_datetime(['2023-01-05', '2023-02-13']))
+
+
+def test_parse_sales_dates_keeps_datetime_column():
+    """Тест: колонка, уже имеющая тип datetime, не разбирается повторно."""
+    values = pd.Series(pd.to_datetime(['2023-01-05', '2023-02-13']))
+
+    assert parse_sales_dates(values) is values
+
+
+def test_parse_sales_dates_counts_unparsed_values():
+    """Тест: неразбираемые значения становятся NaT и учитываются, а не прерывают загрузку."""
+    result = parse_sales_dates(pd.Series(['2023-01-05', 'не дата', '13.02.2023', None, 'не дата']))
+    assert list(result.dropna()) == [pd.Timestamp('2023-01-05'), pd.Timestamp('2023-02-13')]
+    assert result.attrs[UNPARSED_DATES_ATTR] == 2
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from analysis import SalesAccumulator, calculate_kpis
+from data_loader import read_directory
+from dedup import DUPLICATES_ATTR, DuplicateDetector, hash_rows
+from incremental_loader import IncrementalDirectoryDataset
+
+
+def _sales(rows):
+    """Создает продажи: список (дата, имя, сумма)."""
+    return pd.DataFrame({
+        'Дата': pd.to_datetime([date for date, _, _ in rows]),
+        'Город': ['Москва'] * len(rows),
+        'Имя': [name for _, name, _ in rows],
+        'Фамилия': ['Иванов'] * len(rows),
+        'Сумма': [amount for _, _, amount in rows],
+        'Валюта': ['RUB'] * len(rows)
+    })
+
+
+def _write_csv(path, rows):
+    """Записывает CSV с продажами: список (дата, имя, сумма)."""
+    lines = ['Дата,Город,Имя,Фамилия,Сумма,Валюта'] + [f'{date},Москва,{name},Иванов,{amount},RUB'
+                                                        for date, name, amount in rows]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+def test_detector_finds_duplicates_within_and_across_chunks():
+    """Тест: остается первая строка, повторы в чанке и между чанками удаляются."""
+    detector = DuplicateDetector()
+    first = _sales([('2023-01-01', 'Иван', 100), ('2023-01-01', 'Анна', 100), ('2023-01-01', 'Иван', 100)])
+    second = _sales([('2023-01-01', 'Анна', 100.0), ('2023-01-02', 'Анна', 100)])
+    second['Город'] = second['Город'].astype('category')
+
+    assert detector.mark(first).tolist() == [False, False, True]
+    assert detector.drop(second)['Дата'].tolist() == [pd.Timestamp('2023-01-02')]
+    assert detector.report() == {'rows': 5, 'duplicates': 2, 'distinct': 3, 'memory_bytes': 24}
+
+
+def test_detector_matches_pandas_over_many_chunks():
+    """Тест: после слияния серий хэшей повторы находятся так же, как drop_duplicates."""
+    rng = np.random.default_rng(0)
+    hashes = rng.integers(0, 5000, 20000).astype(np.uint64)
+    detector = DuplicateDetector()
+
+    duplicated = np.concatenate([detector.mark_hashes(chunk) for chunk in np.array_split(hashes, 97)])
+
+    assert duplicated.tolist() == pd.Series(hashes).duplicated().tolist()
+    report = detector.report()
+    assert report['distinct'] == len(np.unique(hashes))
+    assert report['memory_bytes'] == 8 * report['distinct']
+    assert len(detector._runs) <= np.log2(report['distinct']) + 1
+
+
+def test_hash_rows_uses_only_key_columns():
+    """Тест: строки с разными значениями неключевых колонок считаются повторами."""
+    df = _sales([('2023-01-01', 'Иван', 100), ('2023-01-01', 'Иван', 100)])
+    df['Источник'] = ['a.csv', 'b.csv']
+
+    hashes = hash_rows(df, ['Дата', 'Имя', 'Сумма'])
+    assert hashes.dtype == np.uint64 and hashes[0] == hashes[1]
+    assert hash_rows(df)[0] != hash_rows(df)[1]
+
+
+def test_streaming_accumulator_drops_duplicates():
+    """Тест: KPI потоковой загрузки считаются без повторов строк."""
+    rows = [('2023-01-01', 'Иван', 100), ('2023-01-02', 'Анна', 50), ('2023-01-01', 'Иван', 100)]
+    accumulator = SalesAccumulator(deduplicator=DuplicateDetector())
+    for chunk in (_sales(rows[:2]), _sales(rows[2:])):
+        accumulator.add(chunk)
+
+    assert accumulator.kpi_metrics() == calculate_kpis(_sales(rows[:2]))
+    assert accumulator.deduplicator.duplicates == 1
+
+
+def test_directory_loads_drop_duplicates_across_files(tmp_path):
+    """Тест удаления повторов между файлами при полной и инкрементальной загрузке."""
+    _write_csv(tmp_path / 'a.csv', [('2023-01-01', 'Иван', 100), ('2023-01-02', 'Анна', 50)])
+    dataset = IncrementalDirectoryDataset(str(tmp_path), use_disk_cache=False, columns=['Сумма'],
+                                          drop_duplicates=True)
+    dataset.refresh()
+
+    _write_csv(tmp_path / 'b.csv', [('2023-01-01', 'Иван', 100), ('2023-01-01', 'Олег', 100)])
+    dataset.refresh()
+    full = read_directory(str(tmp_path), use_disk_cache=False, columns=['Сумма'], drop_duplicates=True)
+
+    assert sorted(full['Сумма']) == sorted(dataset.view()['Сумма']) == [50, 100, 100]
+    assert full.attrs[DUPLICATES_ATTR] == dataset.view().attrs[DUPLICATES_ATTR] == 1
+    assert list(full.columns) == ['Дата', 'Сумма', 'Источник']
+
+    # Файл, первый по имени, перечитывает каталог: остается его копия строки
+    _write_csv(tmp_path / '0.csv', [('2023-01-02', 'Анна', 50)])
+    report = dataset.refresh()
+    assert sorted(report['changed'] + report['added']) == ['0.csv']
+    assert dataset.view().attrs[DUPLICATES_ATTR] == 2
+    assert sorted(dataset.view()['Источник'].astype(str)) == ['0.csv', 'a.csv', 'b.csv']
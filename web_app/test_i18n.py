@@ -0,0 +1,38 @@
+from i18n import SUPPORTED_LANGUAGES, TranslationCatalog, load_catalog
+
+
+def test_catalogs_cover_all_languages_and_keys():
+    """Тест: каталоги содержат все языки и одинаковый набор ключей."""
+    for name in ['app', 'faq']:
+        catalog = load_catalog(name)
+        assert set(catalog.translations) == set(SUPPORTED_LANGUAGES)
+        keys = set(catalog.translations['русский'])
+        for lang in SUPPORTED_LANGUAGES:
+            assert set(catalog.translations[lang]) == keys
+
+
+def test_catalog_loaded_once_per_process():
+    """Тест: повторная загрузка возвращает тот же объект каталога."""
+    assert load_catalog('app') is load_catalog('app')
+
+
+def test_catalog_lookup_and_fallbacks():
+    """Тест поиска перевода с запасными значениями."""
+    catalog = load_catalog('app')
+    assert catalog.get('английский', 'title') == 'E-commerce Sales Analyzer'
+    assert catalog.get('неизвестный', 'title') == catalog.get('русский', 'title')
+    assert catalog.get('русский', 'missing_key') == 'missing_key'
+
+
+def test_city_maps_round_trip():
+    """Тест прямого и обратного перевода названий городов."""
+    catalog = TranslationCatalog({
+        'русский': {'cities': {'Москва': 'Moscow'}},
+        'английский': {'cities': {'Москва': 'Moscow'}}
+    })
+    assert catalog.city_display_name('русский', 'Москва') == 'Москва'
+    assert catalog.city_display_name('английский', 'Москва') == 'Moscow'
+    assert catalog.city_original_name('английский', 'Moscow') == 'Москва'
+    # Город без перевода отображается как есть
+    assert catalog.city_display_name('английский', 'Уфа') == 'Уфа'
+    assert catalog.city_original_name('английский', 'Уфа') == 'Уфа'
@@ -0,0 +1,136 @@
+import os
+
+import pandas as pd
+import pandas.testing as pdt
+
+from analysis import DATASET_FINGERPRINT_ATTR, calculate_kpis
+from data_loader import SOURCE_COLUMN, read_directory
+from data_quality import QUALITY_PROFILE_ATTR
+import incremental_loader
+from incremental_loader import IncrementalDirectoryDataset
+from sales_cube import cube_cache, get_sales_cube
+
+
+def _write_csv(path, rows):
+    """Записывает CSV с продажами: список (дата, город, сумма)."""
+    lines = ['Дата,Город,Сумма,Валюта'] + [f'{date},{city},{amount},RUB' for date, city, amount in rows]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+def _assert_matches_full_load(dataset, directory):
+    """Проверяет, что инкрементальный набор совпадает с полной загрузкой каталога."""
+    df = dataset.view()
+    full = read_directory(str(directory), use_disk_cache=False)
+    assert calculate_kpis(df) == calculate_kpis(full)
+    assert sorted(df['Сумма']) == sorted(full['Сумма'])
+    assert df['Дата'].is_monotonic_increasing
+    cube = cube_cache.get(df.attrs[DATASET_FINGERPRINT_ATTR])
+    assert cube is not None
+    assert cube.kpi_metrics() == get_sales_cube(full).kpi_metrics()
+    pdt.assert_series_equal(cube.city_sales(), get_sales_cube(full).city_sales())
+    # Профиль качества собран из профилей файлов, без чтения всех строк
+    assert df.attrs[QUALITY_PROFILE_ATTR] == full.attrs[QUALITY_PROFILE_ATTR]
+
+
+def test_refresh_reads_only_new_files(tmp_path):
+    """Тест: добавленный файл подгружается без повторного чтения остальных."""
+    _write_csv(tmp_path / 'a.csv', [('2023-01-01', 'Москва', 100), ('2023-01-03', 'Казань', 50)])
+    dataset = IncrementalDirectoryDataset(str(tmp_path), use_disk_cache=False)
+
+    report = dataset.refresh()
+    assert report['added'] == ['a.csv']
+    assert SOURCE_COLUMN not in dataset.view().columns
+    first_fingerprint = dataset.view().attrs[DATASET_FINGERPRINT_ATTR]
+
+    _write_csv(tmp_path / 'b.csv', [('2023-01-02', 'Москва', 200), ('2023-01-03', 'Москва', 25)])
+    report = dataset.refresh()
+
+    assert report['added'] == ['b.csv']
+    assert [f['source'] for f in report['files']] == ['b.csv']
+    assert report['rows'] == 2
+    df = dataset.view()
+    assert df.attrs[DATASET_FINGERPRINT_ATTR] != first_fingerprint
+    # При равной дате строки упорядочены по источнику
+    assert list(df[SOURCE_COLUMN].astype(str)) == ['a.csv', 'b.csv', 'a.csv', 'b.csv']
+    _assert_matches_full_load(dataset, tmp_path)
+
+
+def test_refresh_does_not_resort_retained_rows(tmp_path, monkeypatch):
+    """Тест: при добавлении файла сортируются только его строки и строки тех же дат."""
+    _write_csv(tmp_path / 'a.csv', [(f'2023-01-{day:02d}', 'Москва', day) for day in range(1, 29)])
+    dataset = IncrementalDirectoryDataset(str(tmp_path), use_disk_cache=False, compact=True)
+    dataset.refresh()
+    retained = dataset.data
+
+    sorted_lengths = []
+    sort_by_date_and_source = incremental_loader.sort_by_date_and_source
+
+    def recording_sort(df):
+        sorted_lengths.append(len(df))
+        return sort_by_date_and_source(df)
+
+    monkeypatch.setattr(incremental_loader, 'sort_by_date_and_source', recording_sort)
+    _write_csv(tmp_path / 'b.csv', [('2023-01-28', 'Казань', 7), ('2023-02-01', 'Казань', 9)])
+    dataset.refresh()
+
+    # Новые строки (2) и одна сохраненная строка за 28 января
+    assert sorted_lengths == [2, 3]
+    assert list(dataset.data['Сумма'].iloc[:27]) == list(retained['Сумма'].iloc[:27])
+    assert list(dataset.data['Сумма'].iloc[-3:]) == [28, 7, 9]
+    assert dataset.data.attrs[incremental_loader.MEMORY_PROFILE_ATTR]['memory_after'] > 0
+    _assert_matches_full_load(dataset, tmp_path)
+
+
+def test_refresh_replaces_changed_and_drops_removed_files(tmp_path):
+    """Тест замены строк измененного файла и удаления строк удаленного."""
+    _write_csv(tmp_path / 'a.csv', [('2023-01-01', 'Москва', 100)])
+    _write_csv(tmp_path / 'b.csv', [('2023-01-02', 'Казань', 200)])
+    _write_csv(tmp_path / 'c.csv', [('2023-01-03', 'Казань', 300)])
+    dataset = IncrementalDirectoryDataset(str(tmp_path), use_disk_cache=False)
+    dataset.refresh()
+
+    _write_csv(tmp_path / 'a.csv', [('2023-01-01', 'Москва', 110), ('2023-01-04', 'Сочи', 5)])
+    os.remove(tmp_path / 'c.csv')
+    report = dataset.refresh()
+
+    assert (report['added'], report['changed'], report['removed']) == ([], ['a.csv'], ['c.csv'])
+    assert calculate_kpis(dataset.view())[0] == 315
+    _assert_matches_full_load(dataset, tmp_path)
+
+
+def test_refresh_skips_touched_files_with_same_content(tmp_path):
+    """Тест: файл с новым временем изменения, но прежним содержимым, не перечитывается."""
+    _write_csv(tmp_path / 'a.csv', [('2023-01-01', 'Москва', 100)])
+    _write_csv(tmp_path / 'b.csv', [('2023-01-02', 'Казань', 200)])
+    dataset = IncrementalDirectoryDataset(str(tmp_path), use_disk_cache=False)
+    dataset.refresh()
+    data = dataset.data
+
+    stat = os.stat(tmp_path / 'a.csv')
+    os.utime(tmp_path / 'a.csv', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    report = dataset.refresh()
+
+    assert (report['added'], report['changed'], report['removed']) == ([], [], [])
+    assert dataset.data is data
+    assert dataset.refresh()['files'] == []
+
+
+def test_projections_stay_row_aligned(tmp_path):
+    """Тест: проекции каталога с разными колонками совпадают построчно."""
+    (tmp_path / 'a.csv').write_text(
+        'Дата,Город,Имя,Фамилия,Сумма,Валюта\n'
+        '2023-01-02,Москва,Иван,Иванов,100,RUB\n2023-01-01,Казань,Анна,Петрова,50,RUB\n',
+        encoding='utf-8')
+    analysis = IncrementalDirectoryDataset(str(tmp_path), use_disk_cache=False, columns=['Сумма'])
+    names = IncrementalDirectoryDataset(str(tmp_path), use_disk_cache=False, columns=['Имя'])
+    analysis.refresh()
+    names.refresh()
+
+    (tmp_path / 'b.csv').write_text(
+        'Дата,Город,Имя,Фамилия,Сумма,Валюта\n2023-01-01,Сочи,Олег,Сидоров,70,RUB\n', encoding='utf-8')
+    analysis.refresh()
+    names.refresh()
+
+    combined = pd.DataFrame({'Сумма': analysis.view()['Сумма'].to_numpy(),
+                             'Имя': names.view()['Имя'].astype(str).to_numpy()})
+    assert combined.values.tolist() == [[50, 'Анна'], [70, 'Олег'], [100, 'Иван']]
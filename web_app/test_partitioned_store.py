@@ -0,0 +1,94 @@
+import pandas as pd
+import pandas.testing as pdt
+
+import partitioned_store
+from analysis import calculate_kpi_metrics
+from data_loader import read_directory
+from partitioned_store import PartitionedSalesStore, sync_partitioned_store, write_partitioned_store
+from row_index import get_row_index, sort_by_date
+from sales_cube import SalesCube
+
+
+def _sales_data():
+    """Создает тестовые данные за три месяца и строку без даты."""
+    return sort_by_date(pd.DataFrame({
+        'Дата': pd.to_datetime(['2023-01-15', '2023-01-31', '2023-02-01', '2023-02-20',
+                                '2023-03-05', pd.NaT]),
+        'Город': pd.Categorical(['Москва', 'Казань', 'Москва', 'Казань', 'Москва', 'Москва']),
+        'Имя': ['Иван', 'Анна', 'Олег', 'Мария', 'Петр', 'Нина'],
+        'Сумма': [100, 200, 300, 400, 500, 600],
+        'Валюта': pd.Categorical(['RUB'] * 6)
+    }))
+
+
+def test_write_creates_month_partitions(tmp_path):
+    """Тест записи разделов по месяцам и манифеста."""
+    manifest = write_partitioned_store(_sales_data(), str(tmp_path / 'store'))
+
+    assert [(p['month'], p['rows']) for p in manifest['partitions']] == [
+        ('2023-01', 2), ('2023-02', 2), ('2023-03', 1), ('undated', 1)
+    ]
+    store = PartitionedSalesStore.open(str(tmp_path / 'store'))
+    assert (str(store.min_date), str(store.max_date)) == ('2023-01-15', '2023-03-05')
+    assert store.cube.kpi_metrics() == SalesCube.from_frame(_sales_data()).kpi_metrics()
+    assert store.read()['Сумма'].tolist() == [100, 200, 300, 400, 500, 600]
+    assert (store.quality_profile['rows'], store.quality_profile['missing_dates']) == (6, 1)
+
+
+def test_read_opens_only_overlapping_partitions(tmp_path, monkeypatch):
+    """Тест: чтение диапазона дат открывает только пересекающиеся разделы."""
+    df = _sales_data()
+    write_partitioned_store(df, str(tmp_path / 'store'))
+    store = PartitionedSalesStore.open(str(tmp_path / 'store'))
+    opened = []
+    original_read_table = partitioned_store.pyarrow.parquet.read_table
+    monkeypatch.setattr(partitioned_store.pyarrow.parquet, 'read_table',
+                        lambda path, **kwargs: opened.append(path) or original_read_table(path, **kwargs))
+
+    rows = store.read('2023-01-31', '2023-02-10', columns=['Сумма'])
+
+    assert [path.split('/')[-2] for path in opened] == ['month=2023-01', 'month=2023-02']
+    assert list(rows.columns) == ['Дата', 'Сумма']
+    expected = get_row_index(df).filter(df, '2023-01-31', '2023-02-10')
+    assert rows['Сумма'].tolist() == expected['Сумма'].tolist()
+    pdt.assert_index_equal(rows.index, expected.index, check_names=False, exact=False)
+
+
+def test_filter_matches_row_index_for_city_and_projection(tmp_path):
+    """Тест: фильтр хранилища совпадает с индексом строк, проекции совпадают построчно."""
+    df = _sales_data()
+    write_partitioned_store(df, str(tmp_path / 'store'))
+    store = PartitionedSalesStore.open(str(tmp_path / 'store'))
+
+    amounts = store.filter(store.schema(['Сумма']), '2023-01-01', '2023-03-31', city='Москва')
+    names = store.filter(store.schema(['Имя']), '2023-01-01', '2023-03-31', city='Москва')
+
+    assert amounts['Сумма'].tolist() == [100, 300, 500]
+    assert names['Имя'].tolist() == ['Иван', 'Олег', 'Петр']
+    assert store.read('2024-01-01', '2024-01-31').empty
+
+
+def test_sync_rebuilds_store_when_files_change(tmp_path):
+    """Тест пересоздания хранилища при изменении файлов каталога."""
+    (tmp_path / 'a.csv').write_text('Дата,Город,Сумма,Валюта\n2023-01-01,Москва,100,RUB\n', encoding='utf-8')
+    store = sync_partitioned_store(str(tmp_path))
+    assert sync_partitioned_store(str(tmp_path)).manifest == store.manifest
+
+    (tmp_path / 'b.csv').write_text('Дата,Город,Сумма,Валюта\n2023-02-01,Казань,50,RUB\n', encoding='utf-8')
+    store = sync_partitioned_store(str(tmp_path))
+
+    assert [p['month'] for p in store.partitions] == ['2023-01', '2023-02']
+    assert store.read('2023-02-01', '2023-02-28')['Сумма'].tolist() == [5000]
+
+
+def test_store_keeps_amounts_in_cents(tmp_path):
+    """Тест: хранилище каталога хранит целые копейки, KPI совпадают с загрузкой в память точно."""
+    (tmp_path / 'a.csv').write_text('Дата,Город,Сумма,Валюта\n2023-01-01,Москва,0.1,RUB\n'
+                                    '2023-01-01,Казань,0.2,RUB\n2023-02-01,Москва,100.35,RUB\n', encoding='utf-8')
+
+    store = sync_partitioned_store(str(tmp_path))
+    df = read_directory(str(tmp_path), amount_dtype='cents')
+
+    assert store.amount_scale == 100
+    assert store.read()['Сумма'].dtype == 'int64'
+    assert store.cube.kpi_metrics() == SalesCube.from_frame(df).kpi_metrics() == calculate_kpi_metrics(df)
@@ -0,0 +1,101 @@
+import pandas as pd
+import pytest
+
+from analysis import calculate_daily_sales, calculate_kpi_metrics
+from data_loader import SOURCE_COLUMN, compact_sales_frame, read_directory
+from query_backend import ROW_LIMIT_ATTR, WEEKDAYS, PandasBackend, SQLiteBackend, sync_sqlite_backend
+from row_index import sort_by_date
+
+
+def _sales_data():
+    """Создает тестовые данные: несколько продаж в день, пропуски даты и города."""
+    return sort_by_date(pd.DataFrame({
+        'Дата': pd.to_datetime(['2023-01-02 10:00', '2023-01-02 12:00', '2023-01-03 09:00',
+                                '2023-01-08 18:00', '2023-01-09 19:00', pd.NaT]),
+        'Город': ['Москва', 'Казань', 'Москва', 'Казань', None, 'Москва'],
+        'Имя': ['Иван', 'Анна', 'Олег', 'Мария', 'Петр', 'Нина'],
+        'Сумма': [100.5, 200, 300, 50, 25, 10],
+        'Валюта': ['RUB'] * 6
+    }))
+
+
+@pytest.fixture(params=[None, 'cents'])
+def backends(request, tmp_path):
+    """Бэкенды в памяти и SQLite для одних и тех же данных (суммы в рублях и копейках)."""
+    df = _sales_data()
+    if request.param is not None:
+        df = compact_sales_frame(df, request.param)[0]
+    return df, PandasBackend(df), SQLiteBackend.create(str(tmp_path / 'sales.sqlite'), [df],
+                                                       amount_dtype=request.param)
+
+
+@pytest.mark.parametrize('start_date,end_date,city', [
+    (None, None, None), ('2023-01-03', '2023-01-08', None), (None, None, 'Москва'), ('2023-02-01', None, None)
+])
+def test_sqlite_aggregates_match_pandas(backends, start_date, end_date, city):
+    """Тест: агрегаты SQLite совпадают с бэкендом в памяти и функциями анализа."""
+    df, memory, sqlite = backends
+
+    assert sqlite.kpi_metrics(start_date, end_date, city) == pytest.approx(memory.kpi_metrics(start_date, end_date, city))
+    pd.testing.assert_series_equal(sqlite.daily_sales(start_date, end_date, city),
+                                   memory.daily_sales(start_date, end_date, city), check_dtype=False)
+    pd.testing.assert_series_equal(sqlite.weekday_sales(start_date, end_date, city),
+                                   memory.weekday_sales(start_date, end_date, city), check_dtype=False)
+    pd.testing.assert_series_equal(sqlite.city_sales(start_date, end_date),
+                                   memory.city_sales(start_date, end_date), check_dtype=False,
+                                   check_categorical=False, check_index_type=False)
+
+
+def test_sqlite_cube_and_rows_match_dataframe(backends):
+    """Тест куба, границ дат и строк таблицы данных из SQLite."""
+    df, memory, sqlite = backends
+
+    assert (sqlite.min_date, sqlite.max_date) == (memory.min_date, memory.max_date)
+    assert sqlite.cube.kpi_metrics() == pytest.approx(calculate_kpi_metrics(df))
+    pd.testing.assert_series_equal(sqlite.cube.daily_sales(), calculate_daily_sales(df.dropna(subset=['Дата'])),
+                                   check_dtype=False)
+    assert list(sqlite.weekday_sales().index) == WEEKDAYS
+
+    rows = sqlite.filter(sqlite.schema(['Сумма', 'Город']), '2023-01-02', '2023-01-08', city='Москва')
+    expected = memory.filter(df, '2023-01-02', '2023-01-08', city='Москва')
+    assert list(rows.columns) == ['Дата', 'Город', 'Сумма']
+    assert rows['Сумма'].tolist() == expected['Сумма'].tolist()
+    assert list(rows.index) == list(expected.index)
+    names = sqlite.filter(sqlite.schema(['Имя']), limit=2)
+    assert names['Имя'].tolist() == ['Иван', 'Анна']
+    assert names.attrs[ROW_LIMIT_ATTR] == 2
+    assert ROW_LIMIT_ATTR not in sqlite.filter(sqlite.schema(['Имя']), limit=5).attrs
+    assert sqlite.quality_profile == memory.quality_profile
+
+
+def test_sqlite_stores_cents_from_raw_chunks(tmp_path):
+    """Тест: база из чанков с суммами в рублях хранит целые копейки, KPI совпадают точно."""
+    df = _sales_data().assign(**{'Сумма': [0.1, 0.2, 100.35, 50.15, 25.05, 10]})
+    cents = compact_sales_frame(df, 'cents')[0]
+
+    sqlite = SQLiteBackend.create(str(tmp_path / 'sales.sqlite'), [df.iloc[:3], df.iloc[3:]])
+
+    assert sqlite.amount_scale == 100
+    assert sqlite._query("SELECT typeof(\"Сумма\") FROM sales LIMIT 1")[0][0] == 'integer'
+    assert sqlite.kpi_metrics() == PandasBackend(cents).kpi_metrics() == calculate_kpi_metrics(cents)
+
+
+def test_sqlite_backend_follows_directory_sheets_and_changes(tmp_path):
+    """Тест: база содержит все листы и колонку источника и пересоздается при изменении файлов."""
+    with pd.ExcelWriter(tmp_path / 'months.xlsx') as writer:
+        for month, day, amount in [('Январь', '2023-01-02', 100.5), ('Февраль', '2023-02-03', 200)]:
+            pd.DataFrame({'Дата': [day], 'Город': ['Москва'], 'Сумма': [amount],
+                          'Валюта': ['RUB']}).to_excel(writer, sheet_name=month, index=False)
+    (tmp_path / 'extra.csv').write_text('Дата,Город,Сумма,Валюта\n2023-03-01,Казань,50,RUB\n', encoding='utf-8')
+
+    sqlite = sync_sqlite_backend(str(tmp_path))
+    full = read_directory(str(tmp_path), use_disk_cache=False)
+    assert sqlite.kpi_metrics() == pytest.approx(calculate_kpi_metrics(full))
+    assert sorted(row[0] for row in sqlite._query(f'SELECT DISTINCT "{SOURCE_COLUMN}" FROM sales')) == \
+        sorted(full[SOURCE_COLUMN].astype(str).unique())
+    assert sync_sqlite_backend(str(tmp_path)).fingerprint == sqlite.fingerprint
+
+    (tmp_path / 'extra.csv').write_text('Дата,Город,Сумма,Валюта\n2023-03-01,Казань,70,RUB\n', encoding='utf-8')
+    rebuilt = sync_sqlite_backend(str(tmp_path))
+    assert rebuilt.source_fingerprint != sqlite.source_fingerprint
+    assert rebuilt.kpi_metrics()[0] == pytest.approx(370.5)
@@ -0,0 +1,82 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from row_index import SalesRowIndex, sort_by_date
+
+
+def _sales_data():
+    """Создает неотсортированные тестовые данные с пропущенными датами."""
+    return pd.DataFrame({
+        'Дата': pd.to_datetime(['2023-01-03 10:00', None, '2023-01-01 09:00', '2023-01-02 23:59',
+                                '2023-01-01 18:00', '2023-01-05 00:00']),
+        'Город': ['Москва', 'Казань', 'Москва', 'Пермь', 'Казань', 'Москва'],
+        'Сумма': [300, 10, 100, 200, 150, 500]
+    })
+
+
+def _mask_filter(df, start_date, end_date):
+    """Фильтрация по дате через булеву маску (эталон)."""
+    return df.loc[(df['Дата'].dt.date >= start_date) & (df['Дата'].dt.date <= end_date)]
+
+
+def test_sort_by_date_sets_datetime_index():
+    """Тест сортировки по дате: NaT в конце, индекс datetime64."""
+    df = sort_by_date(_sales_data())
+
+    assert isinstance(df.index, pd.DatetimeIndex)
+    assert df['Дата'].iloc[:-1].is_monotonic_increasing
+    assert df['Дата'].isna().iloc[-1]
+    assert df['Сумма'].tolist() == [100, 150, 200, 300, 500, 10]
+
+
+def test_row_index_filter_matches_mask():
+    """Тест бинарного поиска по дате: результат совпадает с фильтрацией маской."""
+    df = sort_by_date(_sales_data())
+    index = SalesRowIndex.from_frame(df)
+
+    assert index.min_date == datetime.date(2023, 1, 1)
+    assert index.max_date == datetime.date(2023, 1, 5)
+
+    days = pd.date_range('2022-12-31', '2023-01-06').date
+    for start in days:
+        for end in days:
+            expected = _mask_filter(df, start, end)
+            pd.testing.assert_frame_equal(index.filter(df, start, end), expected)
+
+
+def test_row_index_filter_is_zero_copy_slice():
+    """Тест: для отсортированных данных фильтр возвращает срез без копирования."""
+    df = sort_by_date(_sales_data())
+    index = SalesRowIndex.from_frame(df)
+
+    assert index.positions(datetime.date(2023, 1, 2), datetime.date(2023, 1, 3)) == slice(2, 4)
+    filtered = index.filter(df, datetime.date(2023, 1, 2), datetime.date(2023, 1, 3))
+    assert np.shares_memory(filtered['Сумма'].to_numpy(), df['Сумма'].to_numpy())
+
+
+def test_row_index_unsorted_frame_fallback():
+    """Тест индекса для неотсортированных данных."""
+    df = _sales_data()
+    index = SalesRowIndex.from_frame(df)
+
+    assert index.order is not None
+    filtered = index.filter(df, datetime.date(2023, 1, 1), datetime.date(2023, 1, 2))
+    assert sorted(filtered['Сумма'].tolist()) == [100, 150, 200]
+
+
+def test_row_index_city_and_date_intersection():
+    """Тест фильтра по городу и дате через списки позиций строк городов."""
+    for df in [sort_by_date(_sales_data()), _sales_data(),
+               sort_by_date(_sales_data()).astype({'Город': 'category'})]:
+        index = SalesRowIndex.from_frame(df)
+        days = pd.date_range('2022-12-31', '2023-01-06').date
+        for city in ['Москва', 'Казань', 'Пермь', 'Уфа']:
+            for start in days:
+                for end in days:
+                    expected = _mask_filter(df, start, end)
+                    expected = expected[expected['Город'] == city]
+                    # Для неотсортированных данных строки возвращаются в порядке дат
+                    pd.testing.assert_frame_equal(index.filter(df, start, end, city).sort_index(),
+                                                  expected.sort_index())
@@ -0,0 +1,150 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import (DATASET_FINGERPRINT_ATTR, calculate_daily_sales, calculate_group_kpis, calculate_kpis,
+                      convert_currency)
+from fx_rates import read_fx_rates
+from sales_cube import (COUNT_COLUMN, UNCONVERTED_ATTR, SalesCube, cube_cache, get_converted_cube,
+                        get_group_kpis, get_range_kpi_metrics, get_sales_cube, kpi_cache)
+
+
+def _sales_data():
+    """Создает тестовые данные о продажах с несколькими городами и валютами."""
+    return pd.DataFrame({
+        'Дата': pd.to_datetime(['2023-01-01 10:00', '2023-01-01 12:00', '2023-01-02 09:00',
+                                '2023-01-03 18:00', '2023-01-03 19:00', pd.NaT]),
+        'Город': ['Москва', 'Казань', 'Москва', 'Казань', None, 'Москва'],
+        'Сумма': [100, 200, 300, 50, 25, 10],
+        'Валюта': ['RUB', 'RUB', 'USD', 'RUB', 'RUB', 'RUB']
+    })
+
+
+def test_sales_cube_matches_row_level_kpis():
+    """Тест совпадения KPI по кубу и по исходным строкам."""
+    df = _sales_data()
+    cube = SalesCube.from_frame(df)
+
+    assert cube.kpi_metrics() == calculate_kpis(df)
+    assert cube.transaction_count() == 5  # строка с NaT исключена
+    pd.testing.assert_series_equal(cube.daily_sales(), calculate_daily_sales(df.dropna(subset=['Дата'])))
+
+
+def test_sales_cube_filter_by_date_and_city():
+    """Тест фильтрации куба по диапазону дат и городу."""
+    df = _sales_data()
+    cube = SalesCube.from_frame(df)
+
+    filtered = cube.filter(datetime.date(2023, 1, 1), datetime.date(2023, 1, 2), city='Москва')
+    expected = df[(df['Дата'] < '2023-01-03') & (df['Город'] == 'Москва')]
+    assert filtered.kpi_metrics() == calculate_kpis(expected)
+
+    assert cube.cities() == ['Казань', 'Москва']
+    assert cube.currencies() == ['RUB', 'USD']
+    assert cube.city_sales().to_dict() == {'Москва': 400, 'Казань': 250}
+    assert cube.filter(city='Пермь').empty
+
+
+def test_group_kpis_match_row_level_group_kpis():
+    """Тест: KPI по городам из куба совпадают с расчетом по строкам."""
+    df = _sales_data()
+    pd.testing.assert_frame_equal(SalesCube.from_frame(df).group_kpis('Город'), calculate_group_kpis(df, 'Город'))
+
+
+def test_get_sales_cube_cached_by_fingerprint():
+    """Тест кэширования куба по отпечатку набора данных."""
+    cube_cache.clear()
+    df = _sales_data()
+    df.attrs[DATASET_FINGERPRINT_ATTR] = 'test-fingerprint'
+
+    cube = get_sales_cube(df)
+    assert get_sales_cube(df.copy()) is cube
+    assert cube.data[COUNT_COLUMN].dtype == np.int64
+    assert cube_cache.stats()['hits'] == 1
+
+
+def test_kpi_results_cached_by_fingerprint_and_filters():
+    """Тест: повтор тех же фильтров (в любом типе дат) берет KPI из кэша."""
+    kpi_cache.clear()
+    cube = SalesCube.from_frame(_sales_data())
+
+    first = get_range_kpi_metrics(cube, 'fp', datetime.date(2023, 1, 1), datetime.date(2023, 1, 2), 'Москва')
+    assert first == cube.range_kpi_metrics(datetime.date(2023, 1, 1), datetime.date(2023, 1, 2), 'Москва')
+    assert get_range_kpi_metrics(cube, 'fp', '2023-01-01', pd.Timestamp('2023-01-02 18:00'), 'Москва') == first
+    get_range_kpi_metrics(cube, 'fp', datetime.date(2023, 1, 1), None, 'Москва')
+    get_range_kpi_metrics(cube, 'other-fp', datetime.date(2023, 1, 1), datetime.date(2023, 1, 2), 'Москва')
+
+    city_kpis = get_group_kpis(cube, 'fp', 'Город', datetime.date(2023, 1, 1))
+    assert get_group_kpis(cube, 'fp', 'Город', '2023-01-01') is city_kpis
+    pd.testing.assert_frame_equal(city_kpis, cube.filter(datetime.date(2023, 1, 1)).group_kpis('Город'))
+
+    # Без отпечатка результат вычисляется без кэширования
+    get_range_kpi_metrics(cube, None)
+    stats = kpi_cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (2, 4, 4)
+
+
+def test_range_kpi_metrics_match_filtered_rows():
+    """Тест KPI по индексу для всех диапазонов дат и городов."""
+    rng = np.random.default_rng(0)
+    dates = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 40, 500), unit='D')
+    df = pd.DataFrame({
+        'Дата': dates,
+        'Город': rng.choice(['Москва', 'Казань', 'Пермь'], 500),
+        'Сумма': rng.integers(-50, 1000, 500),
+        'Валюта': 'RUB'
+    })
+    cube = SalesCube.from_frame(df)
+
+    days = pd.date_range('2022-12-30', '2023-02-12', freq='3D').date
+    for city in [None, 'Москва', 'Пермь']:
+        for start in days:
+            for end in days[::4]:
+                rows = df[(df['Дата'].dt.date >= start) & (df['Дата'].dt.date <= end)]
+                if city is not None:
+                    rows = rows[rows['Город'] == city]
+                expected = calculate_kpis(rows)
+                assert cube.range_kpi_metrics(start, end, city) == pytest.approx(expected)
+
+    assert cube.range_kpi_metrics(city='Уфа') == (0, 0, 0)
+    assert SalesCube.from_frame(df.iloc[:0]).range_kpi_metrics() == (0, 0, 0)
+
+
+def test_converted_cube_matches_converted_rows(tmp_path):
+    """Тест: куб в валюте отчета совпадает с переводом отдельных транзакций и кэшируется."""
+    (tmp_path / 'rates.csv').write_text('Дата,Валюта,Курс\n02.01.2023,USD,80\n01.01.2023,USD,70\n',
+                                        encoding='utf-8')
+    rates = read_fx_rates(str(tmp_path / 'rates.csv'))
+    df = _sales_data()
+    df.loc[0, 'Валюта'] = 'USD'
+    df.attrs[DATASET_FINGERPRINT_ATTR] = 'fx-test'
+    cube = get_sales_cube(df)
+
+    converted = get_converted_cube(cube, rates, 'RUB', 'fx-test')
+
+    assert get_converted_cube(cube, rates, 'RUB', 'fx-test') is converted
+    assert converted.currencies() == ['RUB']
+    assert converted.kpi_metrics() == calculate_kpis(convert_currency(df, rates, 'RUB'))
+    assert converted.total_sales() == 100 * 70 + 200 + 300 * 80 + 50 + 25
+    assert converted.data.attrs[UNCONVERTED_ATTR] == 0
+    assert cube.currency_kpis().loc['USD', 'total_sales'] == 400
+
+
+
+def test_converted_cube_counts_currencies_without_rates(tmp_path):
+    """Тест: транзакции валюты без курсов не ломают перевод и считаются непереведенными."""
+    (tmp_path / 'rates.csv').write_text('Дата,Валюта,Курс\n01.01.2023,USD,70\n', encoding='utf-8')
+    rates = read_fx_rates(str(tmp_path / 'rates.csv'))
+    df = _sales_data()
+    df.loc[0, 'Валюта'] = 'GBP'
+    cube = SalesCube.from_frame(df)
+
+    rub = cube.convert_currency(rates, 'RUB')
+    gbp = cube.convert_currency(rates, 'GBP')
+
+    assert rub.data.attrs[UNCONVERTED_ATTR] == 1
+    assert rub.total_sales() == 200 + 300 * 70 + 50 + 25
+    assert gbp.data.attrs[UNCONVERTED_ATTR] == 4
+    assert gbp.total_sales() == 100